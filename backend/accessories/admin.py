@@ -1,11 +1,14 @@
 from django.contrib import admin
+from mobile_store.admin_utils import LargeTableAdmin
+from mobile_store.repricing import reprice_action
 from .models import Accessory
 
 
 @admin.register(Accessory)
-class AccessoryAdmin(admin.ModelAdmin):
+class AccessoryAdmin(LargeTableAdmin):
     list_display = ['accessory_id', 'name', 'category', 'price', 'stock_quantity', 'created_at']
     search_fields = ['name', 'description']
     list_filter = ['category', 'created_at']
     list_editable = ['price', 'stock_quantity']
     readonly_fields = ['created_at', 'updated_at']
+    actions = [reprice_action('ACCESSORY', description='Reprice selected accessories')]
@@ -0,0 +1,38 @@
+"""
+Async read-only views for accessories, served under ASGI.
+
+See mobile_store/urls_asgi.py. Responses match the GET actions of
+AccessoryViewSet.
+"""
+
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from inventory.reservations import with_available_stock
+from mobile_store.async_views import bad_request, filter_catalog, not_found, paginate
+from .models import Accessory
+from .serializers import AccessorySerializer
+from .views import AccessoryViewSet
+
+
+async def accessory_list(request):
+    """List accessories, newest changes first"""
+    try:
+        queryset = filter_catalog(
+            with_available_stock(Accessory.objects.order_by('-updated_at'), 'ACCESSORY'),
+            request.GET,
+            filter_fields=AccessoryViewSet.filterset_fields,
+            search_fields=AccessoryViewSet.search_fields,
+            ordering_fields=AccessoryViewSet.ordering_fields,
+        )
+        return await paginate(request, queryset, AccessorySerializer)
+    except (ValueError, ValidationError) as e:
+        return bad_request(str(e))
+
+
+async def accessory_detail(request, pk):
+    """Retrieve an accessory"""
+    try:
+        accessory = await with_available_stock(Accessory.objects.all(), 'ACCESSORY').aget(pk=pk)
+    except Accessory.DoesNotExist:
+        return not_found()
+    return JsonResponse(AccessorySerializer(accessory, context={'request': request}).data)
@@ -0,0 +1,15 @@
+"""
+Export definition for accessories (see mobile_store/exports.py).
+"""
+
+from mobile_store.exports import ExportSpec
+from .models import Accessory
+
+ACCESSORY_EXPORT = ExportSpec(
+    name='accessories',
+    queryset=Accessory.objects.all(),
+    fields=(
+        'accessory_id', 'name', 'category', 'price', 'stock_quantity', 'description',
+        'image_url', 'image__name', 'created_at', 'updated_at',
+    ),
+)
@@ -0,0 +1,14 @@
+"""
+Catalog import definition for accessories (see mobile_store/catalog_import.py).
+"""
+
+from mobile_store.catalog_import import ImportSpec
+from .models import Accessory
+from .serializers import AccessoryImportSerializer
+
+ACCESSORY_IMPORT = ImportSpec(
+    model=Accessory,
+    serializer_class=AccessoryImportSerializer,
+    key=('name', 'category'),
+    fields=tuple(AccessoryImportSerializer.Meta.fields),
+)
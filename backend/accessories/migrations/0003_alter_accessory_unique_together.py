@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:24
+
+"""
+Make (name, category) unique; catalog imports upsert accessories by it.
+
+Existing duplicates are renamed first: the oldest row keeps the name, the
+others get their id appended (e.g. "USB-C Cable (42)"), so no product,
+cart item or order line changes identity. Review renamed rows afterwards.
+"""
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def rename_duplicates(apps, schema_editor):
+    Accessory = apps.get_model('accessories', 'Accessory')
+    max_length = Accessory._meta.get_field('name').max_length
+    duplicates = (
+        Accessory.objects.values('name', 'category')
+        .annotate(count=Count('pk')).filter(count__gt=1)
+    )
+    for group in duplicates:
+        rows = Accessory.objects.filter(name=group['name'], category=group['category']).order_by('pk')
+        for accessory_id, name in rows.values_list('pk', 'name')[1:]:
+            suffix = f' ({accessory_id})'
+            Accessory.objects.filter(pk=accessory_id).update(
+                name=name[:max_length - len(suffix)] + suffix
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessories', '0002_accessory_image_alter_accessory_image_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='accessory',
+            unique_together={('name', 'category')},
+        ),
+    ]
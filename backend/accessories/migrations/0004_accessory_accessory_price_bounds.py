@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessories', '0003_alter_accessory_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='accessory',
+            constraint=models.CheckConstraint(check=models.Q(('price__gte', 0), ('price__lte', 999999.99)), name='accessory_price_bounds'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessories', '0004_accessory_accessory_price_bounds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accessory',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of image (see mobile_store/images.py)', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accessories', '0006_alter_accessory_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accessory',
+            index=models.Index(fields=['updated_at', 'accessory_id'], name='accessory_updated_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from mobile_store.constants import MAX_PRICE
+from mobile_store.models import LoadedStockMixin
+from mobile_store.validators import validate_image_file
 
 
-class Accessory(models.Model):
+class Accessory(LoadedStockMixin, models.Model):
     """Model for mobile phone accessories"""
     CATEGORY_CHOICES = [
         ('Case', 'Phone Case'),
@@ -20,14 +23,28 @@ class Accessory(models.Model):
     stock_quantity = models.IntegerField(default=0)
     description = models.TextField(blank=True, null=True)
     image_url = models.URLField(blank=True, null=True, help_text='Image URL (optional if image file is uploaded)')
-    image = models.ImageField(upload_to='accessories/', blank=True, null=True, help_text='Upload image file (optional if image URL is provided)')
+    image = models.ImageField(upload_to='accessories/', blank=True, null=True, validators=[validate_image_file], help_text='Upload image file (optional if image URL is provided)')
+    image_derivatives = models.JSONField(default=dict, blank=True, null=True, editable=False, help_text='Resized copies of image (see mobile_store/images.py)')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    xact_id = models.BigIntegerField(null=True, blank=True, editable=False, help_text='Writing transaction, set by trigger on PostgreSQL (see mobile_store/visibility.py)')
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Accessory'
         verbose_name_plural = 'Accessories'
+        unique_together = ['name', 'category']
+        indexes = [
+            # Keyset order of the change feed (see mobile_store/changes.py).
+            models.Index(fields=['updated_at', 'accessory_id'], name='accessory_updated_idx'),
+        ]
+        constraints = [
+            # validate_price bounds, enforced for bulk updates too
+            models.CheckConstraint(
+                check=models.Q(price__gte=0, price__lte=MAX_PRICE),
+                name='accessory_price_bounds',
+            ),
+        ]
 
     def __str__(self):
         return self.name
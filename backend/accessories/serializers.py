@@ -1,21 +1,33 @@
 from rest_framework import serializers
+from inventory.reservations import available_stock
+from mobile_store.images import ImageSrcsetField
+from mobile_store.repricing import RepriceSerializer
+from mobile_store.validators import validate_image_file, validate_price, validate_stock_quantity
 from .models import Accessory
 
 
 class AccessorySerializer(serializers.ModelSerializer):
     """Serializer for Accessory model"""
     is_in_stock = serializers.BooleanField(read_only=True)
-    image = serializers.ImageField(required=False, allow_null=True)
+    available_stock = serializers.SerializerMethodField()
+    image = serializers.ImageField(required=False, allow_null=True, validators=[validate_image_file])
     image_display = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = Accessory
         fields = [
-            'accessory_id', 'name', 'category', 'price', 'stock_quantity',
-            'description', 'image_url', 'image', 'image_display', 'is_in_stock', 'created_at', 'updated_at'
+            'accessory_id', 'name', 'category', 'price', 'stock_quantity', 'available_stock',
+            'description', 'image_url', 'image', 'image_display', 'image_srcset', 'is_in_stock', 'created_at', 'updated_at'
         ]
         read_only_fields = ['accessory_id', 'created_at', 'updated_at']
-    
+
+    def get_available_stock(self, obj):
+        # Use the annotation from the viewset queryset when present
+        if hasattr(obj, 'available_stock'):
+            return obj.available_stock
+        return available_stock('ACCESSORY', obj.pk)
+
     def get_image_display(self, obj):
         """Return the best available image URL"""
         request = self.context.get('request')
@@ -34,3 +46,29 @@ class AccessorySerializer(serializers.ModelSerializer):
         if value < 0:
             raise serializers.ValidationError("Stock quantity cannot be negative")
         return value
+
+
+class AccessoryImportSerializer(AccessorySerializer):
+    """
+    Validates one row of a catalog import file.
+
+    The (name, category) uniqueness check is left to the upsert.
+    """
+    is_in_stock = None
+    available_stock = None
+    image = None
+    image_display = None
+    image_srcset = None
+
+    class Meta(AccessorySerializer.Meta):
+        fields = ['name', 'category', 'price', 'stock_quantity', 'description', 'image_url']
+        extra_kwargs = {
+            'price': {'validators': [validate_price]},
+            'stock_quantity': {'validators': [validate_stock_quantity]},
+        }
+        validators = []
+
+
+class AccessoryRepriceSerializer(RepriceSerializer):
+    """Serializer for repricing every accessory of a category"""
+    category = serializers.ChoiceField(choices=Accessory.CATEGORY_CHOICES)
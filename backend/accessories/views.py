@@ -1,14 +1,23 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
+from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
+from inventory.reservations import with_available_stock
+from mobile_store.catalog_import import import_upload
+from mobile_store.changes import changes_response
+from mobile_store.db_router import ReplicaReadMixin
+from mobile_store.exports import export_response
+from mobile_store.repricing import reprice_response
+from .exporters import ACCESSORY_EXPORT
+from .importers import ACCESSORY_IMPORT
 from .models import Accessory
-from .serializers import AccessorySerializer
+from .serializers import AccessoryRepriceSerializer, AccessorySerializer
 
 
-class AccessoryViewSet(viewsets.ModelViewSet):
+class AccessoryViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for Accessory CRUD operations
     List, Create, Retrieve, Update, Delete accessories
@@ -24,10 +33,14 @@ class AccessoryViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Ensure fresh data is always fetched from database"""
-        return Accessory.objects.all().order_by('-updated_at')
+        queryset = Accessory.objects.all().order_by('-updated_at')
+        if self.action in ('list', 'retrieve'):
+            # Writes respond with the stock after the change instead.
+            queryset = with_available_stock(queryset, 'ACCESSORY')
+        return queryset
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_import', 'export', 'reprice']:
             return [IsAdminUser()]
         return [IsAuthenticatedOrReadOnly()]
 
@@ -59,3 +72,30 @@ class AccessoryViewSet(viewsets.ModelViewSet):
     def partial_update(self, request, *args, **kwargs):
         response = super().partial_update(request, *args, **kwargs)
         return self._add_no_cache_headers(response)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """Create or update accessories from an uploaded CSV or JSONL file (admin only)"""
+        return import_upload(request, ACCESSORY_IMPORT)
+
+    @action(detail=False, methods=['get'])
+    @method_decorator(never_cache)
+    def changes(self, request):
+        """Accessories changed or deleted since ``?since=<cursor>`` (see mobile_store/changes.py)"""
+        return changes_response(
+            request, with_available_stock(Accessory.objects.all(), 'ACCESSORY'), 'ACCESSORY', AccessorySerializer
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every accessory as CSV or JSONL (admin only)"""
+        return export_response(request, ACCESSORY_EXPORT)
+
+    @action(detail=False, methods=['post'])
+    def reprice(self, request):
+        """Change the price of every accessory of a category in one update (admin only)"""
+        serializer = AccessoryRepriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        accessories = Accessory.objects.filter(category=changes.pop('category'))
+        return reprice_response(accessories, 'ACCESSORY', changes)
@@ -1,6 +1,26 @@
 from django.contrib import admin
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from accessories.models import Accessory
+from mobile_store.admin_utils import LargeTableAdmin
+from phones.models import MobilePhone
 from .models import Cart, CartItem
 
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def unit_price():
+    """Current price of a cart item's product as a query expression."""
+    return Case(
+        When(product_type='PHONE', then=Subquery(
+            MobilePhone.objects.filter(pk=OuterRef('product_id')).values('price')[:1]
+        )),
+        When(product_type='ACCESSORY', then=Subquery(
+            Accessory.objects.filter(pk=OuterRef('product_id')).values('price')[:1]
+        )),
+        output_field=PRICE_FIELD,
+    )
+
 
 class CartItemInline(admin.TabularInline):
     model = CartItem
@@ -9,15 +29,44 @@ class CartItemInline(admin.TabularInline):
 
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdmin):
     list_display = ['cart_id', 'customer', 'total_items', 'total_amount', 'created_at']
+    list_select_related = ['customer']
     search_fields = ['customer__name', 'customer__email']
     readonly_fields = ['total_items', 'total_amount', 'created_at', 'updated_at']
+    autocomplete_fields = ['customer']
     inlines = [CartItemInline]
 
+    def get_queryset(self, request):
+        # Correlated subqueries are only evaluated for the rows on the page.
+        items = CartItem.objects.filter(cart=OuterRef('pk')).values('cart')
+        item_count = items.annotate(total=Count('pk')).values('total')
+        amount = items.annotate(total=Sum(F('quantity') * unit_price())).values('total')
+        return super().get_queryset(request).annotate(
+            _total_items=Coalesce(Subquery(item_count), 0),
+            _total_amount=Coalesce(Subquery(amount, output_field=PRICE_FIELD), 0, output_field=PRICE_FIELD),
+        )
+
+    @admin.display(description='Total items', ordering='_total_items')
+    def total_items(self, obj):
+        return obj._total_items
+
+    @admin.display(description='Total amount', ordering='_total_amount')
+    def total_amount(self, obj):
+        return round(obj._total_amount, 2)
+
 
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(LargeTableAdmin):
     list_display = ['cart_item_id', 'cart', 'product_type', 'product_id', 'quantity', 'subtotal']
     list_filter = ['product_type', 'created_at']
+    list_select_related = ['cart__customer']
     readonly_fields = ['product_name', 'unit_price', 'subtotal']
+    autocomplete_fields = ['cart']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_subtotal=F('quantity') * unit_price())
+
+    @admin.display(description='Subtotal', ordering='_subtotal')
+    def subtotal(self, obj):
+        return round(obj._subtotal, 2) if obj._subtotal is not None else 0
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import prefetch_related_objects
 from django.conf import settings
 from phones.models import MobilePhone
 from accessories.models import Accessory
@@ -22,6 +23,18 @@ class Cart(models.Model):
     def total_items(self):
         return self.items.count()
 
+    def prefetch_items(self):
+        """
+        Load the items and their products for rendering the cart.
+
+        Takes one query for the items and one per product type, instead of
+        one per item and property (``product_name``, ``unit_price``,
+        ``subtotal``, ``total_amount``).
+        """
+        prefetch_related_objects([self], 'items')
+        load_products(self.items.all())
+        return self
+
     @property
     def total_amount(self):
         total = 0
@@ -55,12 +68,10 @@ class CartItem(models.Model):
 
     @property
     def product(self):
-        """Get the actual product object"""
-        if self.product_type == 'PHONE':
-            return MobilePhone.objects.filter(phone_id=self.product_id).first()
-        elif self.product_type == 'ACCESSORY':
-            return Accessory.objects.filter(accessory_id=self.product_id).first()
-        return None
+        """Get the actual product object, loaded once per item"""
+        if not hasattr(self, '_product'):
+            load_products([self])
+        return self._product
 
     @property
     def product_name(self):
@@ -82,3 +93,25 @@ class CartItem(models.Model):
     def subtotal(self):
         """Calculate subtotal for this item"""
         return self.unit_price * self.quantity
+
+
+def load_products(items):
+    """
+    Attach their products to cart items, with one query per product type.
+
+    Phones come with their brand, which ``product_name`` uses. Items whose
+    product no longer exists get None.
+    """
+    querysets = {
+        'PHONE': MobilePhone.objects.select_related('brand'),
+        'ACCESSORY': Accessory.objects.all(),
+    }
+    by_type = {}
+    for item in items:
+        by_type.setdefault(item.product_type, []).append(item)
+    for product_type, typed_items in by_type.items():
+        products = {}
+        if product_type in querysets:
+            products = querysets[product_type].in_bulk({item.product_id for item in typed_items})
+        for item in typed_items:
+            item._product = products.get(item.product_id)
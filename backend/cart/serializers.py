@@ -4,6 +4,28 @@ from phones.models import MobilePhone
 from accessories.models import Accessory
 
 
+def validate_product(product_type, product_id):
+    """
+    Check that the product of a cart item exists.
+
+    Stock is not checked here: ``reserve`` (see inventory/reservations.py)
+    checks the requested quantity against the stock the other carts have not
+    reserved, summed over the shards of a sharded product.
+
+    Raises:
+        ValidationError: For an unknown product type or product
+    """
+    if product_type == 'PHONE':
+        exists = MobilePhone.objects.filter(phone_id=product_id).exists()
+    elif product_type == 'ACCESSORY':
+        exists = Accessory.objects.filter(accessory_id=product_id).exists()
+    else:
+        raise serializers.ValidationError("Invalid product type")
+
+    if not exists:
+        raise serializers.ValidationError("Product not found")
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     """Serializer for CartItem model"""
     product_name = serializers.CharField(read_only=True)
@@ -24,25 +46,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, attrs):
-        product_type = attrs.get('product_type')
-        product_id = attrs.get('product_id')
-
-        # Verify product exists
-        if product_type == 'PHONE':
-            product = MobilePhone.objects.filter(phone_id=product_id).first()
-        elif product_type == 'ACCESSORY':
-            product = Accessory.objects.filter(accessory_id=product_id).first()
-        else:
-            raise serializers.ValidationError("Invalid product type")
-
-        if not product:
-            raise serializers.ValidationError("Product not found")
-
-        # Check stock
-        quantity = attrs.get('quantity', 1)
-        if product.stock_quantity < quantity:
-            raise serializers.ValidationError(f"Only {product.stock_quantity} items available in stock")
-
+        validate_product(attrs.get('product_type'), attrs.get('product_id'))
         return attrs
 
 
@@ -53,25 +57,7 @@ class AddToCartSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=1, default=1)
 
     def validate(self, attrs):
-        product_type = attrs.get('product_type')
-        product_id = attrs.get('product_id')
-        quantity = attrs.get('quantity')
-
-        # Verify product exists
-        if product_type == 'PHONE':
-            product = MobilePhone.objects.filter(phone_id=product_id).first()
-        elif product_type == 'ACCESSORY':
-            product = Accessory.objects.filter(accessory_id=product_id).first()
-        else:
-            raise serializers.ValidationError("Invalid product type")
-
-        if not product:
-            raise serializers.ValidationError("Product not found")
-
-        # Check stock
-        if product.stock_quantity < quantity:
-            raise serializers.ValidationError(f"Only {product.stock_quantity} items available in stock")
-
+        validate_product(attrs.get('product_type'), attrs.get('product_id'))
         return attrs
 
 
@@ -86,3 +72,6 @@ class CartSerializer(serializers.ModelSerializer):
         model = Cart
         fields = ['cart_id', 'customer', 'customer_name', 'items', 'total_items', 'total_amount', 'created_at', 'updated_at']
         read_only_fields = ['cart_id', 'customer', 'created_at', 'updated_at']
+
+    def to_representation(self, instance):
+        return super().to_representation(instance.prefetch_items())
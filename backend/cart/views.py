@@ -2,6 +2,8 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from inventory.reservations import ReservationError, reserve
 from .models import Cart, CartItem
 from .serializers import CartSerializer, CartItemSerializer, AddToCartSerializer
 
@@ -39,18 +41,25 @@ class CartViewSet(viewsets.ModelViewSet):
         product_id = serializer.validated_data['product_id']
         quantity = serializer.validated_data['quantity']
 
-        # Check if item already exists in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product_type=product_type,
-            product_id=product_id,
-            defaults={'quantity': quantity}
-        )
-
-        if not created:
-            # Update quantity if item already exists
-            cart_item.quantity += quantity
-            cart_item.save()
+        try:
+            with transaction.atomic():
+                # Check if item already exists in cart
+                cart_item, created = CartItem.objects.get_or_create(
+                    cart=cart,
+                    product_type=product_type,
+                    product_id=product_id,
+                    defaults={'quantity': quantity}
+                )
+
+                if not created:
+                    # Update quantity if item already exists
+                    cart_item.quantity += quantity
+                    cart_item.save()
+
+                # Hold the units while they are in the cart
+                reserve(cart_item)
+        except ReservationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         cart_serializer = self.get_serializer(cart)
         return Response(cart_serializer.data, status=status.HTTP_201_CREATED)
@@ -69,9 +78,11 @@ class CartViewSet(viewsets.ModelViewSet):
 
         try:
             cart = self.get_or_create_cart()
-            cart_item = CartItem.objects.get(cart_item_id=cart_item_id, cart=cart)
-            cart_item.quantity = quantity
-            cart_item.save()
+            with transaction.atomic():
+                cart_item = CartItem.objects.get(cart_item_id=cart_item_id, cart=cart)
+                cart_item.quantity = quantity
+                cart_item.save()
+                reserve(cart_item)
 
             cart_serializer = self.get_serializer(cart)
             return Response(cart_serializer.data)
@@ -80,6 +91,8 @@ class CartViewSet(viewsets.ModelViewSet):
                 {"error": "Cart item not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except ReservationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['delete'])
     def remove_item(self, request):
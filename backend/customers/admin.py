@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from mobile_store.admin_utils import EstimatedCountPaginator
 from .models import Customer
 
 
@@ -9,6 +10,8 @@ class CustomerAdmin(UserAdmin):
     list_filter = ['is_active', 'is_staff', 'date_joined']
     search_fields = ['email', 'name', 'phone']
     ordering = ['-date_joined']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
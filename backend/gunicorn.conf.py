@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for mobile_store.
+
+Command line options in mobile_store.service take precedence. Worker and
+thread counts come from the same WEB_CONCURRENCY/GUNICORN_THREADS variables
+that settings.py uses to size the database connection pool.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 3))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# Every worker writes its metric samples here so /metrics can aggregate them.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    str(Path(__file__).resolve().parent / 'logs' / 'prometheus'),
+)
+
+
+def on_starting(server):
+    """Start every server with an empty metrics directory."""
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live samples of workers that exit (e.g. after --max-requests)."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
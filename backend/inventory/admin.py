@@ -0,0 +1,40 @@
+from django.contrib import admin
+from .models import StockMovement, StockReservation, StockShard, StockSnapshot
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['reservation_id', 'product_type', 'product_id', 'quantity', 'expires_at', 'created_at']
+    list_filter = ['product_type', 'expires_at']
+    search_fields = ['product_id']
+    raw_id_fields = ['cart_item']
+
+
+@admin.register(StockShard)
+class StockShardAdmin(admin.ModelAdmin):
+    list_display = ['shard_id', 'product_type', 'product_id', 'shard', 'quantity']
+    list_filter = ['product_type']
+    search_fields = ['product_id']
+    readonly_fields = ['product_type', 'product_id', 'shard']
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['movement_id', 'product_type', 'product_id', 'delta', 'reason', 'reference', 'created_at']
+    list_filter = ['product_type', 'reason']
+    search_fields = ['product_id', 'reference']
+
+    # The ledger is append-only.
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['snapshot_id', 'product_type', 'product_id', 'quantity', 'as_of']
+    list_filter = ['product_type']
+    search_fields = ['product_id']
+    readonly_fields = ['product_type', 'product_id', 'quantity', 'as_of']
@@ -0,0 +1,268 @@
+"""
+Append-only inventory ledger.
+
+Every stock change is also written as a ``StockMovement`` row in the same
+transaction: sales and cancellations by the order views, warehouse syncs by
+``sync_stock``, catalog imports by ``import_catalog`` and manual edits
+(admin, product API) by the ``post_save`` handler below, as the difference
+to the stock the product was loaded with (see ``LoadedStockMixin``).
+Appends are plain ``INSERT``s, one per request, plus one ``stock.changed``
+outbox event (see outbox/events.py). A full product save overwrites a sale
+that landed after the product was loaded; the ledger then keeps the sale
+and ``reconcile`` reports the difference.
+
+``compact`` (``manage.py compact_stock_ledger``) periodically folds the
+movements older than ``STOCK_LEDGER_COMPACTION_LAG`` into one
+``StockSnapshot`` per changed product and deletes movements older than
+``STOCK_LEDGER_RETENTION_DAYS``. ``stock_at`` answers a product's stock at
+any past time from the latest snapshot before it plus the movements since;
+once movements are pruned, older answers are exact at snapshot times only.
+The lag must exceed the longest stock transaction, or a movement committed
+after its time was compacted would be missed.
+
+``reconcile`` (``manage.py reconcile_stock``) compares every product's
+stock with its ledger balance in one query per product table. Load-test
+restocks write stock without the ledger; running reconcile with
+``fix=True`` records the difference as an ``ADJUSTMENT`` (and gives existing
+products their opening balance).
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+from mobile_store.live import product_changed
+from mobile_store.metrics import STOCK_LEDGER_MOVEMENTS
+from outbox.events import publish
+from .models import StockMovement, StockShard, StockSnapshot
+from .stock import PRODUCT_MODELS
+
+LEDGER_PRUNE_BATCH_SIZE = 1000
+# Lower bound for "all movements" when a product has no snapshot yet.
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def record(reason, deltas, reference=''):
+    """
+    Append movements in one ``INSERT``.
+
+    Args:
+        reason: One of ``StockMovement.REASON_CHOICES``
+        deltas: Iterable of ((product_type, product_id), delta); zero deltas
+            are skipped
+        reference: What caused the change, e.g. ``order:42``
+
+    Returns:
+        Number of movements written
+    """
+    now = timezone.now()
+    movements = [
+        StockMovement(
+            product_type=product_type, product_id=product_id, delta=delta,
+            reason=reason, reference=reference, created_at=now
+        )
+        for (product_type, product_id), delta in deltas if delta
+    ]
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+        STOCK_LEDGER_MOVEMENTS.labels(reason).inc(len(movements))
+        publish('stock.changed', reference or reason.lower(), {
+            'reason': reason,
+            'reference': reference,
+            'movements': [
+                {'product_type': m.product_type, 'product_id': m.product_id, 'delta': m.delta}
+                for m in movements
+            ],
+        })
+        for product_type in {m.product_type for m in movements}:
+            product_changed(product_type, [m.product_id for m in movements if m.product_type == product_type])
+    return len(movements)
+
+
+def _product_type(model):
+    return next(product_type for product_type, product_model in PRODUCT_MODELS.items() if product_model is model)
+
+
+def stock_before_save(sender, instance, update_fields=None, **kwargs):
+    """Read the stored stock of a product that was not loaded from the database."""
+    if instance._state.adding or hasattr(instance, '_loaded_stock'):
+        return
+    if update_fields is not None and 'stock_quantity' not in update_fields:
+        return
+    instance._loaded_stock = sender.objects.filter(pk=instance.pk).values_list(
+        'stock_quantity', flat=True
+    ).first()
+
+
+def stock_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Record a manual stock edit (admin, product API) as a movement."""
+    if update_fields is not None and 'stock_quantity' not in update_fields:
+        return
+    previous = 0 if created else getattr(instance, '_loaded_stock', None)
+    instance._loaded_stock = instance.stock_quantity
+    if previous is None:
+        return
+    delta = int(instance.stock_quantity) - previous
+    if not delta:
+        return
+    key = (_product_type(sender), instance.pk)
+    # A sharded product's stock_quantity is a cached total: edits to it are
+    # overwritten by the next rebalance and never change the real stock.
+    if not created and StockShard.objects.filter(product_type=key[0], product_id=key[1]).exists():
+        return
+    record('RESTOCK' if delta > 0 else 'ADJUSTMENT', [(key, delta)], 'manual')
+
+
+def connect_signals():
+    for model in PRODUCT_MODELS.values():
+        pre_save.connect(stock_before_save, sender=model, dispatch_uid=f'stock_ledger_pre_{model._meta.label}')
+        post_save.connect(stock_saved, sender=model, dispatch_uid=f'stock_ledger_post_{model._meta.label}')
+
+
+def _movements(product_type, product_id):
+    return StockMovement.objects.filter(product_type=product_type, product_id=product_id)
+
+
+def stock_at(product_type, product_id, at=None):
+    """
+    A product's stock according to the ledger at time ``at``.
+
+    Args:
+        product_type: ``PHONE`` or ``ACCESSORY``
+        product_id: Product primary key
+        at: Point in time (default: now)
+
+    Returns:
+        Units in stock, or None if the ledger has no entries for the product
+        up to ``at``
+    """
+    at = at or timezone.now()
+    snapshot = StockSnapshot.objects.filter(
+        product_type=product_type, product_id=product_id, as_of__lte=at
+    ).order_by('-as_of').values_list('quantity', 'as_of').first()
+    base, since = snapshot or (None, EPOCH)
+    moved = _movements(product_type, product_id).filter(
+        created_at__gt=since, created_at__lte=at
+    ).aggregate(total=Sum('delta'))['total']
+    if base is None and moved is None:
+        return None
+    return (base or 0) + (moved or 0)
+
+
+def _latest_snapshot(product_type, product_id, field):
+    """Subquery: ``field`` of the product's latest snapshot."""
+    return Subquery(
+        StockSnapshot.objects.filter(product_type=product_type, product_id=product_id)
+        .order_by('-as_of').values(field)[:1]
+    )
+
+
+def compact(cutoff=None, prune_before=None, batch_size=None):
+    """
+    Fold movements up to ``cutoff`` into snapshots and prune old movements.
+
+    Each product with movements between its latest snapshot and ``cutoff``
+    gets a new snapshot as of ``cutoff``, computed in a single grouped query.
+    Movements at or before ``prune_before`` are then deleted in batches;
+    ``prune_before`` is capped at ``cutoff`` so only snapshotted movements go.
+
+    Args:
+        cutoff: Snapshot time (default: now - ``STOCK_LEDGER_COMPACTION_LAG``)
+        prune_before: Delete movements up to this time (default:
+            now - ``STOCK_LEDGER_RETENTION_DAYS``)
+        batch_size: Movements deleted per statement
+
+    Returns:
+        Tuple of (snapshots written, movements deleted)
+    """
+    now = timezone.now()
+    cutoff = cutoff or now - timedelta(seconds=settings.STOCK_LEDGER_COMPACTION_LAG)
+    prune_before = min(prune_before or now - timedelta(days=settings.STOCK_LEDGER_RETENTION_DAYS), cutoff)
+    batch_size = batch_size or LEDGER_PRUNE_BATCH_SIZE
+
+    with transaction.atomic():
+        pending = (
+            StockMovement.objects.filter(created_at__lte=cutoff)
+            .annotate(
+                base=_latest_snapshot(OuterRef('product_type'), OuterRef('product_id'), 'quantity'),
+                since=_latest_snapshot(OuterRef('product_type'), OuterRef('product_id'), 'as_of'),
+            )
+            .filter(Q(since__isnull=True) | Q(created_at__gt=F('since')))
+            .values('product_type', 'product_id', 'base')
+            .annotate(moved=Sum('delta'))
+        )
+        snapshots = StockSnapshot.objects.bulk_create([
+            StockSnapshot(
+                product_type=row['product_type'], product_id=row['product_id'],
+                quantity=(row['base'] or 0) + row['moved'], as_of=cutoff
+            )
+            for row in pending
+        ])
+
+    pruned = 0
+    while True:
+        ids = list(
+            StockMovement.objects.filter(created_at__lte=prune_before)
+            .order_by('created_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        pruned += StockMovement.objects.filter(pk__in=ids).delete()[0]
+    return len(snapshots), pruned
+
+
+def reconcile(fix=False):
+    """
+    Compare every product's stock with its ledger balance.
+
+    The balance is the latest snapshot plus the movements after it; the
+    stock of a sharded product is the sum of its shards. Each product table
+    is checked with one query.
+
+    Args:
+        fix: Record each difference as an ``ADJUSTMENT`` movement
+
+    Returns:
+        List of dicts with ``product_type``, ``product_id``, ``stock`` and
+        ``ledger`` for every product that does not match
+    """
+    mismatches = []
+    for product_type, model in PRODUCT_MODELS.items():
+        since = Coalesce(_latest_snapshot(product_type, OuterRef(OuterRef('pk')), 'as_of'), Value(EPOCH))
+        moved = (
+            StockMovement.objects.filter(
+                product_type=product_type, product_id=OuterRef('pk'), created_at__gt=since
+            )
+            .values('product_id').annotate(total=Sum('delta')).values('total')
+        )
+        shard_total = (
+            StockShard.objects.filter(product_type=product_type, product_id=OuterRef('pk'))
+            .values('product_id').annotate(total=Sum('quantity')).values('total')
+        )
+        rows = (
+            model.objects.annotate(
+                stock=Coalesce(Subquery(shard_total), F('stock_quantity'), output_field=IntegerField()),
+                ledger=(
+                    Coalesce(_latest_snapshot(product_type, OuterRef('pk'), 'quantity'), Value(0))
+                    + Coalesce(Subquery(moved), Value(0))
+                ),
+            )
+            .exclude(stock=F('ledger'))
+            .order_by('pk')
+            .values_list('pk', 'stock', 'ledger')
+        )
+        mismatches += [
+            {'product_type': product_type, 'product_id': pk, 'stock': stock, 'ledger': ledger}
+            for pk, stock, ledger in rows
+        ]
+
+    if fix:
+        record('ADJUSTMENT', [
+            ((item['product_type'], item['product_id']), item['stock'] - item['ledger'])
+            for item in mismatches
+        ], 'reconcile')
+    return mismatches
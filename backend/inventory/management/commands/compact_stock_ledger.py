@@ -0,0 +1,60 @@
+"""
+Fold old inventory ledger movements into per-product snapshots.
+
+Runs once by default; with --interval it keeps compacting as a background
+worker (e.g. hourly under systemd next to gunicorn).
+
+Usage:
+    python manage.py compact_stock_ledger
+    python manage.py compact_stock_ledger --lag 7200 --retention-days 30
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from inventory.ledger import compact
+
+
+class Command(BaseCommand):
+    help = 'Snapshot inventory ledger balances and prune old movements'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag',
+            type=int,
+            default=None,
+            help='Only snapshot movements older than this many seconds (default: STOCK_LEDGER_COMPACTION_LAG)'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help='Delete movements older than this many days (default: STOCK_LEDGER_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep running, compacting every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        lag = options['lag'] if options['lag'] is not None else settings.STOCK_LEDGER_COMPACTION_LAG
+        retention = options['retention_days']
+        if retention is None:
+            retention = settings.STOCK_LEDGER_RETENTION_DAYS
+        while True:
+            now = timezone.now()
+            snapshots, pruned = compact(
+                cutoff=now - timedelta(seconds=lag),
+                prune_before=now - timedelta(days=retention),
+            )
+            self.stdout.write(f'Wrote {snapshots} snapshots, deleted {pruned} movements')
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,40 @@
+"""
+Check product stock against the inventory ledger.
+
+Lists every product whose stock differs from its ledger balance and exits
+with status 1 if there are any. --fix records the differences as adjustment
+movements instead; run it once after deploying the ledger to give existing
+products their opening balance, and after bulk imports.
+
+Usage:
+    python manage.py reconcile_stock
+    python manage.py reconcile_stock --fix
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from inventory.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Compare stock quantities with the inventory ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Record each difference as an ADJUSTMENT movement'
+        )
+
+    def handle(self, *args, **options):
+        mismatches = reconcile(fix=options['fix'])
+        for item in mismatches:
+            self.stdout.write(
+                f"{item['product_type']} {item['product_id']}: "
+                f"stock {item['stock']}, ledger {item['ledger']}"
+            )
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Recorded {len(mismatches)} adjustments'))
+        elif mismatches:
+            raise CommandError(f'{len(mismatches)} products do not match the ledger')
+        else:
+            self.stdout.write(self.style.SUCCESS('Stock matches the ledger'))
@@ -0,0 +1,44 @@
+"""
+Release expired stock reservations.
+
+Runs once by default; with --interval it keeps sweeping as a background
+worker (e.g. under systemd next to gunicorn).
+
+Usage:
+    python manage.py release_reservations
+    python manage.py release_reservations --interval 30 --batch-size 5000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from inventory.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired stock reservations in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Reservations deleted per statement (default: STOCK_RESERVATION_SWEEP_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep running, sweeping every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired(options['batch_size'])
+            if released or not options['interval']:
+                self.stdout.write(f'Released {released} expired reservations')
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
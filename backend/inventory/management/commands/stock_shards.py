@@ -0,0 +1,66 @@
+"""
+Manage sharded stock counters for hot products.
+
+Usage:
+    python manage.py stock_shards enable PHONE 42 --shards 16
+    python manage.py stock_shards disable PHONE 42
+    python manage.py stock_shards rebalance --interval 5
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from inventory.shards import disable_sharding, enable_sharding, rebalance_all
+from inventory.stock import PRODUCT_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Enable, disable or rebalance sharded stock for hot products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['enable', 'disable', 'rebalance'])
+        parser.add_argument('product_type', nargs='?', choices=list(PRODUCT_MODELS))
+        parser.add_argument('product_id', nargs='?', type=int)
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=None,
+            help='Counter rows per product (default: STOCK_SHARD_COUNT)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='With rebalance: keep running, rebalancing every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action == 'rebalance':
+            self.rebalance(options['interval'])
+            return
+
+        product_type, product_id = options['product_type'], options['product_id']
+        if product_type is None or product_id is None:
+            raise CommandError(f'{action} needs a product type and id')
+        if action == 'enable':
+            if options['shards'] is not None and options['shards'] < 1:
+                raise CommandError('--shards must be positive')
+            try:
+                count = enable_sharding(product_type, product_id, options['shards'])
+            except PRODUCT_MODELS[product_type].DoesNotExist as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'{product_type} {product_id} now uses {count} stock shards'))
+        else:
+            disable_sharding(product_type, product_id)
+            self.stdout.write(self.style.SUCCESS(f'{product_type} {product_id} no longer uses stock shards'))
+
+    def rebalance(self, interval):
+        while True:
+            count = rebalance_all()
+            if not interval:
+                self.stdout.write(f'Rebalanced {count} sharded products')
+                return
+            close_old_connections()
+            time.sleep(interval)
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('shard_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_type', models.CharField(choices=[('PHONE', 'Mobile Phone'), ('ACCESSORY', 'Accessory')], max_length=20)),
+                ('product_id', models.IntegerField()),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('quantity', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Stock Shard',
+                'verbose_name_plural': 'Stock Shards',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockshard',
+            constraint=models.CheckConstraint(check=models.Q(('quantity__gte', 0)), name='stock_shard_quantity_non_negative'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stockshard',
+            unique_together={('product_type', 'product_id', 'shard')},
+        ),
+    ]
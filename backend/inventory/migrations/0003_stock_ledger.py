@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stockshard_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('snapshot_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_type', models.CharField(choices=[('PHONE', 'Mobile Phone'), ('ACCESSORY', 'Accessory')], max_length=20)),
+                ('product_id', models.IntegerField()),
+                ('quantity', models.IntegerField()),
+                ('as_of', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'unique_together': {('product_type', 'product_id', 'as_of')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('movement_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_type', models.CharField(choices=[('PHONE', 'Mobile Phone'), ('ACCESSORY', 'Accessory')], max_length=20)),
+                ('product_id', models.IntegerField()),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('SALE', 'Sale'), ('CANCEL', 'Order cancelled'), ('RESTOCK', 'Restock'), ('SYNC', 'Warehouse sync'), ('ADJUSTMENT', 'Adjustment')], max_length=20)),
+                ('reference', models.CharField(blank=True, help_text='e.g. order:42', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'indexes': [models.Index(fields=['product_type', 'product_id', 'created_at'], name='movement_product_idx'), models.Index(fields=['created_at'], name='movement_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='reason',
+            field=models.CharField(choices=[('SALE', 'Sale'), ('CANCEL', 'Order cancelled'), ('RESTOCK', 'Restock'), ('SYNC', 'Warehouse sync'), ('ADJUSTMENT', 'Adjustment'), ('IMPORT', 'Catalog import')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,115 @@
+from django.db import models
+from django.utils import timezone
+from cart.models import CartItem
+
+
+class StockReservation(models.Model):
+    """
+    Units of a product held for a cart item until ``expires_at``.
+
+    Available stock is ``stock_quantity`` minus the unexpired reservations
+    (see inventory/reservations.py). Removing the cart item releases the
+    reservation; expired rows are deleted by ``manage.py release_reservations``.
+    """
+    reservation_id = models.BigAutoField(primary_key=True)
+    cart_item = models.OneToOneField(CartItem, on_delete=models.CASCADE, related_name='reservation')
+    product_type = models.CharField(max_length=20, choices=CartItem.PRODUCT_TYPE_CHOICES)
+    product_id = models.IntegerField()
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stock Reservation'
+        verbose_name_plural = 'Stock Reservations'
+        indexes = [
+            # Covers the per-product SUM(quantity) of active reservations.
+            models.Index(
+                fields=['product_type', 'product_id', 'expires_at', 'quantity'],
+                name='reservation_active_idx'
+            ),
+            models.Index(fields=['expires_at'], name='reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_type} - {self.product_id} (x{self.quantity} until {self.expires_at:%H:%M})"
+
+
+class StockShard(models.Model):
+    """
+    One slice of a hot product's stock.
+
+    Products with shards ("sharded mode", see inventory/shards.py) are
+    decremented on a random unlocked shard instead of their own row; their
+    ``stock_quantity`` is a cached total refreshed by rebalancing.
+    """
+    shard_id = models.BigAutoField(primary_key=True)
+    product_type = models.CharField(max_length=20, choices=CartItem.PRODUCT_TYPE_CHOICES)
+    product_id = models.IntegerField()
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Stock Shard'
+        verbose_name_plural = 'Stock Shards'
+        unique_together = ['product_type', 'product_id', 'shard']
+        constraints = [
+            models.CheckConstraint(check=models.Q(quantity__gte=0), name='stock_shard_quantity_non_negative'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_type} - {self.product_id} shard {self.shard} ({self.quantity})"
+
+
+class StockMovement(models.Model):
+    """
+    One append-only entry of the inventory ledger.
+
+    ``delta`` is the signed change in units. Entries are never updated; old
+    ones are folded into ``StockSnapshot`` rows and deleted by compaction
+    (see inventory/ledger.py).
+    """
+    REASON_CHOICES = [
+        ('SALE', 'Sale'),
+        ('CANCEL', 'Order cancelled'),
+        ('RESTOCK', 'Restock'),
+        ('SYNC', 'Warehouse sync'),
+        ('ADJUSTMENT', 'Adjustment'),
+        ('IMPORT', 'Catalog import'),
+    ]
+
+    movement_id = models.BigAutoField(primary_key=True)
+    product_type = models.CharField(max_length=20, choices=CartItem.PRODUCT_TYPE_CHOICES)
+    product_id = models.IntegerField()
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=100, blank=True, help_text='e.g. order:42')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Stock Movement'
+        verbose_name_plural = 'Stock Movements'
+        indexes = [
+            models.Index(fields=['product_type', 'product_id', 'created_at'], name='movement_product_idx'),
+            models.Index(fields=['created_at'], name='movement_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_type} - {self.product_id} {self.delta:+d} ({self.reason})"
+
+
+class StockSnapshot(models.Model):
+    """A product's ledger balance as of a compaction cutoff."""
+    snapshot_id = models.BigAutoField(primary_key=True)
+    product_type = models.CharField(max_length=20, choices=CartItem.PRODUCT_TYPE_CHOICES)
+    product_id = models.IntegerField()
+    quantity = models.IntegerField()
+    as_of = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Stock Snapshot'
+        verbose_name_plural = 'Stock Snapshots'
+        unique_together = ['product_type', 'product_id', 'as_of']
+
+    def __str__(self):
+        return f"{self.product_type} - {self.product_id}: {self.quantity} as of {self.as_of:%Y-%m-%d %H:%M}"
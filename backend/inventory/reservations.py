@@ -0,0 +1,192 @@
+"""
+Time-boxed stock reservations.
+
+Adding a product to a cart, or changing its quantity, reserves the units for
+``STOCK_RESERVATION_TTL`` seconds. The check runs in a short transaction
+that holds a per-product advisory lock on PostgreSQL, so reservations of one
+product are serialized without ever waiting on checkouts or product edits.
+After taking the lock it reads the available stock in a single query (one
+snapshot): ``stock_quantity``, or the shard total of a sharded product (see
+inventory/shards.py), minus the other carts' unexpired reservations (read
+from the covering ``reservation_active_idx`` index). Checkout then only has
+to confirm the stock its own cart holds instead of racing every other buyer
+for it.
+
+The catalog shows the same figure as ``available_stock`` next to
+``stock_quantity``; list and detail queries get it from
+``with_available_stock`` without extra queries.
+
+Removing a cart item releases its reservation by cascade. Expired rows no
+longer count and are deleted in batches by ``release_expired``
+(``manage.py release_reservations``).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from mobile_store.metrics import STOCK_RESERVATIONS
+from .models import StockReservation, StockShard
+from .stock import PRODUCT_MODELS
+
+# First key of the reservation advisory locks, one namespace per product type.
+ADVISORY_LOCK_KEYS = {'PHONE': 4301, 'ACCESSORY': 4302}
+
+
+class ReservationError(Exception):
+    """Raised when a cart asks for more units than are available."""
+
+    def __init__(self, message, available):
+        super().__init__(message)
+        self.available = available
+
+
+def active_reservations(products, exclude_items=(), now=None):
+    """
+    Units held by unexpired reservations.
+
+    Args:
+        products: Iterable of (product_type, product_id)
+        exclude_items: Cart item ids whose own reservations are not counted
+        now: Reference time (default: now)
+
+    Returns:
+        Dict of (product_type, product_id) to reserved units; products
+        without reservations are absent
+    """
+    by_type = {}
+    for product_type, product_id in products:
+        by_type.setdefault(product_type, set()).add(product_id)
+    if not by_type:
+        return {}
+
+    condition = Q()
+    for product_type, ids in by_type.items():
+        condition |= Q(product_type=product_type, product_id__in=ids)
+    reservations = StockReservation.objects.filter(condition, expires_at__gt=now or timezone.now())
+    if exclude_items:
+        reservations = reservations.exclude(cart_item_id__in=exclude_items)
+    totals = reservations.values_list('product_type', 'product_id').annotate(reserved=Sum('quantity'))
+    return {(product_type, product_id): reserved for product_type, product_id, reserved in totals}
+
+
+def with_available_stock(queryset, product_type, exclude_items=(), now=None):
+    """
+    Annotate products with ``available_stock``.
+
+    Available stock is the stock (summed over the shards of a sharded
+    product) minus the unexpired reservations, never below 0. Both are read
+    by subqueries of the product query, so they come from one snapshot.
+
+    Args:
+        queryset: Products of ``product_type``
+        product_type: ``PHONE`` or ``ACCESSORY``
+        exclude_items: Cart item ids whose own reservations are not counted
+        now: Reference time (default: now)
+
+    Returns:
+        The annotated queryset
+    """
+    shard_total = (
+        StockShard.objects.filter(product_type=product_type, product_id=OuterRef('pk'))
+        .values('product_id').annotate(total=Sum('quantity')).values('total')
+    )
+    reservations = StockReservation.objects.filter(
+        product_type=product_type, product_id=OuterRef('pk'), expires_at__gt=now or timezone.now()
+    )
+    if exclude_items:
+        reservations = reservations.exclude(cart_item_id__in=exclude_items)
+    reserved = reservations.values('product_id').annotate(total=Sum('quantity')).values('total')
+    return queryset.annotate(available_stock=Greatest(
+        Coalesce(Subquery(shard_total), 'stock_quantity', output_field=IntegerField())
+        - Coalesce(Subquery(reserved), Value(0)),
+        Value(0),
+    ))
+
+
+def available_stock(product_type, product_id):
+    """Stock minus active reservations, or None for an unknown product."""
+    products = PRODUCT_MODELS[product_type].objects.filter(pk=product_id)
+    return with_available_stock(products, product_type).values_list('available_stock', flat=True).first()
+
+
+def _lock_reservations(product_type, product_id):
+    """
+    Serialize reservations of one product until the transaction ends.
+
+    The advisory lock only conflicts with other reservations, never with
+    checkouts or product edits. SQLite serializes writers on its own.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ADVISORY_LOCK_KEYS[product_type], product_id])
+
+
+def reserve(cart_item):
+    """
+    Hold ``cart_item.quantity`` units for the reservation TTL.
+
+    Replaces any reservation the item already has and restarts its TTL.
+
+    Args:
+        cart_item: Saved CartItem
+
+    Raises:
+        ReservationError: If fewer units are available than requested
+    """
+    product_type, product_id = cart_item.product_type, cart_item.product_id
+    quantity = int(cart_item.quantity)
+    now = timezone.now()
+    # No savepoint: callers roll their own changes back on ReservationError.
+    with transaction.atomic(savepoint=False):
+        _lock_reservations(product_type, product_id)
+        # Read only after the lock, so reservations that committed while this
+        # one waited are counted.
+        products = PRODUCT_MODELS[product_type].objects.filter(pk=product_id)
+        available = with_available_stock(products, product_type, [cart_item.pk], now).values_list(
+            'available_stock', flat=True
+        ).first()
+        if available is None:
+            raise ReservationError("Product not found", 0)
+        if quantity > available:
+            STOCK_RESERVATIONS.labels('rejected').inc()
+            raise ReservationError(f"Only {available} items available in stock", available)
+
+        values = {
+            'product_type': product_type,
+            'product_id': product_id,
+            'quantity': quantity,
+            'expires_at': now + timedelta(seconds=settings.STOCK_RESERVATION_TTL),
+        }
+        # The lock rules out a concurrent insert for this item.
+        if not StockReservation.objects.filter(cart_item=cart_item).update(**values):
+            StockReservation.objects.create(cart_item=cart_item, **values)
+    STOCK_RESERVATIONS.labels('reserved').inc()
+
+
+def release_expired(batch_size=None, now=None):
+    """
+    Delete expired reservations in batches of ``batch_size`` rows.
+
+    Each batch is its own short ``DELETE``, so the sweep never holds locks
+    on a large part of the table.
+
+    Returns:
+        Number of reservations deleted
+    """
+    batch_size = batch_size or settings.STOCK_RESERVATION_SWEEP_BATCH_SIZE
+    now = now or timezone.now()
+    released = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(expires_at__lte=now)
+            .order_by('expires_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        released += StockReservation.objects.filter(pk__in=ids, expires_at__lte=now).delete()[0]
+    STOCK_RESERVATIONS.labels('expired').inc(released)
+    return released
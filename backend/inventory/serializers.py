@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from mobile_store.validators import validate_stock_quantity
+from .stock import PRODUCT_MODELS
+
+STOCK_SYNC_MAX_ITEMS = 50000
+
+
+class StockLevelSerializer(serializers.Serializer):
+    """Serializer for one warehouse stock level"""
+    product_type = serializers.ChoiceField(choices=list(PRODUCT_MODELS))
+    product_id = serializers.IntegerField(min_value=1)
+    stock_quantity = serializers.IntegerField(validators=[validate_stock_quantity])
+
+
+class StockSyncSerializer(serializers.Serializer):
+    """Serializer for a bulk stock sync"""
+    levels = StockLevelSerializer(many=True, allow_empty=False, max_length=STOCK_SYNC_MAX_ITEMS)
+
+
+class StockAtQuerySerializer(serializers.Serializer):
+    """Query parameters of a ledger stock lookup"""
+    product_type = serializers.ChoiceField(choices=list(PRODUCT_MODELS))
+    product_id = serializers.IntegerField(min_value=1)
+    at = serializers.DateTimeField(required=False)
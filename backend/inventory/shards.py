@@ -0,0 +1,229 @@
+"""
+Sharded stock counters for hot products.
+
+Every checkout normally decrements the product's own ``stock_quantity``, so
+during a flash sale all buyers of one phone queue on that row's lock. A
+product can be switched to sharded mode (``manage.py stock_shards enable``):
+its stock is split across ``STOCK_SHARD_COUNT`` ``StockShard`` rows and a
+checkout takes its units from a random shard with enough stock, skipping
+shards other transactions hold (``SELECT ... FOR UPDATE SKIP LOCKED``). Only
+when no single unlocked shard can serve the order does it wait for all of
+them.
+
+The product's ``stock_quantity`` becomes a cached total for catalog reads
+and the reservation check; ``rebalance`` (``manage.py stock_shards
+rebalance``) periodically refreshes it from the shards and evens the shards
+out so that small shards do not force the slow path. Exact reads use
+``stock_totals``. Stock syncs and cancellations go through ``set_stock`` and
+``add_stock``; editing ``stock_quantity`` directly on a sharded product is
+overwritten by the next rebalance.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from mobile_store.metrics import STOCK_SHARD_TAKES
+from .models import StockShard
+from .stock import PRODUCT_MODELS
+
+
+def _shards(product_type, product_id):
+    return StockShard.objects.filter(product_type=product_type, product_id=product_id)
+
+
+def _split(total, count):
+    """Spread ``total`` units over ``count`` shards as evenly as possible."""
+    base, remainder = divmod(max(total, 0), count)
+    return [base + (1 if shard < remainder else 0) for shard in range(count)]
+
+
+def sharded_products(products=None):
+    """
+    Products among ``products`` that are in sharded mode.
+
+    Args:
+        products: Iterable of (product_type, product_id); None for all
+            sharded products
+
+    Returns:
+        Set of (product_type, product_id)
+    """
+    if products is None:
+        return set(StockShard.objects.values_list('product_type', 'product_id').distinct())
+    by_type = {}
+    for product_type, product_id in products:
+        by_type.setdefault(product_type, set()).add(product_id)
+    sharded = set()
+    for product_type, ids in by_type.items():
+        sharded.update(
+            StockShard.objects.filter(product_type=product_type, product_id__in=ids)
+            .values_list('product_type', 'product_id').distinct()
+        )
+    return sharded
+
+
+def stock_totals(products):
+    """
+    Exact stock of sharded products, summed over their shards.
+
+    Returns:
+        Dict of (product_type, product_id) to units; products that are not
+        sharded are absent
+    """
+    totals = {}
+    for product_type, product_id in products:
+        totals.setdefault(product_type, set()).add(product_id)
+    return {
+        (product_type, product_id): total
+        for product_type, ids in totals.items()
+        for product_id, total in StockShard.objects.filter(product_type=product_type, product_id__in=ids)
+        .values_list('product_id').annotate(total=Sum('quantity'))
+    }
+
+
+def take_stock(product_type, product_id, quantity, sharded=False):
+    """
+    Decrement stock by ``quantity`` if enough is left.
+
+    Must run inside the checkout transaction.
+
+    Args:
+        product_type: ``PHONE`` or ``ACCESSORY``
+        product_id: Product primary key
+        quantity: Units to take
+        sharded: Whether the product is in sharded mode
+
+    Returns:
+        True if the stock was taken, False if there was not enough
+    """
+    if not sharded:
+        return bool(PRODUCT_MODELS[product_type].objects.filter(
+            pk=product_id, stock_quantity__gte=quantity
+        ).update(stock_quantity=F('stock_quantity') - quantity, updated_at=timezone.now()))
+
+    shards = _shards(product_type, product_id)
+    shard = shards.filter(quantity__gte=quantity).select_for_update(skip_locked=True).order_by('?').first()
+    if shard is not None:
+        shards.filter(pk=shard.pk).update(quantity=F('quantity') - quantity)
+        STOCK_SHARD_TAKES.labels('shard').inc()
+        return True
+
+    # No unlocked shard holds enough: wait for all of them and drain in order.
+    locked = list(shards.select_for_update().order_by('shard'))
+    if sum(shard.quantity for shard in locked) < quantity:
+        STOCK_SHARD_TAKES.labels('insufficient').inc()
+        return False
+    remaining = quantity
+    for shard in locked:
+        taken = min(shard.quantity, remaining)
+        shard.quantity -= taken
+        remaining -= taken
+    StockShard.objects.bulk_update(locked, ['quantity'])
+    STOCK_SHARD_TAKES.labels('fallback').inc()
+    return True
+
+
+def add_stock(product_type, product_id, quantity, sharded=False):
+    """
+    Return ``quantity`` units to stock (e.g. when an order is cancelled).
+
+    A product that was unsharded since the caller checked gets the units on
+    its own row.
+    """
+    if sharded:
+        shards = _shards(product_type, product_id)
+        shard = shards.select_for_update(skip_locked=True).order_by('?').first() or shards.order_by('shard').first()
+        if shard is not None:
+            shards.filter(pk=shard.pk).update(quantity=F('quantity') + quantity)
+            return
+    PRODUCT_MODELS[product_type].objects.filter(pk=product_id).update(
+        stock_quantity=F('stock_quantity') + quantity, updated_at=timezone.now()
+    )
+
+
+def set_stock(product_type, product_id, total):
+    """
+    Replace a sharded product's stock with ``total`` units, spread evenly.
+
+    Returns:
+        Total units across the shards before the change
+    """
+    with transaction.atomic():
+        locked = list(_shards(product_type, product_id).select_for_update().order_by('shard'))
+        previous = sum(shard.quantity for shard in locked)
+        for shard, quantity in zip(locked, _split(total, len(locked))):
+            shard.quantity = quantity
+        StockShard.objects.bulk_update(locked, ['quantity'])
+    return previous
+
+
+def enable_sharding(product_type, product_id, shards=None):
+    """
+    Move a product's stock into ``shards`` counter rows.
+
+    Re-enabling an already sharded product changes its shard count.
+
+    Returns:
+        Number of shards
+    """
+    count = shards or settings.STOCK_SHARD_COUNT
+    model = PRODUCT_MODELS[product_type]
+    with transaction.atomic():
+        stock = model.objects.select_for_update().filter(pk=product_id).values_list(
+            'stock_quantity', flat=True
+        ).first()
+        if stock is None:
+            raise model.DoesNotExist(f'{product_type} {product_id} does not exist')
+        existing = list(_shards(product_type, product_id).select_for_update())
+        if existing:
+            stock = sum(shard.quantity for shard in existing)
+            _shards(product_type, product_id).delete()
+        StockShard.objects.bulk_create([
+            StockShard(product_type=product_type, product_id=product_id, shard=shard, quantity=quantity)
+            for shard, quantity in enumerate(_split(stock, count))
+        ])
+    return count
+
+
+def disable_sharding(product_type, product_id):
+    """Fold a product's shards back into its ``stock_quantity``."""
+    with transaction.atomic():
+        locked = list(_shards(product_type, product_id).select_for_update())
+        if not locked:
+            return
+        PRODUCT_MODELS[product_type].objects.filter(pk=product_id).update(
+            stock_quantity=sum(shard.quantity for shard in locked), updated_at=timezone.now()
+        )
+        _shards(product_type, product_id).delete()
+
+
+def rebalance(product_type, product_id):
+    """
+    Even out a product's shards and refresh its cached total.
+
+    Returns:
+        Total units across the shards
+    """
+    with transaction.atomic():
+        locked = list(_shards(product_type, product_id).select_for_update().order_by('shard'))
+        total = sum(shard.quantity for shard in locked)
+        changed = []
+        for shard, quantity in zip(locked, _split(total, len(locked))):
+            if shard.quantity != quantity:
+                shard.quantity = quantity
+                changed.append(shard)
+        if changed:
+            StockShard.objects.bulk_update(changed, ['quantity'])
+        PRODUCT_MODELS[product_type].objects.filter(pk=product_id).exclude(stock_quantity=total).update(
+            stock_quantity=total, updated_at=timezone.now()
+        )
+    return total
+
+
+def rebalance_all():
+    """Rebalance every sharded product, one short transaction each."""
+    products = sharded_products()
+    for product_type, product_id in products:
+        rebalance(product_type, product_id)
+    return len(products)
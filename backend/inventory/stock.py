@@ -0,0 +1,136 @@
+"""
+Set-based stock updates for phones and accessories.
+
+Warehouse stock levels are applied with one
+``WITH v(id, stock_quantity) AS (VALUES ...) UPDATE ... FROM v`` statement
+per product table (and per ``STOCK_SYNC_BATCH_SIZE`` rows). Rows whose stock
+did not change are neither written nor have ``updated_at`` bumped, and only
+the changed products' cached responses are invalidated. Products in sharded
+mode (see inventory/shards.py) also have their shards reset to the new level.
+Every change is recorded in the inventory ledger (see inventory/ledger.py).
+"""
+
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.utils import timezone
+from accessories.models import Accessory
+from mobile_store.decorators import invalidate_catalog_pages
+from mobile_store.metrics import STOCK_SYNC_ROWS
+from phones.models import MobilePhone
+
+PRODUCT_MODELS = {
+    'PHONE': MobilePhone,
+    'ACCESSORY': Accessory,
+}
+STOCK_SYNC_BATCH_SIZE = 5000
+
+
+@dataclass
+class StockSyncResult:
+    """Outcome of one stock sync."""
+    received: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    not_found: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            'received': self.received,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'not_found': self.not_found,
+        }
+
+
+def _batch_size():
+    # Two parameters per row plus the timestamp.
+    limit = connection.features.max_query_params
+    return STOCK_SYNC_BATCH_SIZE if limit is None else min(STOCK_SYNC_BATCH_SIZE, (limit - 1) // 2)
+
+
+def _update_stock(cursor, model, levels, now):
+    """
+    Apply ``{id: stock_quantity}`` to one product table.
+
+    Returns:
+        Primary keys of the rows that changed
+    """
+    opts = model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    pk = quote(opts.pk.column)
+    stock = quote(opts.get_field('stock_quantity').column)
+    updated_at = quote(opts.get_field('updated_at').column)
+
+    values = ', '.join(['(%s, %s)'] * len(levels))
+    params = [value for level in levels.items() for value in level]
+    cursor.execute(
+        f'WITH v (id, stock_quantity) AS (VALUES {values}) '
+        f'UPDATE {table} SET {stock} = v.stock_quantity, {updated_at} = %s '
+        f'FROM v WHERE {table}.{pk} = v.id AND {table}.{stock} <> v.stock_quantity '
+        f'RETURNING {table}.{pk}',
+        params + [now],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def sync_stock(levels):
+    """
+    Set absolute stock levels in bulk.
+
+    Args:
+        levels: Iterable of dicts with ``product_type``, ``product_id`` and
+            ``stock_quantity``; when a product repeats the last level wins
+
+    Returns:
+        StockSyncResult
+    """
+    from .ledger import record
+    from .shards import set_stock, sharded_products
+
+    result = StockSyncResult()
+    by_type = {product_type: {} for product_type in PRODUCT_MODELS}
+    for level in levels:
+        result.received += 1
+        by_type[level['product_type']][level['product_id']] = level['stock_quantity']
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    batch_size = _batch_size()
+    changed = {}
+    deltas = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for product_type, model in PRODUCT_MODELS.items():
+            items = list(by_type[product_type].items())
+            changed[product_type] = []
+            for start in range(0, len(items), batch_size):
+                batch = dict(items[start:start + batch_size])
+                previous = dict(
+                    model.objects.select_for_update().filter(pk__in=batch).values_list('pk', 'stock_quantity')
+                )
+                updated = _update_stock(cursor, model, batch, now)
+                changed[product_type] += updated
+                deltas.update({(product_type, pk): batch[pk] - previous[pk] for pk in updated})
+                result.not_found += [
+                    {'product_type': product_type, 'product_id': product_id}
+                    for product_id in batch if product_id not in previous
+                ]
+
+        # Sharded products keep their stock in the shards.
+        for product_type, product_id in sharded_products():
+            if product_id in by_type.get(product_type, {}):
+                level = by_type[product_type][product_id]
+                deltas[product_type, product_id] = level - set_stock(product_type, product_id, level)
+
+        record('SYNC', deltas.items(), 'stock-sync')
+
+    for product_type, ids in changed.items():
+        missing = sum(1 for item in result.not_found if item['product_type'] == product_type)
+        unchanged = len(by_type[product_type]) - missing - len(ids)
+        result.updated += len(ids)
+        result.unchanged += unchanged
+        STOCK_SYNC_ROWS.labels(product_type, 'updated').inc(len(ids))
+        STOCK_SYNC_ROWS.labels(product_type, 'unchanged').inc(unchanged)
+        STOCK_SYNC_ROWS.labels(product_type, 'not_found').inc(missing)
+        invalidate_catalog_pages(product_type, ids)
+    return result
@@ -0,0 +1,386 @@
+"""
+Tests for inventory views.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from accessories.models import Accessory
+from phones.models import Brand, MobilePhone
+
+User = get_user_model()
+
+
+class StockSyncTest(APITestCase):
+    """Test cases for the bulk stock sync endpoint."""
+
+    url = '/api/inventory/stock-sync/'
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='adminpass123')
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phones = [
+            MobilePhone.objects.create(
+                brand=brand, model_name=f'Galaxy {i}', price=Decimal('499.00'), stock_quantity=10,
+                ram='8GB', storage='128GB', battery_capacity='5000mAh', processor='Exynos', os='Android'
+            )
+            for i in range(3)
+        ]
+        self.accessory = Accessory.objects.create(name='Case', price=Decimal('9.99'), stock_quantity=4)
+        # Age the rows so a bumped updated_at is visible.
+        past = timezone.now() - timedelta(days=1)
+        MobilePhone.objects.update(updated_at=past)
+        Accessory.objects.update(updated_at=past)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_sync_updates_only_changed_rows(self):
+        """Test that unchanged rows are skipped and unknown ids reported."""
+        levels = [
+            {'product_type': 'PHONE', 'product_id': self.phones[0].pk, 'stock_quantity': 3},
+            {'product_type': 'PHONE', 'product_id': self.phones[1].pk, 'stock_quantity': 10},
+            {'product_type': 'PHONE', 'product_id': 99999, 'stock_quantity': 1},
+            {'product_type': 'ACCESSORY', 'product_id': self.accessory.pk, 'stock_quantity': 8},
+        ]
+        with mock.patch('inventory.stock.invalidate_catalog_pages') as invalidate:
+            response = self.client.post(self.url, {'levels': levels}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['unchanged'], 1)
+        self.assertEqual(response.data['not_found'], [{'product_type': 'PHONE', 'product_id': 99999}])
+
+        changed, unchanged = (MobilePhone.objects.get(pk=phone.pk) for phone in self.phones[:2])
+        self.assertEqual(changed.stock_quantity, 3)
+        self.assertGreater(changed.updated_at, unchanged.updated_at)
+        self.assertEqual(Accessory.objects.get().stock_quantity, 8)
+        invalidate.assert_any_call('PHONE', [self.phones[0].pk])
+
+    def test_last_level_wins(self):
+        """Test that a product repeated in one sync gets its last level."""
+        levels = [
+            {'product_type': 'PHONE', 'product_id': self.phones[2].pk, 'stock_quantity': stock}
+            for stock in (1, 2, 7)
+        ]
+        response = self.client.post(self.url, {'levels': levels}, format='json')
+
+        self.assertEqual(response.data['received'], 3)
+        self.assertEqual(MobilePhone.objects.get(pk=self.phones[2].pk).stock_quantity, 7)
+
+    def test_invalid_levels_rejected(self):
+        """Test that negative stock and non-admin callers are rejected."""
+        levels = [{'product_type': 'PHONE', 'product_id': self.phones[0].pk, 'stock_quantity': -1}]
+        response = self.client.post(self.url, {'levels': levels}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=User.objects.create_user(email='c@example.com', password='x'))
+        response = self.client.post(self.url, {'levels': levels}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StockReservationTest(APITestCase):
+    """Test cases for time-boxed stock reservations."""
+
+    def setUp(self):
+        """Set up test data."""
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='Galaxy Drop', price=Decimal('999.00'), stock_quantity=3,
+            ram='8GB', storage='256GB', battery_capacity='5000mAh', processor='Exynos', os='Android'
+        )
+        self.buyers = [
+            User.objects.create_user(email=f'buyer{i}@example.com', password='buyerpass123')
+            for i in range(2)
+        ]
+
+    def add(self, buyer, quantity):
+        self.client.force_authenticate(user=buyer)
+        return self.client.post('/api/cart/add_item/', {
+            'product_type': 'PHONE', 'product_id': self.phone.pk, 'quantity': quantity
+        }, format='json')
+
+    def test_reservations_reduce_available_stock(self):
+        """Test that units in one cart cannot be added to another."""
+        from inventory.reservations import available_stock
+
+        self.assertEqual(self.add(self.buyers[0], 2).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(available_stock('PHONE', self.phone.pk), 1)
+        # The catalog shows what is left for other buyers.
+        detail = self.client.get(f'/api/phones/{self.phone.pk}/').data
+        self.assertEqual((detail['stock_quantity'], detail['available_stock']), (3, 1))
+        self.assertEqual(self.client.get('/api/phones/').data['results'][0]['available_stock'], 1)
+
+        response = self.add(self.buyers[1], 2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'Only 1 items available in stock'})
+        self.assertFalse(self.buyers[1].cart.items.exists())
+
+        # Growing your own reservation only competes with other carts.
+        self.assertEqual(self.add(self.buyers[0], 1).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.buyers[0].cart.items.get().reservation.quantity, 3)
+
+    def test_removal_and_expiry_release_units(self):
+        """Test that removed items and expired reservations free stock."""
+        from inventory.models import StockReservation
+        from inventory.reservations import release_expired
+
+        self.add(self.buyers[0], 3)
+        item = self.buyers[0].cart.items.get()
+        self.client.delete(f'/api/cart/remove_item/?cart_item_id={item.pk}')
+        self.assertFalse(StockReservation.objects.exists())
+
+        self.assertEqual(self.add(self.buyers[1], 3).status_code, status.HTTP_201_CREATED)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.add(self.buyers[0], 3).status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(release_expired(batch_size=1), 1)
+        self.assertEqual(StockReservation.objects.get().cart_item.cart.customer, self.buyers[0])
+
+    def test_checkout_ignores_own_reservation(self):
+        """Test that checkout sells the units the cart holds and frees them."""
+        from inventory.models import StockReservation
+
+        self.add(self.buyers[0], 3)
+        response = self.client.post('/api/orders/create_from_cart/', {
+            'shipping_address': '1 Main St'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+class StockShardTest(APITestCase):
+    """Test cases for sharded stock counters."""
+
+    def setUp(self):
+        """Set up test data."""
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='Galaxy Drop', price=Decimal('999.00'), stock_quantity=10,
+            ram='8GB', storage='256GB', battery_capacity='5000mAh', processor='Exynos', os='Android'
+        )
+        self.key = ('PHONE', self.phone.pk)
+
+    def shards(self):
+        from inventory.models import StockShard
+        return list(StockShard.objects.order_by('shard').values_list('quantity', flat=True))
+
+    def test_checkout_takes_from_shards(self):
+        """Test that sharded checkouts leave the product row alone until rebalanced."""
+        from inventory.shards import enable_sharding, rebalance_all
+
+        enable_sharding(*self.key, shards=4)
+        self.assertEqual(self.shards(), [3, 3, 2, 2])
+
+        buyer = User.objects.create_user(email='buyer@example.com', password='buyerpass123')
+        self.client.force_authenticate(user=buyer)
+        self.client.post('/api/cart/add_item/', {
+            'product_type': 'PHONE', 'product_id': self.phone.pk, 'quantity': 2
+        }, format='json')
+        response = self.client.post('/api/orders/create_from_cart/', {'shipping_address': '1 Main St'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sum(self.shards()), 8)
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 10)
+
+        self.assertEqual(rebalance_all(), 1)
+        self.assertEqual(self.shards(), [2, 2, 2, 2])
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 8)
+
+        self.client.post(f"/api/orders/{response.data['order_id']}/cancel/")
+        self.assertEqual(sum(self.shards()), 10)
+
+    def test_reservations_and_checkout_use_shard_totals(self):
+        """Test that carts are checked against the shards, not the cached total."""
+        from inventory.shards import enable_sharding, rebalance
+
+        enable_sharding(*self.key, shards=4)
+        buyers = [
+            User.objects.create_user(email=f'buyer{i}@example.com', password='buyerpass123') for i in range(2)
+        ]
+
+        def add(buyer, quantity):
+            self.client.force_authenticate(user=buyer)
+            return self.client.post('/api/cart/add_item/', {
+                'product_type': 'PHONE', 'product_id': self.phone.pk, 'quantity': quantity
+            }, format='json')
+
+        def checkout(buyer):
+            self.client.force_authenticate(user=buyer)
+            return self.client.post('/api/orders/create_from_cart/', {'shipping_address': '1 Main St'}, format='json')
+
+        add(buyers[0], 8)
+        order = checkout(buyers[0]).data
+        # The cached total still says 10; only 2 units are left in the shards.
+        response = add(buyers[1], 3)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'Only 2 items available in stock'})
+
+        # After a rebalance the cached total is 2, then a cancel returns 8 units.
+        rebalance(*self.key)
+        self.client.force_authenticate(user=buyers[0])
+        self.client.post(f"/api/orders/{order['order_id']}/cancel/")
+        self.assertEqual(add(buyers[1], 6).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(checkout(buyers[1]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sum(self.shards()), 4)
+
+    def test_returned_stock_of_unsharded_product_goes_to_its_row(self):
+        """Test that a return racing an unshard lands on the product row."""
+        from inventory.shards import add_stock, disable_sharding, enable_sharding
+
+        enable_sharding(*self.key, shards=4)
+        disable_sharding(*self.key)
+        add_stock(*self.key, 2, sharded=True)
+
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 12)
+
+    def test_large_orders_drain_several_shards(self):
+        """Test the fallback across shards and the insufficient-stock result."""
+        from django.db import transaction
+        from inventory.shards import enable_sharding, take_stock
+
+        enable_sharding(*self.key, shards=4)
+        with transaction.atomic():
+            self.assertTrue(take_stock(*self.key, 7, sharded=True))
+            self.assertEqual(self.shards(), [0, 0, 1, 2])
+            self.assertFalse(take_stock(*self.key, 4, sharded=True))
+            self.assertTrue(take_stock(*self.key, 2, sharded=True))
+        self.assertEqual(sum(self.shards()), 1)
+
+    def test_sync_and_disable(self):
+        """Test that stock syncs reset shards and disabling folds them back."""
+        from inventory.shards import disable_sharding, enable_sharding
+        from inventory.stock import sync_stock
+
+        enable_sharding(*self.key, shards=3)
+        with mock.patch('inventory.stock.invalidate_catalog_pages'):
+            sync_stock([{'product_type': 'PHONE', 'product_id': self.phone.pk, 'stock_quantity': 7}])
+        self.assertEqual(self.shards(), [3, 2, 2])
+
+        disable_sharding(*self.key)
+        self.assertEqual(self.shards(), [])
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 7)
+
+
+class StockLedgerTest(APITestCase):
+    """Test cases for the inventory ledger."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='adminpass123')
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='Galaxy Ledger', price=Decimal('699.00'), stock_quantity=10,
+            ram='8GB', storage='128GB', battery_capacity='5000mAh', processor='Exynos', os='Android'
+        )
+        self.key = ('PHONE', self.phone.pk)
+
+    def movements(self):
+        from inventory.models import StockMovement
+        return list(StockMovement.objects.order_by('movement_id').values_list('reason', 'delta'))
+
+    def test_stock_changes_are_recorded(self):
+        """Test that creation, orders, cancellations, syncs and edits append movements."""
+        from inventory.ledger import reconcile, stock_at
+
+        buyer = User.objects.create_user(email='buyer@example.com', password='buyerpass123')
+        self.client.force_authenticate(user=buyer)
+        self.client.post('/api/cart/add_item/', {
+            'product_type': 'PHONE', 'product_id': self.phone.pk, 'quantity': 3
+        }, format='json')
+        response = self.client.post('/api/orders/create_from_cart/', {'shipping_address': '1 Main St'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.post(f"/api/orders/{response.data['order_id']}/cancel/")
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.post('/api/inventory/stock-sync/', {'levels': [
+            {'product_type': 'PHONE', 'product_id': self.phone.pk, 'stock_quantity': 25},
+        ]}, format='json')
+        self.phone.refresh_from_db()
+        self.phone.stock_quantity = 20
+        self.phone.save()
+        self.phone.save(update_fields=['price'])
+
+        self.assertEqual(self.movements(), [
+            ('RESTOCK', 10), ('SALE', -3), ('CANCEL', 3), ('SYNC', 15), ('ADJUSTMENT', -5),
+        ])
+        self.assertEqual(stock_at(*self.key), 20)
+        self.assertEqual(reconcile(), [])
+
+    def test_manual_edits_need_no_extra_query(self):
+        """Test that edits are measured against the loaded stock, not re-read."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        phone = MobilePhone.objects.get(pk=self.phone.pk)
+        phone.stock_quantity = 12
+        with CaptureQueriesContext(connection) as queries:
+            phone.save()
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'stock_quantity' in q['sql']])
+        phone.stock_quantity = 9
+        phone.save()
+
+        # Instances not loaded from the database still read the stored stock.
+        unloaded = MobilePhone.objects.only('pk', 'brand').get(pk=self.phone.pk)
+        unloaded.stock_quantity = 10
+        unloaded.save(update_fields=['stock_quantity'])
+        self.assertEqual(self.movements(), [('RESTOCK', 10), ('RESTOCK', 2), ('ADJUSTMENT', -3), ('RESTOCK', 1)])
+
+    def test_compaction_and_stock_at(self):
+        """Test that snapshots plus later movements answer past stock levels."""
+        from inventory.ledger import compact, record, stock_at
+        from inventory.models import StockMovement, StockSnapshot
+
+        start = timezone.now()
+        StockMovement.objects.update(created_at=start - timedelta(days=3))
+        record('SALE', [(self.key, -4)])
+        StockMovement.objects.filter(reason='SALE').update(created_at=start - timedelta(days=2))
+        record('RESTOCK', [(self.key, 6)])
+
+        cutoff = start - timedelta(days=1)
+        self.assertEqual(compact(cutoff=cutoff, prune_before=start - timedelta(days=4)), (1, 0))
+        self.assertEqual(list(StockSnapshot.objects.values_list('quantity', flat=True)), [6])
+        self.assertEqual(stock_at(*self.key, start - timedelta(days=2, hours=12)), 10)
+        self.assertEqual(stock_at(*self.key, start - timedelta(hours=12)), 6)
+        self.assertEqual(stock_at(*self.key), 12)
+        self.assertIsNone(stock_at('ACCESSORY', self.phone.pk))
+
+        # Pruning never goes past the snapshot; balances from it on still hold.
+        self.assertEqual(compact(cutoff=cutoff, prune_before=start), (0, 2))
+        self.assertEqual(stock_at(*self.key, cutoff), 6)
+        self.assertEqual(stock_at(*self.key), 12)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/inventory/stock-at/', {
+            'product_type': 'PHONE', 'product_id': self.phone.pk,
+            'at': (start - timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_quantity'], 6)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        """Test that writes bypassing the ledger are found and adjusted."""
+        from inventory.ledger import reconcile
+        from inventory.shards import enable_sharding
+
+        MobilePhone.objects.filter(pk=self.phone.pk).update(stock_quantity=14)
+        self.assertEqual(reconcile(), [
+            {'product_type': 'PHONE', 'product_id': self.phone.pk, 'stock': 14, 'ledger': 10},
+        ])
+        self.assertEqual(len(reconcile(fix=True)), 1)
+        self.assertEqual(reconcile(), [])
+
+        # Sharded products are compared by their shard total.
+        enable_sharding(*self.key, shards=2)
+        MobilePhone.objects.filter(pk=self.phone.pk).update(stock_quantity=0)
+        self.assertEqual(reconcile(), [])
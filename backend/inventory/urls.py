@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import StockAtView, StockSyncView
+
+urlpatterns = [
+    path('stock-sync/', StockSyncView.as_view(), name='stock-sync'),
+    path('stock-at/', StockAtView.as_view(), name='stock-at'),
+]
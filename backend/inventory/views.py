@@ -0,0 +1,53 @@
+from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from django.utils import timezone
+from .ledger import stock_at
+from .serializers import StockAtQuerySerializer, StockSyncSerializer
+from .stock import sync_stock
+
+
+class StockSyncView(generics.GenericAPIView):
+    """
+    Bulk stock sync for the warehouse system (admin only)
+
+    Sets absolute stock levels for thousands of phones and accessories in
+    one request; unchanged rows are skipped and unknown ids reported.
+    """
+    serializer_class = StockSyncSerializer
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = sync_stock(serializer.validated_data['levels'])
+        return Response(result.as_dict())
+
+
+class StockAtView(generics.GenericAPIView):
+    """
+    Stock of a product at a point in time, from the inventory ledger (admin only)
+
+    ``?product_type=PHONE&product_id=12&at=2024-05-01T12:00:00Z``; ``at``
+    defaults to now.
+    """
+    serializer_class = StockAtQuerySerializer
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        at = data.get('at') or timezone.now()
+        quantity = stock_at(data['product_type'], data['product_id'], at)
+        if quantity is None:
+            return Response(
+                {"error": "No ledger entries for this product"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            'product_type': data['product_type'],
+            'product_id': data['product_id'],
+            'at': at,
+            'stock_quantity': quantity,
+        })
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'name', 'queue', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'queue', 'name']
+    search_fields = ['job_id', 'name']
+    readonly_fields = ['created_at', 'locked_at', 'locked_by', 'finished_at', 'last_error']
+    actions = ['retry']
+
+    @admin.action(description='Retry selected failed jobs now', permissions=['change'])
+    def retry(self, request, queryset):
+        retried = queryset.filter(status='FAILED').update(
+            status='QUEUED', run_at=timezone.now(), attempts=0, finished_at=None
+        )
+        self.message_user(request, f'Queued {retried} job(s) again.')
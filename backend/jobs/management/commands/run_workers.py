@@ -0,0 +1,105 @@
+"""
+Run background job workers.
+
+Starts --processes worker processes with --threads worker threads each; every
+thread claims and runs one job at a time. Threads suit I/O-bound jobs, extra
+processes CPU-bound ones (e.g. image resizing). The main process requeues
+the jobs of dead workers, deletes old finished jobs and restarts worker
+processes that exit. SIGTERM or Ctrl-C lets running jobs finish first.
+
+Usage:
+    python manage.py run_workers
+    python manage.py run_workers --processes 2 --threads 4 --queue images
+    python manage.py run_workers --once
+"""
+
+import logging
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from jobs.queue import prune_finished, requeue_stale, run_pending
+from jobs.worker import run_threads, worker_process
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_INTERVAL = 60  # seconds
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Worker processes (default: 1, the threads run in this process)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Worker threads per process, each with its own database connection (default: 4)'
+        )
+        parser.add_argument(
+            '--queue',
+            action='append',
+            dest='queues',
+            help='Only run jobs from this queue (repeatable; default: all queues)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds an idle worker waits before polling again (default: 1)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the jobs that are due in this thread and exit'
+        )
+
+    def handle(self, *args, **options):
+        queues = options['queues']
+        if options['once']:
+            requeue_stale()
+            self.stdout.write(f'Ran {run_pending(queues)} jobs')
+            return
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+        worker_args = (options['threads'], queues, options['interval'])
+        if options['processes'] <= 1:
+            workers = run_threads(*worker_args, stop)
+            processes = []
+        else:
+            context = multiprocessing.get_context('spawn')
+            workers = []
+            processes = [
+                context.Process(target=worker_process, args=worker_args, name=f'job-process-{n}')
+                for n in range(options['processes'])
+            ]
+            for process in processes:
+                process.start()
+        self.stdout.write(
+            f"Started {max(options['processes'], 1)} worker processes with {options['threads']} threads each"
+        )
+
+        while not stop.is_set():
+            requeue_stale()
+            prune_finished()
+            close_old_connections()
+            for n, process in enumerate(processes):
+                if not process.is_alive():
+                    logger.warning('Job worker process %s exited with %s, restarting', process.name, process.exitcode)
+                    processes[n] = context.Process(target=worker_process, args=worker_args, name=process.name)
+                    processes[n].start()
+            stop.wait(MAINTENANCE_INTERVAL)
+        for process in processes:
+            process.terminate()
+        for worker in workers + processes:
+            worker.join()
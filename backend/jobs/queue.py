@@ -0,0 +1,242 @@
+"""
+Database-backed background jobs.
+
+A function decorated with ``@job`` gets a ``delay(*args, **kwargs)`` method
+that inserts a ``Job`` row instead of calling it. Inserted inside a
+transaction, the job only becomes visible when that transaction commits and
+disappears with it on rollback, so no broker and no ``on_commit`` plumbing
+is needed. Arguments are stored as JSON: pass ids, not model instances.
+
+``manage.py run_workers`` claims due jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so workers never block on each other
+(SQLite has no row locks; there a conditional ``UPDATE`` claims). A
+job that raises is retried after an exponential backoff until it has made
+``max_attempts`` attempts, then marked ``FAILED`` with its traceback. Jobs
+of a worker that died are requeued once they have been running for
+``JOBS_STALE_AFTER`` seconds, so job functions must be safe to run twice.
+
+Job functions live in each app's ``tasks.py``, which the jobs app imports
+at startup.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from mobile_store.metrics import JOBS
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+JOBS_PRUNE_BATCH_SIZE = 1000
+# Jobs a worker tries to claim per poll when the backend has no SKIP LOCKED.
+CLAIM_CANDIDATES = 10
+
+
+def job(func=None, *, name=None, queue='default', max_attempts=None):
+    """
+    Register a function as a background job.
+
+    Usage::
+
+        @job
+        def send_receipt(order_id): ...
+
+        @job(queue='images', max_attempts=3)
+        def build_thumbnails(product_id): ...
+
+        send_receipt.delay(order.pk)
+
+    Args:
+        name: Registry name (default: ``module.function``)
+        queue: Queue the job is run from
+        max_attempts: Attempts before giving up (default: ``JOBS_MAX_ATTEMPTS``)
+    """
+    def decorate(func):
+        job_name = name or f'{func.__module__}.{func.__qualname__}'
+        REGISTRY[job_name] = func
+
+        @wraps(func)
+        def delay(*args, **kwargs):
+            return enqueue(job_name, args, kwargs, queue=queue, max_attempts=max_attempts)
+
+        func.job_name = job_name
+        func.delay = delay
+        return func
+
+    return decorate(func) if func is not None else decorate
+
+
+def enqueue(name, args=(), kwargs=None, queue='default', run_at=None, max_attempts=None):
+    """
+    Insert a job row.
+
+    Returns:
+        The new Job
+    """
+    if name not in REGISTRY:
+        raise ValueError(f'Unknown job: {name}')
+    JOBS.labels(name, 'queued').inc()
+    return Job.objects.create(
+        name=name,
+        queue=queue,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def worker_id():
+    """Host, process and thread of the calling worker, for ``locked_by``."""
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'[:100]
+
+
+def _mark_running(jobs):
+    return jobs.update(
+        status='RUNNING', attempts=F('attempts') + 1, locked_at=timezone.now(), locked_by=worker_id()
+    )
+
+
+def claim(queues=None):
+    """
+    Claim the oldest due job.
+
+    Args:
+        queues: Queue names to take jobs from (default: all)
+
+    Returns:
+        The claimed Job (now ``RUNNING``), or None if none is due
+    """
+    jobs = Job.objects.filter(status='QUEUED', run_at__lte=timezone.now())
+    if queues:
+        jobs = jobs.filter(queue__in=queues)
+    jobs = jobs.order_by('run_at', 'job_id').values_list('pk', flat=True)
+
+    if not connection.features.has_select_for_update_skip_locked:
+        # SQLite: no row locks, and a read transaction cannot be upgraded to a
+        # write while other workers write. Claim with a conditional UPDATE.
+        for candidate in jobs[:CLAIM_CANDIDATES]:
+            if _mark_running(Job.objects.filter(pk=candidate, status='QUEUED')):
+                return Job.objects.get(pk=candidate)
+        return None
+
+    with transaction.atomic():
+        candidate = jobs.select_for_update(skip_locked=True).first()
+        if candidate is None:
+            return None
+        _mark_running(Job.objects.filter(pk=candidate))
+    return Job.objects.get(pk=candidate)
+
+
+def backoff(attempts):
+    """Seconds before retrying a job that failed its ``attempts``-th time."""
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+    # Jitter keeps jobs that failed together from retrying together.
+    return delay * random.uniform(0.8, 1.2)
+
+
+def execute(claimed):
+    """
+    Run a claimed job and record the outcome.
+
+    Returns:
+        True if the job succeeded
+    """
+    func = REGISTRY.get(claimed.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown job: {claimed.name}')
+        func(*claimed.args, **claimed.kwargs)
+    except Exception:
+        now = timezone.now()
+        claimed.last_error = traceback.format_exc()
+        claimed.locked_at, claimed.locked_by = None, ''
+        if func is not None and claimed.attempts < claimed.max_attempts:
+            claimed.status = 'QUEUED'
+            claimed.run_at = now + timedelta(seconds=backoff(claimed.attempts))
+            JOBS.labels(claimed.name, 'retried').inc()
+            logger.warning('Job %s #%s failed, retrying at %s', claimed.name, claimed.pk, claimed.run_at)
+        else:
+            claimed.status = 'FAILED'
+            claimed.finished_at = now
+            JOBS.labels(claimed.name, 'failed').inc()
+            logger.error('Job %s #%s failed permanently', claimed.name, claimed.pk, exc_info=True)
+        claimed.save(update_fields=['status', 'run_at', 'last_error', 'locked_at', 'locked_by', 'finished_at'])
+        return False
+
+    claimed.status = 'DONE'
+    claimed.finished_at = timezone.now()
+    claimed.locked_at, claimed.locked_by = None, ''
+    claimed.save(update_fields=['status', 'finished_at', 'locked_at', 'locked_by'])
+    JOBS.labels(claimed.name, 'done').inc()
+    return True
+
+
+def run_pending(queues=None, limit=None):
+    """
+    Run due jobs one by one until there are none (or ``limit`` ran).
+
+    Returns:
+        Number of jobs run
+    """
+    count = 0
+    while limit is None or count < limit:
+        claimed = claim(queues)
+        if claimed is None:
+            break
+        execute(claimed)
+        count += 1
+    return count
+
+
+def requeue_stale(stale_after=None):
+    """
+    Requeue jobs that have been running longer than ``stale_after`` seconds.
+
+    Their worker is assumed dead; the lost run counts as an attempt, and a
+    job out of attempts is marked ``FAILED``.
+
+    Returns:
+        Number of jobs requeued or failed
+    """
+    stale_after = stale_after or settings.JOBS_STALE_AFTER
+    now = timezone.now()
+    stale = Job.objects.filter(status='RUNNING', locked_at__lt=now - timedelta(seconds=stale_after))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED', finished_at=now, last_error='Worker lost', locked_at=None, locked_by=''
+    )
+    requeued = stale.update(status='QUEUED', run_at=now, locked_at=None, locked_by='')
+    return failed + requeued
+
+
+def prune_finished(older_than=None, batch_size=None):
+    """
+    Delete ``DONE`` jobs finished more than ``older_than`` days ago, in batches.
+
+    Failed jobs are kept for inspection and retrying from the admin.
+
+    Returns:
+        Number of jobs deleted
+    """
+    days = settings.JOBS_KEEP_DONE_DAYS if older_than is None else older_than
+    cutoff = timezone.now() - timedelta(days=days)
+    batch_size = batch_size or JOBS_PRUNE_BATCH_SIZE
+    deleted = 0
+    while True:
+        ids = list(
+            Job.objects.filter(status='DONE', finished_at__lt=cutoff).values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(pk__in=ids).delete()[0]
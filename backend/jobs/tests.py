@@ -0,0 +1,85 @@
+"""
+Tests for the background job queue.
+"""
+
+from datetime import timedelta
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from jobs.models import Job
+from jobs.queue import REGISTRY, claim, execute, job, requeue_stale, run_pending
+
+calls = []
+
+
+@job(name='tests.record_call')
+def record_call(value, fail_times=0):
+    calls.append(value)
+    if calls.count(value) <= fail_times:
+        raise RuntimeError(f'attempt {calls.count(value)} failed')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_BACKOFF=10, JOBS_RETRY_BACKOFF_MAX=3600)
+class JobQueueTest(TestCase):
+    """Test cases for enqueueing, running and retrying jobs."""
+
+    def setUp(self):
+        """Reset recorded calls."""
+        calls.clear()
+
+    def test_delay_enqueues_with_the_transaction(self):
+        """Test that jobs are rows that commit or roll back with the caller."""
+        self.assertIs(REGISTRY['tests.record_call'], record_call)
+        record_call.delay('kept')
+        try:
+            with transaction.atomic():
+                record_call.delay('rolled back')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(list(Job.objects.values_list('args', 'status')), [(['kept'], 'QUEUED')])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ['kept'])
+        self.assertEqual(Job.objects.get().status, 'DONE')
+        self.assertEqual(run_pending(), 0)
+
+    def test_failed_jobs_retry_with_backoff(self):
+        """Test exponential backoff and the final failure."""
+        record_call.delay('flaky', fail_times=5)
+
+        now = timezone.now()
+        for attempt in (1, 2):
+            self.assertFalse(execute(claim()))
+            queued = Job.objects.get()
+            self.assertEqual((queued.status, queued.attempts), ('QUEUED', attempt))
+            self.assertIn(f'attempt {attempt} failed', queued.last_error)
+            delay = (queued.run_at - now).total_seconds()
+            self.assertTrue(8 * 2 ** (attempt - 1) <= delay <= 12 * 2 ** (attempt - 1) + 5)
+            # Not due yet.
+            self.assertIsNone(claim())
+            Job.objects.update(run_at=now)
+
+        self.assertFalse(execute(claim()))
+        failed = Job.objects.get()
+        self.assertEqual((failed.status, failed.attempts), ('FAILED', 3))
+        self.assertIsNotNone(failed.finished_at)
+
+    def test_stale_jobs_are_requeued(self):
+        """Test that jobs of a lost worker run again or fail when out of attempts."""
+        record_call.delay('lost')
+        claimed = claim()
+        self.assertEqual(claimed.status, 'RUNNING')
+        self.assertIsNone(claim())
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(60), 1)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ['lost'])
+
+        record_call.delay('doomed')
+        Job.objects.filter(status='QUEUED').update(
+            status='RUNNING', attempts=3, locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale(60), 1)
+        self.assertEqual(Job.objects.get(args=['doomed']).status, 'FAILED')
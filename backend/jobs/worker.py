@@ -0,0 +1,57 @@
+"""
+Worker loops of ``manage.py run_workers``.
+
+Kept free of module-level model imports: spawned worker processes import
+this module before Django is set up.
+"""
+
+import logging
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def work(queues, interval, stop):
+    """Worker thread: claim and run jobs until ``stop`` is set."""
+    from django.db import close_old_connections, connection
+    from .queue import claim, execute
+
+    try:
+        while not stop.is_set():
+            try:
+                claimed = claim(queues)
+                if claimed is not None:
+                    execute(claimed)
+            except Exception:
+                # e.g. the database restarting; a claimed job is requeued when stale.
+                logger.exception('Job worker failed')
+                claimed = None
+            if claimed is None:
+                close_old_connections()
+                stop.wait(interval)
+    finally:
+        connection.close()
+
+
+def run_threads(threads, queues, interval, stop):
+    """Start ``threads`` worker threads and return them."""
+    workers = [
+        threading.Thread(target=work, args=(queues, interval, stop), name=f'job-worker-{n}')
+        for n in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def worker_process(threads, queues, interval):
+    """Entry point of a spawned worker process."""
+    import django
+
+    django.setup()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    for worker in run_threads(threads, queues, interval, stop):
+        worker.join()
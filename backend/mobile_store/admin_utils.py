@@ -0,0 +1,85 @@
+"""
+Changelist helpers for admin pages over large tables.
+
+- ``EstimatedCountPaginator`` takes the row count of an unfiltered
+  changelist from the planner statistics (``pg_class.reltuples``) instead of
+  running ``COUNT(*)`` over the whole table.
+- ``CachedAllValuesFieldListFilter`` keeps the ``DISTINCT`` choice list of a
+  plain-value filter (e.g. ``ram``) in a per-process cache.
+- ``LargeTableAdmin`` combines both and turns off the second, unfiltered
+  count the changelist runs to show "N of M selected".
+"""
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Row count of a table from the PostgreSQL planner statistics.
+
+    Args:
+        model: Model class
+        using: Database alias
+
+    Returns:
+        Estimated number of rows, or None when there is no estimate (other
+        backends, or a table that was never analyzed)
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the planner's row estimate for unfiltered querysets.
+
+    Estimates below ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows, and every
+    filtered or searched changelist, still get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class CachedAllValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """
+    ``AllValuesFieldListFilter`` whose distinct values are cached.
+
+    The choices are shared by every user for ``ADMIN_FILTER_CACHE_SECONDS``,
+    so a newly used value can take that long to appear in the sidebar.
+    """
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        key = f'admin_filter_choices:{model._meta.label_lower}:{field_path}'
+        choices = self.lookup_choices
+        self.lookup_choices = caches[settings.ADMIN_FILTER_CACHE].get_or_set(
+            key, lambda: list(choices), settings.ADMIN_FILTER_CACHE_SECONDS
+        )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """ModelAdmin defaults for tables with millions of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
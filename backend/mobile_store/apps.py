@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class MobileStoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'mobile_store'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.conf import settings
+        from . import changes, images, live, metrics
+
+        connection_created.connect(metrics.count_connection)
+        images.connect_signals()
+        changes.connect_signals()
+        live.connect_signals()
+        metrics.DB_POOL_SIZE.set(settings.DB_POOL_SIZE)
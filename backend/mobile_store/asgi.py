@@ -2,6 +2,12 @@
 ASGI config for mobile_store project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests served through it use ``ASGI_URLCONF``, where the read-only catalog
+and health endpoints are native async views.
+
+Run with uvicorn workers under gunicorn:
+
+    gunicorn mobile_store.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -0,0 +1,154 @@
+"""
+Helpers for the native async catalog views served under ASGI.
+
+The async views reuse the DRF serializers, but load data with the async ORM so
+no thread is held while waiting on the database. Only GET/HEAD are handled
+asynchronously; every other method, and reads carrying credentials, fall
+through to the regular viewset.
+"""
+
+from contextlib import nullcontext
+from functools import reduce
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .constants import ERROR_NOT_FOUND
+from .db_router import PIN_COOKIE_NAME, replica_reads
+
+
+def async_read_view(async_view, sync_view):
+    """
+    Combine an async read view with the sync viewset view for the same URL.
+
+    Args:
+        async_view: Coroutine function handling GET/HEAD
+        sync_view: View from ``ViewSet.as_view()`` handling other methods
+
+    Returns:
+        Async view function
+    """
+    sync_handler = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        # Authenticated clients may be pinned by user id (see db_router),
+        # which the sync view checks after authenticating them.
+        if request.method in ('GET', 'HEAD') and 'HTTP_AUTHORIZATION' not in request.META:
+            # Writers are pinned to the primary by cookie (see db_router).
+            routing = nullcontext() if request.COOKIES.get(PIN_COOKIE_NAME) else replica_reads()
+            with routing:
+                return await async_view(request, *args, **kwargs)
+        return await sync_handler(request, *args, **kwargs)
+
+    # DRF views enforce CSRF themselves; keep the viewset's metrics label.
+    view.csrf_exempt = True
+    view.cls = sync_view.cls
+    view.actions = {
+        method: f'{action}_async' if method == 'get' else action
+        for method, action in sync_view.actions.items()
+    }
+    return view
+
+
+def filter_catalog(queryset, params, filter_fields=(), search_fields=(), ordering_fields=()):
+    """
+    Apply the same exact-match filters, search and ordering as the viewsets.
+
+    Args:
+        queryset: Base queryset
+        params: Request query parameters
+        filter_fields: Fields filterable by exact value
+        search_fields: Fields matched case-insensitively by ``?search=``
+        ordering_fields: Fields allowed in ``?ordering=``
+
+    Returns:
+        Filtered queryset (not evaluated)
+    """
+    for field in filter_fields:
+        value = params.get(field)
+        if value:
+            queryset = queryset.filter(**{field: value})
+
+    for term in params.get('search', '').replace(',', ' ').split():
+        queryset = queryset.filter(
+            reduce(or_, (Q(**{f'{field}__icontains': term}) for field in search_fields))
+        )
+
+    ordering = [
+        field.strip() for field in params.get('ordering', '').split(',')
+        if field.strip().lstrip('-') in ordering_fields
+    ]
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    return queryset
+
+
+async def paginate(request, queryset, serializer_class):
+    """
+    Build a page in the same shape as DRF's PageNumberPagination.
+
+    Args:
+        request: HTTP request object
+        queryset: Filtered, ordered queryset
+        serializer_class: Serializer for the results
+
+    Returns:
+        JsonResponse with count, next, previous and results
+    """
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+
+    count = await queryset.acount()
+    last_page = max(1, -(-count // page_size))
+    if page < 1 or page > last_page:
+        return not_found('Invalid page.')
+
+    offset = (page - 1) * page_size
+    results = [obj async for obj in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page + 1) if page < last_page else None
+    if page <= 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page - 1)
+
+    serializer = serializer_class(results, many=True, context={'request': request})
+    return JsonResponse({
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': serializer.data,
+    })
+
+
+def bad_request(detail):
+    """400 body in the format produced by custom_exception_handler."""
+    return JsonResponse({
+        'success': False,
+        'error': {
+            'message': 'Invalid request. Please check your input.',
+            'code': 400,
+            'details': {'detail': detail},
+        }
+    }, status=400)
+
+
+def not_found(detail='Not found.'):
+    """404 body in the format produced by custom_exception_handler."""
+    return JsonResponse({
+        'success': False,
+        'error': {
+            'message': ERROR_NOT_FOUND,
+            'code': 404,
+            'details': {'detail': detail},
+        }
+    }, status=404)
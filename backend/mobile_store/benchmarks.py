@@ -0,0 +1,292 @@
+"""
+Helpers shared by the benchmark and load-test management commands.
+"""
+
+import asyncio
+import math
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers.
+
+    Args:
+        values: Sequence of numbers (need not be sorted)
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile value, or None for an empty sequence
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(latencies):
+    """
+    Summarize request latencies given in seconds.
+
+    Args:
+        latencies: List of latencies in seconds
+
+    Returns:
+        Dict with count, mean and percentiles in milliseconds
+    """
+    if not latencies:
+        return {'count': 0}
+
+    def ms(value):
+        return round(value * 1000, 3)
+
+    return {
+        'count': len(latencies),
+        'mean_ms': ms(sum(latencies) / len(latencies)),
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p90_ms': ms(percentile(latencies, 90)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(max(latencies)),
+    }
+
+
+class HTTPClient:
+    """
+    Minimal keep-alive HTTP/1.1 client on asyncio streams.
+
+    Enough for driving our own server in benchmarks without extra
+    dependencies: Content-Length and chunked bodies, reconnecting whenever
+    the server closes the connection (gunicorn sync workers always do).
+    """
+
+    def __init__(self, host, port, headers=None):
+        self.host = host
+        self.port = port
+        self.headers = headers or {}
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """
+        Send a request and read the full response.
+
+        Args:
+            method: HTTP method
+            path: Path including the query string
+            body: Optional request body (bytes)
+            headers: Extra headers for this request
+
+        Returns:
+            Tuple of (status code, headers dict with lower-case names, body bytes)
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        body = body or b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.headers.get("Host", self.host)}']
+        for name, value in {**self.headers, **(headers or {})}.items():
+            if name != 'Host':
+                lines.append(f'{name}: {value}')
+        lines.append(f'Content-Length: {len(body)}')
+        self._writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+        try:
+            await self._writer.drain()
+            status, response_headers, response_body = await self._read_response()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            raise
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, response_headers, response_body
+
+    async def _read_response(self):
+        status_line = await self._reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            return status, headers, b''.join(chunks)
+        if 'content-length' in headers:
+            return status, headers, await self._reader.readexactly(int(headers['content-length']))
+
+        body = await self._reader.read()
+        headers['connection'] = 'close'
+        return status, headers, body
+
+    async def close(self):
+        """Close the connection; the next request reconnects."""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self._reader = self._writer = None
+
+
+# Failures of a single request that are counted as errors rather than raised.
+CLIENT_ERRORS = (OSError, asyncio.IncompleteReadError, ValueError)
+
+
+SERVER_COMMANDS = {
+    'sync': [
+        '-m', 'gunicorn', 'mobile_store.wsgi:application', '--worker-class', 'sync',
+    ],
+    'gunicorn-uvicorn': [
+        '-m', 'gunicorn', 'mobile_store.asgi:application',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
+    ],
+    'uvicorn': [
+        '-m', 'uvicorn', 'mobile_store.asgi:application', '--no-access-log',
+    ],
+}
+
+
+@contextmanager
+def run_server(kind, port, workers, timeout=30):
+    """
+    Start a local server process and stop it when the block exits.
+
+    Args:
+        kind: One of ``SERVER_COMMANDS``
+        port: Port to bind on 127.0.0.1
+        workers: Number of worker processes
+        timeout: Seconds to wait for /health/ to answer
+
+    Yields:
+        The subprocess.Popen object
+    """
+    command = [sys.executable, *SERVER_COMMANDS[kind], '--workers', str(workers)]
+    if kind == 'uvicorn':
+        command += ['--host', '127.0.0.1', '--port', str(port)]
+    else:
+        command += ['--bind', f'127.0.0.1:{port}']
+
+    process = subprocess.Popen(
+        command,
+        cwd=settings.BASE_DIR,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE']},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'{kind} server exited with code {process.returncode}')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{kind} server did not start within {timeout}s')
+                time.sleep(0.2)
+        yield process
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def new_results():
+    """Per-request-name result accumulator used by ``run_load`` and the load tests."""
+    return defaultdict(lambda: {'latencies': [], 'statuses': Counter(), 'errors': 0})
+
+
+async def run_load(client_factory, next_request, concurrency, duration):
+    """
+    Drive requests from ``concurrency`` clients for ``duration`` seconds.
+
+    Args:
+        client_factory: Callable returning a new ``HTTPClient``
+        next_request: Callable returning (name, method, path, body, headers)
+        concurrency: Number of concurrent clients
+        duration: Seconds to run
+
+    Returns:
+        Dict of request name to {'latencies': [...], 'statuses': Counter, 'errors': int}
+    """
+    results = new_results()
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        client = client_factory()
+        try:
+            while time.monotonic() < deadline:
+                name, method, path, body, headers = next_request()
+                start = time.perf_counter()
+                try:
+                    status, _, _ = await client.request(method, path, body, headers)
+                except CLIENT_ERRORS:
+                    results[name]['errors'] += 1
+                    continue
+                results[name]['latencies'].append(time.perf_counter() - start)
+                results[name]['statuses'][status] += 1
+        finally:
+            await client.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def summarize_results(results, duration):
+    """
+    Reduce ``run_load`` results to JSON-friendly per-request and total stats.
+
+    Args:
+        results: Output of ``run_load``
+        duration: Seconds the load ran
+
+    Returns:
+        Dict with 'total' and 'requests' summaries
+    """
+    def summarize(latencies, statuses, errors):
+        failed = errors + sum(count for status, count in statuses.items() if status >= 400)
+        requests = len(latencies) + errors
+        return {
+            **summarize_latencies(latencies),
+            'throughput_rps': round(len(latencies) / duration, 2),
+            'error_rate': round(failed / requests, 4) if requests else 0,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
+
+    all_latencies, all_statuses, all_errors = [], Counter(), 0
+    per_request = {}
+    for name, result in sorted(results.items()):
+        per_request[name] = summarize(result['latencies'], result['statuses'], result['errors'])
+        all_latencies += result['latencies']
+        all_statuses += result['statuses']
+        all_errors += result['errors']
+
+    return {
+        'total': summarize(all_latencies, all_statuses, all_errors),
+        'requests': per_request,
+    }
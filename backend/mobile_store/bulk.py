@@ -0,0 +1,167 @@
+"""
+Bulk row loading shared by the data generator and the catalog importers.
+
+On PostgreSQL rows are streamed through ``COPY ... FROM STDIN`` without ever
+building the whole payload in memory. Other backends (SQLite in development)
+fall back to batched ``executemany`` inserts, so the same code paths run
+everywhere.
+"""
+
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connections
+
+COPY_BATCH_SIZE = 10000
+
+
+def batched(iterable, size):
+    """
+    Yield lists of up to ``size`` items from ``iterable``.
+
+    Args:
+        iterable: Any iterable
+        size: Maximum batch length
+
+    Yields:
+        Lists of items
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_field(value):
+    """Format one value for ``COPY ... WITH (FORMAT csv)``."""
+    if value is None:
+        return ''
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, Decimal):
+        return format(value, 'f')
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class RowStream(io.TextIOBase):
+    """
+    File-like view of an iterable of rows as CSV text, read by ``COPY``.
+
+    NULLs are written as unquoted empty fields and every string is quoted, so
+    empty strings and NULLs stay distinct.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = ''
+
+    def readable(self):
+        return True
+
+    def _format(self, row):
+        return ','.join(_copy_field(value) for value in row) + '\n'
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += self._format(next(self._rows))
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    readline = read
+
+
+def copy_rows(table, columns, rows, using='default', batch_size=COPY_BATCH_SIZE):
+    """
+    Load rows into a table with ``COPY`` (PostgreSQL) or batched inserts.
+
+    Args:
+        table: Table name
+        columns: Column names, in row order
+        rows: Iterable of tuples of Python values (consumed lazily)
+        using: Database alias
+        batch_size: Rows per ``executemany`` call on non-PostgreSQL backends
+
+    Returns:
+        Number of rows loaded
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    column_list = ', '.join(quote(column) for column in columns)
+
+    count = 0
+
+    def counted(iterable):
+        nonlocal count
+        for row in iterable:
+            count += 1
+            yield row
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.copy_expert(
+                f'COPY {quote(table)} ({column_list}) FROM STDIN WITH (FORMAT csv)',
+                RowStream(counted(rows)),
+            )
+        else:
+            placeholders = ', '.join(['%s'] * len(columns))
+            sql = f'INSERT INTO {quote(table)} ({column_list}) VALUES ({placeholders})'
+            for batch in batched(counted(rows), batch_size):
+                cursor.executemany(sql, [
+                    [connection.ops.adapt_unknown_value(value) for value in row] for row in batch
+                ])
+    return count
+
+
+def insert_model_rows(model, field_names, rows, using='default', batch_size=COPY_BATCH_SIZE):
+    """
+    Bulk load rows for a model, with explicit values for every listed field.
+
+    Unlike ``bulk_create`` this keeps explicit primary keys and
+    ``auto_now``/``auto_now_add`` timestamps, and never builds model instances.
+    Call ``reset_sequences`` afterwards when primary keys were supplied.
+
+    Args:
+        model: Model class
+        field_names: Field names, in row order
+        rows: Iterable of tuples of Python values
+        using: Database alias
+        batch_size: Rows per insert batch on non-PostgreSQL backends
+
+    Returns:
+        Number of rows loaded
+    """
+    columns = [model._meta.get_field(name).column for name in field_names]
+    return copy_rows(model._meta.db_table, columns, rows, using, batch_size)
+
+
+def next_pk(model, using='default'):
+    """First primary key value above every existing row of ``model``."""
+    last = model.objects.using(using).order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def reset_sequences(models, using='default'):
+    """Move the primary key sequences past rows inserted with explicit keys."""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
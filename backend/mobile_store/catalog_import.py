@@ -0,0 +1,321 @@
+"""
+Streaming catalog imports (CSV or JSONL) with a set-based upsert.
+
+The file is read one record at a time and validated in chunks with the
+app's import serializer. Valid rows are streamed into a temporary staging
+table with ``COPY`` (see ``mobile_store.bulk``), then merged into the
+catalog table with a single ``INSERT ... ON CONFLICT (<key>) DO UPDATE``.
+Invalid rows are skipped and reported by line number. Stock changes of
+imported products are recorded in the inventory ledger as ``IMPORT``
+movements, computed in SQL from the stock each row had before the merge.
+
+Apps describe their imports with an ``ImportSpec`` (see ``phones/importers.py``
+and ``accessories/importers.py``).
+"""
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+from .bulk import batched, copy_rows
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_CHUNK_SIZE = 1000
+# Only the first errors are kept in full; the rest are counted.
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportSpec:
+    """
+    How rows of one catalog model are validated and merged.
+
+    Attributes:
+        model: Target model
+        serializer_class: Validates one record; ``validated_data`` must hold model values
+        key: Field names of the unique constraint used as the conflict target
+        fields: Field names loaded from the file
+        context_loader: Optional callable building serializer context for a chunk of records
+    """
+    model: type
+    serializer_class: type
+    key: tuple
+    fields: tuple
+    context_loader: Optional[Callable] = None
+
+
+@dataclass
+class ImportResult:
+    """Outcome of one import."""
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def detect_format(name):
+    """Guess the import format from a file name; None if unknown."""
+    extension = name.rsplit('.', 1)[-1].lower()
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return None
+
+
+def read_records(stream, fmt):
+    """
+    Read records lazily from a CSV or JSONL file.
+
+    Args:
+        stream: Binary or text file object
+        fmt: One of ``IMPORT_FORMATS``
+
+    Yields:
+        Tuples of (line number, record dict or None, error message or None)
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # Empty cells mean "not provided" so optional fields keep their defaults.
+            yield reader.line_num, {
+                name: value for name, value in record.items()
+                if name is not None and value not in ('', None)
+            }, None
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Each line must be a JSON object'
+            continue
+        yield line_number, record, None
+
+
+def _validated_rows(spec, chunk, result):
+    """Validate one chunk of records and return staging rows for the valid ones."""
+    model_fields = [spec.model._meta.get_field(name) for name in spec.fields]
+    records = [record for _, record, _ in chunk if record is not None]
+    context = spec.context_loader(records) if spec.context_loader else {}
+
+    rows = []
+    for line, record, error in chunk:
+        result.rows += 1
+        if error:
+            result.add_error(line, {'non_field_errors': [error]})
+            continue
+        serializer = spec.serializer_class(data=record, context=context)
+        if not serializer.is_valid():
+            result.add_error(line, serializer.errors)
+            continue
+        data = serializer.validated_data
+        rows.append([
+            data[model_field.name] if model_field.name in data else model_field.get_default()
+            for model_field in model_fields
+        ] + [line])
+    return rows
+
+
+def import_catalog(spec, stream, fmt, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False):
+    """
+    Validate and upsert a catalog file.
+
+    Args:
+        spec: ``ImportSpec`` of the target model
+        stream: Binary or text file object
+        fmt: One of ``IMPORT_FORMATS``
+        chunk_size: Records validated (and copied) per chunk
+        dry_run: Validate and stage everything, then roll back
+
+    Returns:
+        ImportResult
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f'Unsupported import format {fmt!r}')
+
+    opts = spec.model._meta
+    quote = connection.ops.quote_name
+    columns = [opts.get_field(name).column for name in spec.fields]
+    key_columns = [opts.get_field(name).column for name in spec.key]
+    staging = f'import_{opts.db_table}'
+    result = ImportResult()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            definitions = ', '.join(
+                f'{quote(opts.get_field(name).column)} {opts.get_field(name).db_type(connection)}'
+                for name in spec.fields
+            )
+            on_commit = ' ON COMMIT DROP' if connection.vendor == 'postgresql' else ''
+            cursor.execute(f'DROP TABLE IF EXISTS {quote(staging)}')
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {quote(staging)} '
+                f'({definitions}, line integer, previous_stock integer){on_commit}'
+            )
+
+        for chunk in batched(read_records(stream, fmt), chunk_size):
+            copy_rows(staging, columns + ['line'], _validated_rows(spec, chunk, result))
+
+        with connection.cursor() as cursor:
+            _merge(cursor, spec, staging, columns, key_columns, result)
+            cursor.execute(f'DROP TABLE IF EXISTS {quote(staging)}')
+
+        if dry_run:
+            transaction.set_rollback(True)
+    return result
+
+
+def _merge(cursor, spec, staging, columns, key_columns, result):
+    """Upsert the staged rows; the last row wins when a key repeats."""
+    opts = spec.model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    staging = quote(staging)
+    keys = ', '.join(quote(column) for column in key_columns)
+    latest = f'line IN (SELECT MAX(line) FROM {staging} GROUP BY {keys})'
+
+    join = ' AND '.join(f't.{quote(c)} = s.{quote(c)}' for c in key_columns)
+    cursor.execute(
+        f'SELECT COUNT(*), COUNT(t.{quote(opts.pk.column)}) FROM {staging} s '
+        f'LEFT JOIN {table} t ON {join} WHERE s.{latest}'
+    )
+    staged, existing = cursor.fetchone()
+    result.created = staged - existing
+    result.updated = existing
+
+    product_type = _ledger_product_type(spec)
+    if product_type:
+        stock = quote(opts.get_field('stock_quantity').column)
+        match = ' AND '.join(f't.{quote(c)} = {staging}.{quote(c)}' for c in key_columns)
+        cursor.execute(
+            f'UPDATE {staging} SET previous_stock = (SELECT t.{stock} FROM {table} t WHERE {match}) '
+            f'WHERE {latest}'
+        )
+
+    created_columns = [f.column for f in opts.concrete_fields if getattr(f, 'auto_now_add', False)]
+    updated_columns = [f.column for f in opts.concrete_fields if getattr(f, 'auto_now', False)]
+    timestamp_columns = created_columns + updated_columns
+    assignments = []
+    for name, column in zip(spec.fields, columns):
+        if name in spec.key:
+            continue
+        if opts.get_field(name).null:
+            # A missing optional value keeps what the product already has.
+            assignments.append(f'{quote(column)} = COALESCE(excluded.{quote(column)}, {table}.{quote(column)})')
+        else:
+            assignments.append(f'{quote(column)} = excluded.{quote(column)}')
+    assignments += [f'{quote(column)} = excluded.{quote(column)}' for column in updated_columns]
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    insert_columns = ', '.join(quote(column) for column in columns + timestamp_columns)
+    select_columns = ', '.join(
+        [quote(column) for column in columns] + ['%s'] * len(timestamp_columns)
+    )
+    cursor.execute(
+        f'INSERT INTO {table} ({insert_columns}) '
+        f'SELECT {select_columns} FROM {staging} WHERE {latest} '
+        f'ON CONFLICT ({keys}) DO UPDATE SET {", ".join(assignments)}',
+        [now] * len(timestamp_columns),
+    )
+
+    if product_type:
+        _record_stock_changes(cursor, spec, product_type, staging, join, latest)
+
+
+def _ledger_product_type(spec):
+    """The ledger product type of an import that loads stock; None otherwise."""
+    from inventory.stock import PRODUCT_MODELS
+
+    if 'stock_quantity' not in spec.fields:
+        return None
+    return next((t for t, model in PRODUCT_MODELS.items() if model is spec.model), None)
+
+
+def _record_stock_changes(cursor, spec, product_type, staging, join, latest):
+    """
+    Record the stock the merge changed as ``IMPORT`` movements.
+
+    New products start from 0, like a product created through the API.
+    Sharded products are skipped: their ``stock_quantity`` is a cached total
+    that the next rebalance overwrites (see inventory/ledger.py).
+    """
+    from inventory.ledger import record
+    from inventory.models import StockShard
+
+    opts = spec.model._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    pk = quote(opts.pk.column)
+    delta = f't.{quote(opts.get_field("stock_quantity").column)} - COALESCE(s.previous_stock, 0)'
+    shards = StockShard._meta
+    cursor.execute(
+        f'SELECT t.{pk}, {delta} FROM {staging} s JOIN {table} t ON {join} '
+        f'WHERE s.{latest} AND {delta} <> 0 AND NOT EXISTS ('
+        f'SELECT 1 FROM {quote(shards.db_table)} sh '
+        f'WHERE sh.{quote(shards.get_field("product_type").column)} = %s '
+        f'AND sh.{quote(shards.get_field("product_id").column)} = t.{pk})',
+        [product_type],
+    )
+    for rows in batched(cursor.fetchall(), IMPORT_CHUNK_SIZE):
+        record('IMPORT', [((product_type, pk), delta) for pk, delta in rows], 'import')
+
+
+def import_upload(request, spec):
+    """
+    Run an import from the ``file`` of a multipart request.
+
+    The format comes from ``format`` in the form data or the file extension;
+    ``?dry_run=1`` validates without saving.
+
+    Args:
+        request: DRF request
+        spec: ``ImportSpec`` of the target model
+
+    Returns:
+        Response with the ``ImportResult``, or 400 for a missing/unknown file
+    """
+    from rest_framework import status
+    from rest_framework.response import Response
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    fmt = request.data.get('format') or detect_format(upload.name)
+    if fmt not in IMPORT_FORMATS:
+        return Response(
+            {"error": f"format must be one of {', '.join(IMPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    dry_run = request.query_params.get('dry_run') in ('1', 'true')
+    result = import_catalog(spec, upload, fmt, dry_run=dry_run)
+    return Response(result.as_dict())
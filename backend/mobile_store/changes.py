@@ -0,0 +1,232 @@
+"""
+Incremental catalog change feed.
+
+``GET /api/phones/changes/?since=<cursor>`` (and ``/api/accessories/changes/``)
+returns the products created or updated after the cursor, oldest first,
+plus the ids of products deleted since then, and a new cursor::
+
+    {"changes": [...], "deleted": [3, 17], "cursor": "...", "has_more": false}
+
+A client without a cursor (cold start) pages through the whole catalog once,
+then keeps applying deltas. Rows are read in ``(updated_at, pk)`` order on
+an index, so each page costs one range scan and no ``OFFSET``. Every write
+path that changes a product, bulk ``UPDATE``s included, sets
+``updated_at``. Deletions leave a ``Tombstone`` row (see ``product_deleted``).
+
+``updated_at`` is set before commit, so a slow transaction (a large stock
+sync, a catalog import) can commit a row older than a cursor already handed
+out. On PostgreSQL the feed is therefore ordered by ``(xact_id, pk)``
+instead, the writing transaction of each row and tombstone, and only shows
+rows of transactions below the oldest one still running (see
+mobile_store/visibility.py): a cursor can never get ahead of a commit,
+however long the transaction runs. Other databases only show rows older
+than ``CATALOG_CHANGES_LAG`` seconds to let such transactions finish. The
+feed reads from the primary because a lagging replica would skip rows the
+same way. Tombstones are kept for ``CATALOG_TOMBSTONE_RETENTION_DAYS``; an
+older cursor, or one issued before the database switched ordering, gets
+``410 Gone`` and the client reloads the whole catalog.
+"""
+
+import base64
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import Tombstone
+from .visibility import uses_xact_ids, visible_xmin
+
+TOMBSTONE_PRUNE_BATCH_SIZE = 1000
+PRODUCT_TYPES = {
+    'phones.MobilePhone': 'PHONE',
+    'accessories.Accessory': 'ACCESSORY',
+}
+
+
+def encode_cursor(updated_at, pk, xact_id=None):
+    """
+    Opaque cursor for the position after ``(updated_at, pk)``.
+
+    With ``xact_id`` the position is ``(xact_id, pk)`` instead and
+    ``updated_at`` is the time the cursor was issued.
+    """
+    parts = [updated_at.isoformat(), str(pk)] + ([str(xact_id)] if xact_id is not None else [])
+    return base64.urlsafe_b64encode('|'.join(parts).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Position encoded by ``encode_cursor``.
+
+    Returns:
+        Tuple of (updated_at, pk, xact_id); xact_id is None for cursors
+        ordered by ``updated_at``
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        parts = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if len(parts) not in (2, 3):
+            raise ValueError(cursor)
+        updated_at = datetime.fromisoformat(parts[0])
+        pk = int(parts[1])
+        xact_id = int(parts[2]) if len(parts) == 3 else None
+    except (TypeError, UnicodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    if timezone.is_naive(updated_at):
+        raise ValueError('Invalid cursor')
+    return updated_at, pk, xact_id
+
+
+def _horizon():
+    """
+    Ordering field of the feed and the position it may not reach yet.
+
+    Returns:
+        Tuple of (field name, horizon)
+    """
+    if uses_xact_ids():
+        return 'xact_id', visible_xmin()
+    return 'updated_at', timezone.now() - timedelta(seconds=settings.CATALOG_CHANGES_LAG)
+
+
+def _cursor(field, position, pk):
+    if field == 'xact_id':
+        return encode_cursor(timezone.now(), pk, position)
+    return encode_cursor(position, pk)
+
+
+def current_cursor():
+    """Cursor for the end of the feed as of now (nothing changed yet)."""
+    field, horizon = _horizon()
+    return _cursor(field, horizon, 0)
+
+
+def changes(queryset, product_type, since=None, page_size=None):
+    """
+    One page of the change feed.
+
+    Args:
+        queryset: Products of one type
+        product_type: ``PHONE`` or ``ACCESSORY``, for the tombstones
+        since: Decoded cursor, or None for the whole catalog
+        page_size: Maximum changed rows per page
+
+    Returns:
+        Tuple of (changed rows, deleted ids, next cursor, has_more)
+    """
+    page_size = page_size or settings.CATALOG_CHANGES_PAGE_SIZE
+    field, horizon = _horizon()
+    pk_name = queryset.model._meta.pk.name
+
+    rows = queryset.using('default').filter(**{f'{field}__lt': horizon})
+    if since is not None:
+        position = since[2] if field == 'xact_id' else since[0]
+        rows = rows.filter(Q(**{f'{field}__gt': position}) | Q(**{field: position, 'pk__gt': since[1]}))
+    rows = list(rows.order_by(field, pk_name)[:page_size + 1])
+    has_more = len(rows) > page_size
+    if has_more:
+        rows = rows[:page_size]
+        # Rows sharing the last position may continue on the next page, so
+        # deletions at that position are sent with it.
+        end = getattr(rows[-1], field)
+        cursor = _cursor(field, end, rows[-1].pk)
+    else:
+        end, cursor = horizon, _cursor(field, horizon, 0)
+
+    deleted = []
+    if since is not None:
+        tombstone_field = 'xact_id' if field == 'xact_id' else 'deleted_at'
+        deleted = list(
+            Tombstone.objects.using('default').filter(**{
+                'product_type': product_type,
+                f'{tombstone_field}__gte': position,
+                f'{tombstone_field}__lt': end,
+            }).order_by('product_id').values_list('product_id', flat=True).distinct()
+        )
+    return rows, deleted, cursor, has_more
+
+
+def changes_response(request, queryset, product_type, serializer_class):
+    """
+    Serve a page of the change feed for ``?since=<cursor>``.
+
+    Returns:
+        Response with ``changes``, ``deleted``, ``cursor`` and ``has_more``;
+        400 for a malformed cursor, 410 for one older than the tombstones
+    """
+    since = request.query_params.get('since')
+    if since:
+        try:
+            since = decode_cursor(since)
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        retention = timedelta(days=settings.CATALOG_TOMBSTONE_RETENTION_DAYS)
+        ordered_by_xact = since[2] is not None
+        if since[0] < timezone.now() - retention or ordered_by_xact != uses_xact_ids():
+            return Response(
+                {"error": "Cursor expired, reload the full catalog"},
+                status=status.HTTP_410_GONE
+            )
+    rows, deleted, cursor, has_more = changes(queryset, product_type, since or None)
+    return Response({
+        'changes': serializer_class(rows, many=True, context={'request': request}).data,
+        'deleted': deleted,
+        'cursor': cursor,
+        'has_more': has_more,
+    })
+
+
+def product_deleted(sender, instance, origin=None, **kwargs):
+    """Leave a tombstone for a deleted product."""
+    if origin is not None and origin._meta.label == 'phones.Brand':
+        return  # Written in one INSERT by brand_deleting.
+    Tombstone.objects.create(product_type=PRODUCT_TYPES[sender._meta.label], product_id=instance.pk)
+
+
+def brand_deleting(sender, instance, **kwargs):
+    """Leave tombstones for the phones a brand deletion cascades to."""
+    now = timezone.now()
+    Tombstone.objects.bulk_create([
+        Tombstone(product_type='PHONE', product_id=pk, deleted_at=now)
+        for pk in instance.phones.values_list('pk', flat=True)
+    ])
+
+
+def brand_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Put a brand's phones back in the feed; their ``brand_name`` may have changed."""
+    if created or (update_fields is not None and 'brand_name' not in update_fields):
+        return
+    instance.phones.update(updated_at=timezone.now())
+
+
+def prune_tombstones(retention_days=None, batch_size=None):
+    """
+    Delete tombstones older than ``retention_days``, in batches.
+
+    Returns:
+        Number of tombstones deleted
+    """
+    days = settings.CATALOG_TOMBSTONE_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = timezone.now() - timedelta(days=days)
+    batch_size = batch_size or TOMBSTONE_PRUNE_BATCH_SIZE
+    deleted = 0
+    while True:
+        ids = list(Tombstone.objects.filter(deleted_at__lt=cutoff).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Tombstone.objects.filter(pk__in=ids).delete()[0]
+
+
+def connect_signals():
+    from accessories.models import Accessory
+    from phones.models import Brand, MobilePhone
+
+    for model in (MobilePhone, Accessory):
+        post_delete.connect(product_deleted, sender=model, dispatch_uid=f'catalog_tombstone_{model._meta.label}')
+    post_save.connect(brand_saved, sender=Brand, dispatch_uid='catalog_brand_saved')
+    pre_delete.connect(brand_deleting, sender=Brand, dispatch_uid='catalog_brand_deleting')
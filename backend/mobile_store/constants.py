@@ -25,6 +25,12 @@ MAX_PASSWORD_LENGTH = 128
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'webp']
 ALLOWED_IMAGE_MIME_TYPES = ['image/jpeg', 'image/png', 'image/webp']
+MAX_IMAGE_DIMENSION = 8000  # pixels per side
+MAX_IMAGE_PIXELS = 40_000_000
+
+# Product Limits
+MAX_PRICE = 999999.99
+MAX_STOCK_QUANTITY = 999999
 
 # Order Status Choices
 ORDER_STATUS_PENDING = 'PENDING'
@@ -0,0 +1,84 @@
+"""
+Database connection settings shared by all settings profiles.
+
+Django 4.2 has no built-in connection pool, so pooling is provided in one of
+two ways, selected with ``DB_POOL_MODE``:
+
+- ``persistent``: every worker thread keeps its connection open for
+  ``CONN_MAX_AGE`` seconds and Django checks it before reuse
+  (``CONN_HEALTH_CHECKS``). The pool is one connection per worker thread.
+- ``pgbouncer``: ``DB_HOST``/``DB_PORT`` point at PgBouncer running in
+  transaction pooling mode (see ``pgbouncer.ini``). Connections to
+  PgBouncer are kept open, and server-side cursors are disabled because they
+  do not survive transaction pooling.
+- ``off``: a new connection per request (Django's default).
+"""
+
+POOL_MODES = ('persistent', 'pgbouncer', 'off')
+
+
+def pool_size(workers, threads=1):
+    """
+    Number of database connections one server needs.
+
+    Each gunicorn worker thread holds at most one connection, plus one per
+    worker for the health monitor thread.
+
+    Args:
+        workers: Number of gunicorn worker processes
+        threads: Threads per worker
+
+    Returns:
+        Connection count
+    """
+    return workers * threads + workers
+
+
+def configure_pooling(database, mode, conn_max_age=600):
+    """
+    Apply a pooling mode to a ``DATABASES`` entry.
+
+    Args:
+        database: Settings dict for one database alias (modified in place)
+        mode: One of ``POOL_MODES``
+        conn_max_age: Seconds to keep persistent connections open
+
+    Returns:
+        The same settings dict
+    """
+    if mode not in POOL_MODES:
+        raise ValueError(f'DB_POOL_MODE must be one of {", ".join(POOL_MODES)}, got {mode!r}')
+
+    if mode == 'off':
+        database['CONN_MAX_AGE'] = 0
+        database['CONN_HEALTH_CHECKS'] = False
+        return database
+
+    database['CONN_MAX_AGE'] = conn_max_age
+    database['CONN_HEALTH_CHECKS'] = True
+    if mode == 'pgbouncer':
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return database
+
+
+def add_replicas(databases, replicas):
+    """
+    Add read replica aliases (replica1, replica2, ...) to DATABASES.
+
+    Args:
+        databases: The DATABASES dict
+        replicas: List of settings overrides, one per replica
+
+    Returns:
+        List of the replica aliases
+    """
+    aliases = []
+    for number, overrides in enumerate(replicas, start=1):
+        alias = f'replica{number}'
+        databases[alias] = {
+            **databases['default'],
+            **overrides,
+            'TEST': {'MIRROR': 'default'},
+        }
+        aliases.append(alias)
+    return aliases
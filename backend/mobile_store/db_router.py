@@ -0,0 +1,127 @@
+"""
+Primary/replica database routing.
+
+Reads go to the primary (``default``) unless code explicitly opts in with
+``replica_reads()``. The catalog viewsets opt in through ``ReplicaReadMixin``
+for safe methods, so checkout, cart, payment and admin traffic never sees
+replication lag.
+
+After a client writes anything, ``PrimaryStickinessMiddleware`` pins it to the
+primary for ``REPLICA_STICKY_SECONDS`` so it reads its own writes even from
+catalog endpoints: with a cookie, and for authenticated users with a
+``PrimaryPin`` row, which also covers clients that send no cookies (token
+auth, cross-origin requests without credentials).
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_COOKIE_NAME = 'db_primary_pin'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_alias():
+    """Pick one of the configured replica aliases at random."""
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+@contextmanager
+def replica_reads():
+    """Route reads inside the block to a replica when one is configured."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send opted-in reads to a replica and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and settings.DATABASE_REPLICAS:
+            return replica_alias()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db == 'default'
+
+
+def is_pinned_to_primary(request):
+    """
+    Check whether the client wrote recently and must read from the primary.
+
+    Args:
+        request: HTTP request object (after authentication)
+
+    Returns:
+        True if reads should stay on the primary
+    """
+    if request.COOKIES.get(PIN_COOKIE_NAME):
+        return True
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        from .models import PrimaryPin
+
+        return PrimaryPin.objects.using('default').filter(user_id=user.pk, expires_at__gt=timezone.now()).exists()
+    return False
+
+
+def pin_to_primary(request, response):
+    """
+    Pin the client of a successful write to the primary for a short window.
+
+    Args:
+        request: HTTP request object
+        response: HTTP response object
+    """
+    window = settings.REPLICA_STICKY_SECONDS
+    response.set_cookie(
+        PIN_COOKIE_NAME, '1', max_age=window, httponly=True, samesite='Lax'
+    )
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        from .models import PrimaryPin
+
+        PrimaryPin.objects.bulk_create(
+            [PrimaryPin(user_id=user.pk, expires_at=timezone.now() + timedelta(seconds=window))],
+            update_conflicts=True, unique_fields=['user_id'], update_fields=['expires_at'],
+        )
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin sending safe, unpinned requests to a read replica.
+
+    Routing is decided in ``initial()``, after authentication, so pins stored
+    for the authenticated user are honoured.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and settings.DATABASE_REPLICAS and not is_pinned_to_primary(request):
+            self._replica_token = _use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -6,10 +6,60 @@ from functools import wraps
 from django.core.cache import cache
 from django.http import JsonResponse
 from rest_framework import status
+from . import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Cached API paths of each product type (list, then detail by id).
+CATALOG_PATHS = {
+    'PHONE': ('/api/phones/', '/api/phones/{}/'),
+    'ACCESSORY': ('/api/accessories/', '/api/accessories/{}/'),
+}
+
+
+def view_cache_key(path, query=''):
+    """
+    Cache key of a response stored by ``cache_response``.
+
+    Args:
+        path: Request path
+        query: Encoded query string
+
+    Returns:
+        Cache key string
+    """
+    return f"view_cache:{path}:{query}"
+
+
+def invalidate_cached_views(paths):
+    """
+    Drop the cached responses of the given paths.
+
+    Only the variant without a query string can be addressed; filtered
+    variants expire with their timeout.
+
+    Args:
+        paths: Iterable of request paths
+    """
+    keys = [view_cache_key(path) for path in paths]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_catalog_pages(product_type, ids):
+    """
+    Drop the cached list page and the detail pages of changed products.
+
+    Args:
+        product_type: ``PHONE`` or ``ACCESSORY``
+        ids: Primary keys of the changed products
+    """
+    if not ids:
+        return
+    list_path, detail_path = CATALOG_PATHS[product_type]
+    invalidate_cached_views([list_path] + [detail_path.format(pk) for pk in ids])
+
 
 def cache_response(timeout=300):
     """
@@ -22,10 +72,11 @@ def cache_response(timeout=300):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
             # Generate cache key
-            cache_key = f"view_cache:{request.path}:{request.GET.urlencode()}"
+            cache_key = view_cache_key(request.path, request.GET.urlencode())
             
             # Try to get from cache
             cached_response = cache.get(cache_key)
+            metrics.record_cache_lookup('view_cache', cached_response is not None)
             if cached_response is not None:
                 logger.debug(f"Cache hit for {cache_key}")
                 return cached_response
@@ -5,7 +5,7 @@ Custom exception handlers for the mobile_store project.
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.exceptions import RequestDataTooBig, ValidationError as DjangoValidationError
 from django.http import Http404
 import logging
 
@@ -60,6 +60,20 @@ def custom_exception_handler(exc, context):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    # Handle uploads aborted by the upload handler
+    if isinstance(exc, RequestDataTooBig):
+        return Response(
+            {
+                'success': False,
+                'error': {
+                    'message': str(exc),
+                    'code': status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    'details': {'detail': str(exc)}
+                }
+            },
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
     # Handle 404 errors
     if isinstance(exc, Http404):
         return Response(
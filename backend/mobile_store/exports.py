@@ -0,0 +1,239 @@
+"""
+Streaming CSV/JSONL exports of whole tables.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)``, which uses a
+server-side cursor on PostgreSQL, so only one chunk of model instances is in
+memory at a time; related rows (order items) are prefetched per chunk. When
+server-side cursors are disabled (``DB_POOL_MODE=pgbouncer``) chunks are read
+with keyset pagination on the primary key instead, which keeps memory flat
+too. Output is produced line by line and sent with ``StreamingHttpResponse``
+or written to a file by ``manage.py export_data``. Under ASGI the response
+gets an async iterator that fetches one chunk of lines at a time in the
+sync thread; given a sync iterator Django would read the whole export into
+memory first.
+
+Apps describe their exports with an ``ExportSpec`` (see ``<app>/exporters.py``).
+"""
+
+import csv
+import json
+from dataclasses import dataclass
+from itertools import islice
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CHUNK_SIZE = 2000
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+@dataclass
+class ExportSpec:
+    """
+    What one export contains.
+
+    Attributes:
+        name: Used in the download file name
+        queryset: Rows to export; exported in primary key order
+        fields: Field paths of each row, ``__`` follows foreign keys
+        children: Optional reverse relation exported with each row (e.g. ``items``)
+        child_fields: Field paths of each child
+    """
+    name: str
+    queryset: object
+    fields: tuple
+    children: Optional[str] = None
+    child_fields: tuple = ()
+
+    @property
+    def header(self):
+        """CSV header; child columns are prefixed with the relation name."""
+        return list(self.fields) + [f'{self.children}__{name}' for name in self.child_fields]
+
+
+class Echo:
+    """Pseudo-buffer for ``csv.writer`` that returns each line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _value(obj, path):
+    for name in path.split('__'):
+        try:
+            obj = getattr(obj, name)
+        except ObjectDoesNotExist:
+            return None
+        if obj is None:
+            return None
+    return obj
+
+
+def iterate(spec, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """
+    Yield the instances of an export one chunk at a time.
+
+    Args:
+        spec: ``ExportSpec``
+        chunk_size: Rows fetched (and prefetched) per round trip
+        using: Database alias; the router decides when omitted
+
+    Yields:
+        Model instances in primary key order
+    """
+    queryset = spec.queryset.order_by('pk')
+    if using:
+        queryset = queryset.using(using)
+    if spec.children:
+        queryset = queryset.prefetch_related(spec.children)
+
+    if not connections[queryset.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    # Without server-side cursors iterator() would buffer the whole result
+    # client-side, so page through the table by primary key instead.
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last = chunk[-1].pk
+
+
+def csv_lines(spec, objects):
+    """
+    Render instances as CSV lines, header first.
+
+    With ``children`` there is one line per child (parent columns repeated),
+    and one line with empty child columns for a parent without children.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(spec.header)
+    empty_child = [None] * len(spec.child_fields)
+    for obj in objects:
+        row = [_value(obj, path) for path in spec.fields]
+        if not spec.children:
+            yield writer.writerow(row)
+            continue
+        children = getattr(obj, spec.children).all()
+        if not children:
+            yield writer.writerow(row + empty_child)
+        for child in children:
+            yield writer.writerow(row + [_value(child, path) for path in spec.child_fields])
+
+
+def jsonl_lines(spec, objects):
+    """Render instances as JSON lines, children nested as a list."""
+    for obj in objects:
+        document = {path: _value(obj, path) for path in spec.fields}
+        if spec.children:
+            document[spec.children] = [
+                {path: _value(child, path) for path in spec.child_fields}
+                for child in getattr(obj, spec.children).all()
+            ]
+        yield json.dumps(document, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_lines(spec, fmt, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """
+    Stream an export as text lines.
+
+    Args:
+        spec: ``ExportSpec``
+        fmt: One of ``EXPORT_FORMATS``
+        chunk_size: Rows fetched per round trip
+        using: Database alias; the router decides when omitted
+
+    Returns:
+        Iterator of lines
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Unsupported export format {fmt!r}')
+    objects = iterate(spec, chunk_size, using)
+    if fmt == 'csv':
+        return csv_lines(spec, objects)
+    return jsonl_lines(spec, objects)
+
+
+async def aiter_lines(lines, batch_size=EXPORT_CHUNK_SIZE):
+    """
+    Async iterator over ``lines``, joined ``batch_size`` lines per chunk.
+
+    Each batch is read in the thread that owns the request's database
+    connection, so a server-side cursor stays usable between batches.
+    """
+    lines = iter(lines)
+
+    def next_batch():
+        return ''.join(islice(lines, batch_size))
+
+    try:
+        while True:
+            chunk = await sync_to_async(next_batch, thread_sensitive=True)()
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        if hasattr(lines, 'close'):
+            await sync_to_async(lines.close, thread_sensitive=True)()
+
+
+def export_response(request, spec):
+    """
+    Stream an export as a file download.
+
+    The format comes from ``?export_format=`` (``csv`` by default; DRF
+    reserves ``?format=``) and the chunk size from ``?chunk_size=``.
+
+    Args:
+        request: DRF request
+        spec: ``ExportSpec``
+
+    Returns:
+        StreamingHttpResponse, or a 400 Response for bad parameters
+    """
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import StreamingHttpResponse
+    from rest_framework import status
+    from rest_framework.response import Response
+
+    fmt = request.query_params.get('export_format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return Response(
+            {"error": f"export_format must be one of {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        chunk_size = int(request.query_params.get('chunk_size', EXPORT_CHUNK_SIZE))
+    except ValueError:
+        chunk_size = 0
+    if chunk_size < 1:
+        return Response(
+            {"error": "chunk_size must be a positive integer"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # The body is generated after the view returns, outside any routing
+    # context, so bind the database chosen for this request now.
+    using = spec.queryset.db
+    lines = export_lines(spec, fmt, chunk_size, using)
+    if isinstance(request._request, ASGIRequest):
+        lines = aiter_lines(lines, chunk_size)
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[fmt])
+    filename = f'{spec.name}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    # Let nginx pass chunks through instead of buffering the whole export.
+    response['X-Accel-Buffering'] = 'no'
+    return response
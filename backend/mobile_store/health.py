@@ -1,49 +1,322 @@
 """
-Health check view for monitoring and load balancers
+Health and readiness probes for monitoring and load balancers.
+
+Probe requests never touch the database themselves. Each worker process runs
+the dependency checks on a background thread every ``HEALTH_CHECK_INTERVAL``
+seconds and the views only serialize the latest result, so a burst of probe
+traffic cannot compete with real requests for database connections.
 """
-from django.http import JsonResponse
-from django.views.decorators.http import require_GET
-from django.views.decorators.cache import never_cache
-from django.db import connection
+
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
 from django.core.cache import cache
-import sys
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils import timezone
+from django.utils.cache import add_never_cache_headers
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
 
+logger = logging.getLogger(__name__)
 
-@never_cache
-@require_GET
-def health_check(request):
+
+def _timed(check):
     """
-    Health check endpoint that verifies:
-    - Database connectivity
-    - Application is running
-    - Python version
+    Run a check and attach its latency.
+
+    Args:
+        check: Callable returning a dict with at least a 'status' key
+
+    Returns:
+        Result dict with 'latency_ms' added, or an error result
     """
-    health_status = {
-        'status': 'healthy',
-        'python_version': sys.version,
-        'checks': {}
-    }
-    
-    # Database check
+    start = time.perf_counter()
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        health_status['checks']['database'] = 'ok'
+        result = check()
     except Exception as e:
-        health_status['status'] = 'unhealthy'
-        health_status['checks']['database'] = f'error: {str(e)}'
-    
-    # Application check
-    health_status['checks']['application'] = 'ok'
-    
-    status_code = 200 if health_status['status'] == 'healthy' else 503
-    return JsonResponse(health_status, status=status_code)
+        result = {'status': 'error', 'error': str(e)}
+    result['latency_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def check_database():
+    """Round trip a trivial query on the default database."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return {'status': 'ok'}
+
+
+def check_cache():
+    """Write and read back a key in the default cache."""
+    if settings.CACHES['default']['BACKEND'].endswith('.DummyCache'):
+        return {'status': 'disabled'}
+    cache.set('health_check', 'ok', 10)
+    if cache.get('health_check') != 'ok':
+        return {'status': 'error', 'error': 'value not returned'}
+    return {'status': 'ok'}
+
+
+def check_media_storage():
+    """
+    Check that the media storage answers.
+
+    A missing local media root is reported but not treated as a failure, as
+    it is created by the first upload.
+    """
+    return {'status': 'ok', 'root_exists': default_storage.exists('')}
+
+
+def check_migrations():
+    """Report migrations that exist on disk but are not applied."""
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    pending = [f'{migration.app_label}.{migration.name}' for migration, backwards in plan]
+    return {'status': 'ok' if not pending else 'pending', 'pending': pending}
+
+
+def check_connection_capacity():
+    """
+    Report the connection pool configuration and server connection usage.
+
+    Server-side numbers come from ``pg_stat_activity`` and are only available
+    on PostgreSQL; other backends report the pool settings with status 'n/a'.
+    """
+    from . import metrics
+
+    database = connection.settings_dict
+    result = {
+        'pool': {
+            'mode': settings.DB_POOL_MODE,
+            'size': settings.DB_POOL_SIZE,
+            'conn_max_age': database['CONN_MAX_AGE'],
+            'health_checks': database['CONN_HEALTH_CHECKS'],
+        },
+    }
+    if connection.vendor != 'postgresql':
+        result['status'] = 'n/a'
+        return result
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        by_state = dict(cursor.fetchall())
+        cursor.execute(
+            "SELECT count(*), current_setting('max_connections')::int "
+            "FROM pg_stat_activity"
+        )
+        in_use, max_connections = cursor.fetchone()
+
+    for state, count in by_state.items():
+        metrics.DB_SERVER_CONNECTIONS.labels(state).set(count)
+
+    usage = in_use / max_connections if max_connections else 0
+    limit = settings.HEALTH_MAX_CONNECTION_USAGE
+    result.update({
+        'status': 'ok' if usage < limit else 'exhausted',
+        'in_use': in_use,
+        'max_connections': max_connections,
+        'usage': round(usage, 3),
+        'by_state': by_state,
+    })
+    return result
+
+
+def run_checks(include_migrations=True):
+    """
+    Run every dependency check once, synchronously.
+
+    Args:
+        include_migrations: Whether to (re)compute the migration state
+
+    Returns:
+        Dict of check name to result
+    """
+    checks = {
+        'database': _timed(check_database),
+        'cache': _timed(check_cache),
+        'media_storage': _timed(check_media_storage),
+        'connections': _timed(check_connection_capacity),
+    }
+    if include_migrations:
+        checks['migrations'] = _timed(check_migrations)
+    return checks
+
+
+class HealthMonitor:
+    """
+    Refreshes the dependency checks on a daemon thread and caches the result.
+
+    The thread is started lazily by the first probe in each worker process, so
+    it is never started by management commands or before gunicorn forks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._checks = None
+        self._checked_at = None
+        self._migrations = None
+        self._migrations_checked_at = 0
+
+    def ensure_started(self):
+        """Start the refresh thread for this process if it is not running."""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._checks = None
+            self._checked_at = None
+            self._thread = threading.Thread(
+                target=self._run, name='health-monitor', daemon=True
+            )
+            self._thread.start()
+
+    def refresh(self):
+        """Run the checks once and publish the result."""
+        now = time.monotonic()
+        migrations_due = (
+            self._migrations is None
+            or now - self._migrations_checked_at >= settings.HEALTH_MIGRATION_CHECK_INTERVAL
+        )
+        try:
+            checks = run_checks(include_migrations=migrations_due)
+        finally:
+            # This thread's connection is not covered by request_finished.
+            connection.close()
+
+        if migrations_due:
+            self._migrations = checks['migrations']
+            self._migrations_checked_at = now
+        else:
+            checks['migrations'] = self._migrations
+
+        self._checks = checks
+        self._checked_at = timezone.now()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Health monitor refresh failed')
+            time.sleep(settings.HEALTH_CHECK_INTERVAL)
+
+    def snapshot(self):
+        """
+        Return the latest checks, their timestamp and their age in seconds.
+
+        Returns:
+            Tuple of (checks, checked_at, age); all None before the first refresh
+        """
+        self.ensure_started()
+        checks, checked_at = self._checks, self._checked_at
+        if checked_at is None:
+            return None, None, None
+        return checks, checked_at, (timezone.now() - checked_at).total_seconds()
+
+
+monitor = HealthMonitor()
+
+
+def _probe_payload(status, checks, checked_at, age):
+    return {
+        'status': status,
+        'checked_at': checked_at.isoformat() if checked_at else None,
+        'age_seconds': round(age, 2) if age is not None else None,
+        'checks': checks or {},
+    }
+
+
+def health_response():
+    """
+    Liveness check: the process is serving and its monitor thread is current.
+
+    Returns 503 when the database is unreachable or the cached result is older
+    than ``HEALTH_CHECK_STALE_AFTER`` seconds.
+    """
+    checks, checked_at, age = monitor.snapshot()
+    if checks is None:
+        return JsonResponse(_probe_payload('starting', None, None, None), status=200)
+
+    healthy = (
+        checks['database']['status'] == 'ok'
+        and age <= settings.HEALTH_CHECK_STALE_AFTER
+    )
+    status = 'healthy' if healthy else 'unhealthy'
+    return JsonResponse(
+        _probe_payload(status, checks, checked_at, age),
+        status=200 if healthy else 503,
+    )
+
+
+def ready_response():
+    """
+    Readiness check for load balancers and container orchestration.
+
+    A worker is ready only when the database answers within
+    ``HEALTH_DB_LATENCY_THRESHOLD_MS``, migrations are applied, the database
+    still has connection headroom and the media storage is reachable.
+    """
+    checks, checked_at, age = monitor.snapshot()
+    if checks is None:
+        return JsonResponse(_probe_payload('starting', None, None, None), status=503)
+
+    reasons = []
+    if age > settings.HEALTH_CHECK_STALE_AFTER:
+        reasons.append('stale health data')
+    if checks['database']['status'] != 'ok':
+        reasons.append('database unavailable')
+    elif checks['database']['latency_ms'] > settings.HEALTH_DB_LATENCY_THRESHOLD_MS:
+        reasons.append('database slow')
+    if checks['migrations']['status'] != 'ok':
+        reasons.append('migrations not applied')
+    if checks['connections']['status'] not in ('ok', 'n/a'):
+        reasons.append('database connections exhausted')
+    if checks['media_storage']['status'] != 'ok':
+        reasons.append('media storage unavailable')
+
+    payload = _probe_payload('ready' if not reasons else 'not ready', checks, checked_at, age)
+    payload['reasons'] = reasons
+    return JsonResponse(payload, status=200 if not reasons else 503)
+
+
+@never_cache
+@require_GET
+def health_check(request):
+    """Liveness probe (see ``health_response``)."""
+    return health_response()
 
 
 @never_cache
 @require_GET
 def ready_check(request):
-    """
-    Readiness check for Kubernetes/container orchestration
-    """
-    return JsonResponse({'status': 'ready'}, status=200)
+    """Readiness probe (see ``ready_response``)."""
+    return ready_response()
+
+
+async def health_check_async(request):
+    """Liveness probe for ASGI; answered without leaving the event loop."""
+    return _async_probe(request, health_response)
+
+
+async def ready_check_async(request):
+    """Readiness probe for ASGI; answered without leaving the event loop."""
+    return _async_probe(request, ready_response)
+
+
+def _async_probe(request, build_response):
+    # never_cache/require_GET only wrap sync views in Django 4.2.
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    response = build_response()
+    add_never_cache_headers(response)
+    return response
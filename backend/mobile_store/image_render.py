@@ -0,0 +1,66 @@
+"""
+CPU-bound image resizing, run in worker processes.
+
+This module only depends on Pillow so that pool workers started with the
+``spawn`` method import it quickly and never touch Django (see
+``mobile_store/images.py``).
+"""
+
+import io
+
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _for_format(image, fmt):
+    """Convert to a mode the format can store; JPEG gets alpha flattened onto white."""
+    if not _has_alpha(image):
+        return image if image.mode == 'RGB' else image.convert('RGB')
+    image = image.convert('RGBA')
+    if fmt == 'webp':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def render_derivatives(data, sizes, formats):
+    """
+    Resize one source image to every size and format.
+
+    Images are never upscaled; sizes wider than the source reuse its width.
+
+    Args:
+        data: Source image bytes
+        sizes: Dict of size name to maximum width in pixels
+        formats: Output formats (keys of ``SAVE_OPTIONS``)
+
+    Returns:
+        List of (size name, format, width, height, encoded bytes)
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    if source.mode not in ('RGB', 'RGBA'):
+        # Palette and greyscale images would be resized with nearest-neighbour.
+        source = source.convert('RGBA' if _has_alpha(source) else 'RGB')
+
+    rendered = []
+    for name, max_width in sizes.items():
+        image = source
+        if source.width > max_width:
+            height = max(1, round(source.height * max_width / source.width))
+            image = source.resize((max_width, height), Image.LANCZOS)
+        for fmt in formats:
+            output = io.BytesIO()
+            _for_format(image, fmt).save(output, **SAVE_OPTIONS[fmt])
+            rendered.append((name, fmt, image.width, image.height, output.getvalue()))
+    return rendered
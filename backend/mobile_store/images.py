@@ -0,0 +1,219 @@
+"""
+Resized derivatives of product images.
+
+When a phone or accessory is saved with a new ``image``, the upload is
+resized to every ``DERIVATIVE_SIZES`` width in WebP and JPEG by a background
+job on the ``images`` queue (see mobile_store/tasks.py; run by
+``manage.py run_workers``). With ``IMAGE_DERIVATIVES_IN_BACKGROUND`` off the
+web process does it after the transaction commits, still off the request
+thread: a small thread pool does the storage and database I/O and hands the
+CPU-bound resizing to a ``spawn`` process pool. The result is stored in the
+product's ``image_derivatives`` and served by the serializers'
+``image_srcset`` field; ``manage.py generate_image_derivatives`` backfills
+existing images across all cores. Replaced derivative files are left to
+``manage.py prune_media``, since content-addressed files may be shared.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from rest_framework import serializers
+from .image_render import render_derivatives
+
+logger = logging.getLogger(__name__)
+
+# Maximum width in pixels of each derivative.
+DERIVATIVE_SIZES = {
+    'thumbnail': 160,
+    'card': 480,
+    'detail': 1080,
+}
+DERIVATIVE_FORMATS = ('webp', 'jpeg')
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+# Resizing processes per web process when background jobs are off.
+POOL_WORKERS = 2
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pools():
+    """Per-process (thread pool, process pool), created on first use."""
+    with _pools_lock:
+        if _pools.get('pid') != os.getpid():
+            # Pools are not inherited across fork (e.g. gunicorn preload).
+            _pools.update(
+                pid=os.getpid(),
+                threads=ThreadPoolExecutor(max_workers=POOL_WORKERS, thread_name_prefix='image-derivatives'),
+                processes=ProcessPoolExecutor(
+                    max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context('spawn')
+                ),
+            )
+        return _pools['threads'], _pools['processes']
+
+
+def shutdown_pools():
+    """Wait for the derivatives scheduled in this process and stop its pools."""
+    with _pools_lock:
+        pools = dict(_pools)
+        _pools.clear()
+    if pools.get('pid') == os.getpid():
+        pools['threads'].shutdown(wait=True)
+        pools['processes'].shutdown(wait=True)
+
+
+def derivative_names(derivatives):
+    """Storage names of every file in an ``image_derivatives`` value."""
+    return [
+        name
+        for size in (derivatives or {}).get('sizes', {}).values()
+        for fmt, name in size.items() if fmt in DERIVATIVE_FORMATS
+    ]
+
+
+def save_derivatives(image, rendered):
+    """
+    Write rendered derivatives next to the original image.
+
+    Args:
+        image: The product's ``ImageFieldFile``
+        rendered: Output of ``render_derivatives``
+
+    Returns:
+        ``image_derivatives`` value
+    """
+    from django.core.files.base import ContentFile
+
+    directory, filename = os.path.split(image.name)
+    stem = os.path.splitext(filename)[0]
+    sizes = {}
+    for size, fmt, width, height, data in rendered:
+        name = os.path.join(directory, 'derivatives', f'{stem}-{size}.{EXTENSIONS[fmt]}')
+        entry = sizes.setdefault(size, {'width': width, 'height': height})
+        entry[fmt] = image.storage.save(name, ContentFile(data))
+    return {'source': image.name, 'sizes': sizes}
+
+
+def build_derivatives(obj, process_pool=None):
+    """
+    Render and store the derivatives of one product's image.
+
+    Args:
+        obj: MobilePhone or Accessory with an ``image``
+        process_pool: Executor for the resizing; inline when None
+
+    Returns:
+        ``image_derivatives`` value
+    """
+    with obj.image.open('rb') as f:
+        data = f.read()
+    args = (data, DERIVATIVE_SIZES, DERIVATIVE_FORMATS)
+    if process_pool is None:
+        rendered = render_derivatives(*args)
+    else:
+        rendered = process_pool.submit(render_derivatives, *args).result()
+    return save_derivatives(obj.image, rendered)
+
+
+def store_derivatives(model, obj, derivatives):
+    """
+    Save derivatives unless the image changed meanwhile.
+
+    Superseded files stay in storage until ``manage.py prune_media``.
+
+    Returns:
+        True if the row was updated
+    """
+    return bool(model.objects.filter(pk=obj.pk, image=obj.image.name).update(
+        image_derivatives=derivatives, updated_at=timezone.now()
+    ))
+
+
+def process_image(model, pk, process_pool=None):
+    """Build the derivatives of one product, if it still has an image."""
+    obj = model.objects.filter(pk=pk).only('pk', 'image', 'image_derivatives').first()
+    if obj is None or not obj.image:
+        return False
+    return store_derivatives(model, obj, build_derivatives(obj, process_pool))
+
+
+def _run_in_pool(model, pk, process_pool):
+    try:
+        process_image(model, pk, process_pool)
+    except Exception:
+        logger.exception('Could not build image derivatives for %s %s', model._meta.label, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(model, pk):
+    """Build derivatives in a background job, or in this process's pools when jobs are off."""
+    if not settings.IMAGE_DERIVATIVES_IN_BACKGROUND:
+        threads, processes = _get_pools()
+        threads.submit(_run_in_pool, model, pk, processes)
+        return
+    from .tasks import build_image_derivatives
+
+    build_image_derivatives.delay(model._meta.label, pk)
+
+
+def image_saved(sender, instance, **kwargs):
+    """``post_save`` receiver scheduling derivatives for a new or changed image."""
+    name = instance.image.name if instance.image else ''
+    if name == (instance.image_derivatives or {}).get('source', ''):
+        return
+    if not name:
+        sender.objects.filter(pk=instance.pk).update(image_derivatives={})
+        return
+    transaction.on_commit(lambda: schedule_derivatives(sender, instance.pk))
+
+
+def connect_signals():
+    from accessories.models import Accessory
+    from phones.models import MobilePhone
+
+    for model in (MobilePhone, Accessory):
+        post_save.connect(image_saved, sender=model, dispatch_uid=f'image_derivatives_{model._meta.label}')
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """
+    ``srcset`` strings of a product's image derivatives, per format.
+
+    Represented as ``{"src": <card JPEG>, "webp": "<url> 160w, ...",
+    "jpeg": "..."}``, or None until the derivatives exist.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'image_derivatives')
+        super().__init__(**kwargs)
+
+    def to_representation(self, derivatives):
+        sizes = (derivatives or {}).get('sizes')
+        if not sizes:
+            return None
+        from django.core.files.storage import default_storage
+
+        request = self.context.get('request')
+
+        def url(name):
+            url = default_storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+
+        # Small sources give several sizes the same width; list each width once.
+        by_width = {size['width']: size for size in sizes.values()}
+        ordered = [by_width[width] for width in sorted(by_width)]
+        representation = {
+            fmt: ', '.join(f"{url(size[fmt])} {size['width']}w" for size in ordered if fmt in size)
+            for fmt in DERIVATIVE_FORMATS
+        }
+        fallback = sizes.get('card') or ordered[-1]
+        representation['src'] = url(fallback['jpeg'])
+        return representation
@@ -0,0 +1,329 @@
+"""
+Live stock and price updates over server-sent events.
+
+``GET /api/catalog/live/?phones=1,2&accessories=7`` (served under ASGI, see
+urls_asgi.py) first sends the current stock and price of each product, then
+an event whenever one of them changes::
+
+    event: product
+    data: {"product_type": "PHONE", "product_id": 1, "stock_quantity": 4,
+           "is_in_stock": true, "price": "999.00"}
+
+Every server process runs one ``Hub`` that all its streams subscribe to, so
+the number of connected clients does not add database load. The hub is fed
+from one of two sources:
+
+- PostgreSQL: triggers on the product tables (migration
+  mobile_store/0002) ``NOTIFY catalog_live`` when stock or price changes by
+  any path, bulk ``UPDATE``s included; notifications are delivered on
+  commit. One listener thread per process ``LISTEN``s on its own connection,
+  which cannot go through PgBouncer in transaction mode (set
+  ``LIVE_UPDATES_DB_HOST``/``LIVE_UPDATES_DB_PORT`` to the server itself).
+- Other databases (development, tests): ``product_changed``, called by the
+  product ``post_save`` signal, the inventory ledger and repricing, publishes
+  on commit to the hub of the same process only.
+
+A slow client does not hold up the others: its pending updates are
+coalesced to the latest per product. A heartbeat comment every
+``LIVE_UPDATES_HEARTBEAT`` seconds keeps proxies from closing idle streams,
+and nginx does not buffer them (``X-Accel-Buffering: no``). Streams end
+after ``LIVE_UPDATES_MAX_DURATION`` and the browser's EventSource
+reconnects; this bounds streams whose client disappeared unnoticed, and a
+reconnect starts with a fresh snapshot. Sharded products (see
+inventory/shards.py) report stock when their total is rebalanced.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from .metrics import LIVE_STREAMS, LIVE_UPDATES
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'catalog_live'
+PARAMS = {'phones': 'PHONE', 'accessories': 'ACCESSORY'}
+RECONNECT_MS = 3000  # EventSource retry delay
+LISTEN_RECONNECT_DELAY = 5  # seconds
+
+
+class Subscription:
+    """One stream's pending updates, keyed by product."""
+
+    def __init__(self, keys):
+        self.keys = frozenset(keys)
+        self.loop = asyncio.get_running_loop()
+        self.pending = {}
+        self.closed = False
+        self.ready = asyncio.Event()
+
+    def push(self, update):
+        # Runs on the stream's event loop.
+        self.pending[update['product_type'], update['product_id']] = update
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    async def next(self, timeout):
+        """
+        Wait up to ``timeout`` seconds for updates.
+
+        Returns:
+            List of updates (empty on timeout), or None once closed
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        if self.closed:
+            return None
+        self.ready.clear()
+        updates, self.pending = list(self.pending.values()), {}
+        return updates
+
+
+class Hub:
+    """Fans product updates out to the subscribed streams of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._listener = None
+
+    def subscribe(self, keys):
+        """Subscribe the calling stream to ``(product_type, product_id)`` keys."""
+        subscription = Subscription(keys)
+        with self._lock:
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+        LIVE_STREAMS.inc()
+        if connection.vendor == 'postgresql':
+            self._start_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for key in subscription.keys:
+                subscribers = self._subscribers.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[key]
+        LIVE_STREAMS.dec()
+
+    def watched(self, product_type):
+        """Ids of the products of ``product_type`` some stream is subscribed to."""
+        with self._lock:
+            return [product_id for kind, product_id in self._subscribers if kind == product_type]
+
+    def publish(self, update):
+        """Hand an update to its subscribers; safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get((update['product_type'], update['product_id']), ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, update)
+            except RuntimeError:
+                pass  # Its event loop has shut down.
+        LIVE_UPDATES.inc()
+
+    def close_all(self):
+        """End every stream; clients reconnect and start from a fresh snapshot."""
+        with self._lock:
+            subscribers = set().union(*self._subscribers.values()) if self._subscribers else set()
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.close)
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='live-updates-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+
+        database = settings.DATABASES['default']
+        params = {
+            'dbname': database['NAME'],
+            'user': database['USER'],
+            'password': database['PASSWORD'],
+            'host': settings.LIVE_UPDATES_DB_HOST or database['HOST'],
+            'port': settings.LIVE_UPDATES_DB_PORT or database['PORT'],
+        }
+        reconnecting = False
+        while True:
+            listen = None
+            try:
+                listen = psycopg2.connect(**params)
+                listen.autocommit = True
+                with listen.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                if reconnecting:
+                    # Updates were missed while disconnected.
+                    self.close_all()
+                while True:
+                    if select.select([listen], [], [], settings.LIVE_UPDATES_HEARTBEAT) == ([], [], []):
+                        continue
+                    listen.poll()
+                    while listen.notifies:
+                        self.publish(product_update(**json.loads(listen.notifies.pop(0).payload)))
+            except Exception:
+                logger.exception('Live updates listener lost its connection, reconnecting')
+                if listen is not None:
+                    listen.close()
+                reconnecting = True
+                time.sleep(LISTEN_RECONNECT_DELAY)
+
+
+hub = Hub()
+
+
+def product_update(product_type, product_id, stock_quantity, price):
+    """Event data for a product's current stock and price."""
+    return {
+        'product_type': product_type,
+        'product_id': product_id,
+        'stock_quantity': stock_quantity,
+        'is_in_stock': stock_quantity > 0,
+        'price': str(price),
+    }
+
+
+def _current(product_type, ids):
+    """Query of (pk, stock_quantity, price) rows, read from the primary."""
+    from inventory.stock import PRODUCT_MODELS
+
+    return PRODUCT_MODELS[product_type].objects.using('default').filter(pk__in=ids).values_list(
+        'pk', 'stock_quantity', 'price'
+    )
+
+
+def product_changed(product_type, ids):
+    """
+    Publish the current stock and price of changed products once committed.
+
+    Does nothing on PostgreSQL, where the triggers notify every process, or
+    when no stream of this process watches the products.
+
+    Args:
+        product_type: ``PHONE`` or ``ACCESSORY``
+        ids: Primary keys of the changed products
+    """
+    if connection.vendor == 'postgresql':
+        return
+    watched = set(hub.watched(product_type)).intersection(ids)
+    if not watched:
+        return
+
+    def publish():
+        for row in _current(product_type, watched):
+            hub.publish(product_update(product_type, *row))
+
+    transaction.on_commit(publish)
+
+
+def product_saved(sender, instance, **kwargs):
+    from inventory.stock import PRODUCT_MODELS
+
+    product_type = next(kind for kind, model in PRODUCT_MODELS.items() if model is sender)
+    product_changed(product_type, [instance.pk])
+
+
+def connect_signals():
+    from accessories.models import Accessory
+    from phones.models import MobilePhone
+
+    for model in (MobilePhone, Accessory):
+        post_save.connect(product_saved, sender=model, dispatch_uid=f'live_updates_{model._meta.label}')
+
+
+def parse_products(params):
+    """
+    Subscribed products from ``?phones=1,2&accessories=7``.
+
+    Returns:
+        List of (product_type, product_id)
+
+    Raises:
+        ValueError: For malformed ids, no products or too many
+    """
+    keys = []
+    for param, product_type in PARAMS.items():
+        for value in params.get(param, '').split(','):
+            if value.strip():
+                if not value.strip().isdigit():
+                    raise ValueError(f'{param} must be a comma-separated list of ids')
+                keys.append((product_type, int(value)))
+    if not keys:
+        raise ValueError('Pass product ids in phones and/or accessories')
+    if len(keys) > settings.LIVE_UPDATES_MAX_PRODUCTS:
+        raise ValueError(f'At most {settings.LIVE_UPDATES_MAX_PRODUCTS} products per stream')
+    return sorted(set(keys))
+
+
+def _event(update):
+    return f'event: product\ndata: {json.dumps(update)}\n\n'
+
+
+async def _stream(subscription, snapshot):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_UPDATES_MAX_DURATION
+    try:
+        yield f'retry: {RECONNECT_MS}\n\n'
+        for update in snapshot:
+            yield _event(update)
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            updates = await subscription.next(min(settings.LIVE_UPDATES_HEARTBEAT, remaining))
+            if updates is None:
+                return
+            if not updates and remaining > settings.LIVE_UPDATES_HEARTBEAT:
+                yield ': keepalive\n\n'
+            for update in updates:
+                yield _event(update)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def live_updates(request):
+    """Server-sent events stream of stock and price changes (see module docstring)."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        keys = parse_products(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    # Subscribe before reading the snapshot so no change falls in between.
+    subscription = hub.subscribe(keys)
+    try:
+        snapshot = []
+        for product_type in PARAMS.values():
+            ids = [product_id for kind, product_id in keys if kind == product_type]
+            if ids:
+                snapshot += [product_update(product_type, *row) async for row in _current(product_type, ids)]
+    except BaseException:
+        hub.unsubscribe(subscription)
+        raise
+
+    response = StreamingHttpResponse(_stream(subscription, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def live_updates_unavailable(request):
+    """Answer for the stream URL under WSGI, where it would pin a worker per client."""
+    return JsonResponse({"error": "Live updates are served by the ASGI server only"}, status=503)
@@ -0,0 +1,361 @@
+"""
+Synthetic data at benchmark scale for ``manage.py generate_load_data``.
+
+Rows are generated lazily with a seeded ``random.Random`` and streamed into
+the database with ``mobile_store.bulk`` (``COPY`` on PostgreSQL), using
+explicit primary keys so related rows never need a round trip to learn ids.
+The same seed and counts always produce the same data.
+
+Distributions:
+
+- Product popularity is Zipfian: a few phones and accessories appear in most
+  order and cart items.
+- Brands are Zipfian too, so a few brands own most of the catalog.
+- Orders are assigned to customers with a milder Zipf, giving a long tail of
+  customers with long order histories.
+- Orders are spread over ``days`` in id order; status follows order age and
+  every order that got past ``PENDING`` has a completed payment, sometimes
+  after a failed attempt.
+"""
+
+import math
+import random
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from accessories.models import Accessory
+from cart.models import Cart, CartItem
+from customers.models import Customer
+from orders.models import Order, OrderItem
+from payments.models import Payment
+from phones.models import Brand, MobilePhone
+from .bulk import insert_model_rows, next_pk, reset_sequences
+from .constants import MAX_PRICE
+
+DEFAULT_COUNTS = {
+    'brands': 50,
+    'phones': 20000,
+    'accessories': 10000,
+    'customers': 50000,
+    'orders': 200000,
+    'carts': 10000,
+}
+
+COUNTRIES = ['USA', 'South Korea', 'China', 'Japan', 'Taiwan', 'Finland', 'India', 'Germany']
+SERIES = ['Galaxy', 'Nova', 'Pixel', 'Edge', 'Note', 'Mate', 'Zen', 'Aqua', 'Neo', 'Pro']
+RAM = ['4GB', '6GB', '8GB', '12GB', '16GB']
+STORAGE = ['64GB', '128GB', '256GB', '512GB', '1TB']
+BATTERY = ['3500mAh', '4000mAh', '4500mAh', '5000mAh', '5500mAh']
+PROCESSORS = ['Snapdragon 8 Gen 3', 'Dimensity 9300', 'Tensor G3', 'A17 Pro', 'Exynos 2400']
+OS_WEIGHTS = [('Android', 80), ('iOS', 15), ('HarmonyOS', 4), ('Other', 1)]
+CATEGORIES = [choice for choice, _ in Accessory.CATEGORY_CHOICES]
+PAYMENT_METHODS = [choice for choice, _ in Payment.PAYMENT_METHOD_CHOICES]
+
+MODELS = [Brand, MobilePhone, Accessory, Customer, Cart, CartItem, Order, OrderItem, Payment]
+
+
+class ZipfSampler:
+    """
+    Draw indices 0..n-1 with probability proportional to 1 / rank**s.
+
+    Ranks are assigned to indices in a seeded random order, so popularity is
+    not simply correlated with primary key.
+    """
+
+    def __init__(self, n, s, rng):
+        self.population = list(range(n))
+        rng.shuffle(self.population)
+        self.cum_weights = []
+        total = 0.0
+        for rank in range(1, n + 1):
+            total += 1 / rank ** s
+            self.cum_weights.append(total)
+        self.rng = rng
+
+    def sample(self, k=1):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+
+def _money(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+class LoadDataGenerator:
+    """
+    Generate and load one dataset.
+
+    Args:
+        counts: Dict with the keys of ``DEFAULT_COUNTS``
+        seed: Random seed
+        days: Length of the order history in days
+        zipf_s: Zipf exponent for product popularity
+        password: Password of every generated customer
+        log: Callable receiving progress messages
+    """
+
+    def __init__(self, counts, seed=1, days=730, zipf_s=1.1, password='LoadData!2024', log=None):
+        self.counts = {**DEFAULT_COUNTS, **counts}
+        self.rng = random.Random(seed)
+        self.days = days
+        self.zipf_s = zipf_s
+        self.password = password
+        self.log = log or (lambda message: None)
+        self.now = timezone.now().replace(microsecond=0)
+        self.loaded = {}
+
+    def run(self):
+        """Generate every table in one transaction and return the row counts."""
+        with transaction.atomic():
+            self.brands()
+            self.phones()
+            self.accessories()
+            self.customers()
+            self.orders()
+            self.carts()
+            reset_sequences(MODELS)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for model in MODELS:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        return self.loaded
+
+    def _load(self, model, fields, rows):
+        count = insert_model_rows(model, fields, rows)
+        self.loaded[model._meta.label] = self.loaded.get(model._meta.label, 0) + count
+        self.log(f'{model._meta.label}: {self.loaded[model._meta.label]} rows')
+
+    def _past(self, max_days):
+        return self.now - timedelta(seconds=self.rng.randrange(max(1, int(max_days * 86400))))
+
+    def brands(self):
+        first = next_pk(Brand)
+        self.brand_ids = array('q', range(first, first + self.counts['brands']))
+
+        def rows():
+            for brand_id in self.brand_ids:
+                created = self._past(self.days + 365)
+                yield (
+                    brand_id, f'Brand {brand_id}', self.rng.choice(COUNTRIES), created, created,
+                )
+
+        self._load(Brand, ['brand_id', 'brand_name', 'country_of_origin', 'created_at', 'updated_at'], rows())
+
+    def phones(self):
+        first = next_pk(MobilePhone)
+        count = self.counts['phones']
+        brand_sampler = ZipfSampler(len(self.brand_ids), 1.0, self.rng)
+        os_names = [name for name, _ in OS_WEIGHTS]
+        os_weights = [weight for _, weight in OS_WEIGHTS]
+        self.phone_ids = array('q', range(first, first + count))
+        self.phone_prices = array('q')
+        self.phone_names = []
+
+        def rows():
+            for phone_id, brand_index in zip(self.phone_ids, brand_sampler.sample(count)):
+                brand_id = self.brand_ids[brand_index]
+                model_name = f'{self.rng.choice(SERIES)} {phone_id}'
+                # Log-normal prices: mostly mid-range, a tail of flagships.
+                cents = min(int(self.rng.lognormvariate(math.log(30000), 0.6) * 100), int(MAX_PRICE * 100))
+                self.phone_prices.append(cents)
+                self.phone_names.append(f'Brand {brand_id} {model_name}')
+                created = self._past(self.days)
+                yield (
+                    phone_id, brand_id, model_name, _money(cents), self.rng.randint(0, 500),
+                    self.rng.choice(RAM), self.rng.choice(STORAGE), self.rng.choice(BATTERY),
+                    self.rng.choice(PROCESSORS), self.rng.choices(os_names, os_weights)[0],
+                    f'Synthetic phone {phone_id}', None, None, created, created,
+                )
+
+        self._load(MobilePhone, [
+            'phone_id', 'brand', 'model_name', 'price', 'stock_quantity', 'ram', 'storage',
+            'battery_capacity', 'processor', 'os', 'description', 'image_url', 'image',
+            'created_at', 'updated_at',
+        ], rows())
+
+    def accessories(self):
+        first = next_pk(Accessory)
+        self.accessory_ids = array('q', range(first, first + self.counts['accessories']))
+        self.accessory_prices = array('q')
+        self.accessory_names = []
+
+        def rows():
+            for accessory_id in self.accessory_ids:
+                category = self.rng.choice(CATEGORIES)
+                name = f'{category} {accessory_id}'
+                cents = min(int(self.rng.lognormvariate(math.log(1500), 0.7) * 100), int(MAX_PRICE * 100))
+                self.accessory_prices.append(cents)
+                self.accessory_names.append(name)
+                created = self._past(self.days)
+                yield (
+                    accessory_id, name, category, _money(cents), self.rng.randint(0, 1000),
+                    f'Synthetic accessory {accessory_id}', None, None, created, created,
+                )
+
+        self._load(Accessory, [
+            'accessory_id', 'name', 'category', 'price', 'stock_quantity', 'description',
+            'image_url', 'image', 'created_at', 'updated_at',
+        ], rows())
+
+    def customers(self):
+        first = next_pk(Customer)
+        self.customer_ids = array('q', range(first, first + self.counts['customers']))
+        # Hashing is deliberately slow; every generated customer shares one hash.
+        hashed = make_password(self.password)
+
+        def rows():
+            for customer_id in self.customer_ids:
+                joined = self._past(self.days + 365)
+                yield (
+                    customer_id, hashed, None, False, f'Customer {customer_id}',
+                    f'customer{customer_id}@loaddata.example.com',
+                    f'555{customer_id:07d}'[-10:], f'{customer_id} Synthetic Street',
+                    True, False, joined, joined,
+                )
+
+        self._load(Customer, [
+            'customer_id', 'password', 'last_login', 'is_superuser', 'name', 'email', 'phone',
+            'address', 'is_active', 'is_staff', 'date_joined', 'updated_at',
+        ], rows())
+
+    def _products(self, k):
+        """Draw ``k`` (type, id, name, price cents) by Zipfian popularity; 70% phones."""
+        products = []
+        for _ in range(k):
+            if self.accessory_ids and (not self.phone_ids or self.rng.random() >= 0.7):
+                index = self.accessory_sampler.sample()[0]
+                products.append((
+                    'ACCESSORY', self.accessory_ids[index],
+                    self.accessory_names[index], self.accessory_prices[index],
+                ))
+            else:
+                index = self.phone_sampler.sample()[0]
+                products.append((
+                    'PHONE', self.phone_ids[index], self.phone_names[index], self.phone_prices[index],
+                ))
+        return products
+
+    def _status(self, age_days):
+        if age_days < 1:
+            return self.rng.choices(['PENDING', 'CONFIRMED'], [40, 60])[0]
+        if age_days < 7:
+            return self.rng.choices(['CONFIRMED', 'PROCESSING', 'SHIPPED', 'CANCELLED'], [20, 30, 45, 5])[0]
+        return self.rng.choices(['DELIVERED', 'CANCELLED'], [95, 5])[0]
+
+    def orders(self):
+        count = self.counts['orders']
+        if not count or not self.customer_ids or not (self.phone_ids or self.accessory_ids):
+            return
+        self.phone_sampler = ZipfSampler(len(self.phone_ids), self.zipf_s, self.rng)
+        self.accessory_sampler = ZipfSampler(len(self.accessory_ids), self.zipf_s, self.rng)
+        customer_sampler = ZipfSampler(len(self.customer_ids), 0.8, self.rng)
+
+        first_order = next_pk(Order)
+        first_item = next_pk(OrderItem)
+        first_payment = next_pk(Payment)
+        span = self.days * 86400
+        start = self.now - timedelta(days=self.days)
+        items, payments = [], []
+
+        def order_rows():
+            item_id, payment_id = first_item, first_payment
+            for n, customer_index in enumerate(customer_sampler.sample(count)):
+                order_id = first_order + n
+                # Ids follow time, as they would in production.
+                placed = start + timedelta(seconds=int(span * n / count) + self.rng.randrange(60))
+                status = self._status((self.now - placed).days)
+                # Mostly 1-2 items, occasionally large baskets.
+                lines = min(1 + int(self.rng.expovariate(1.2)), 10)
+                total = 0
+                for product_type, product_id, name, cents in self._products(lines):
+                    quantity = 1 if self.rng.random() < 0.85 else self.rng.randint(2, 4)
+                    total += cents * quantity
+                    items.append((
+                        item_id, order_id, product_type, product_id, name[:200], quantity,
+                        _money(cents), placed,
+                    ))
+                    item_id += 1
+
+                if status not in ('PENDING', 'CANCELLED'):
+                    method = self.rng.choice(PAYMENT_METHODS)
+                    if self.rng.random() < 0.05:
+                        payments.append((
+                            payment_id, order_id, _money(total), method, placed, 'FAILED',
+                            f'TXN{payment_id}', None, placed,
+                        ))
+                        payment_id += 1
+                    payments.append((
+                        payment_id, order_id, _money(total), method, placed, 'COMPLETED',
+                        f'TXN{payment_id}', None, placed,
+                    ))
+                    payment_id += 1
+
+                yield (
+                    order_id, self.customer_ids[customer_index], placed, status, _money(total),
+                    f'{self.customer_ids[customer_index]} Synthetic Street', None, placed,
+                )
+
+        order_fields = [
+            'order_id', 'customer', 'order_date', 'status', 'total_amount',
+            'shipping_address', 'notes', 'updated_at',
+        ]
+        item_fields = [
+            'order_item_id', 'order', 'product_type', 'product_id', 'product_name', 'quantity',
+            'price_at_purchase', 'created_at',
+        ]
+        payment_fields = [
+            'payment_id', 'order', 'amount', 'payment_method', 'payment_date', 'status',
+            'transaction_id', 'notes', 'updated_at',
+        ]
+
+        # Orders are loaded in chunks; their items and payments follow each chunk.
+        generator = order_rows()
+        chunk = 20000
+        while True:
+            orders = [row for _, row in zip(range(chunk), generator)]
+            if not orders:
+                break
+            self._load(Order, order_fields, orders)
+            self._load(OrderItem, item_fields, items)
+            self._load(Payment, payment_fields, payments)
+            items.clear()
+            payments.clear()
+
+    def carts(self):
+        count = min(self.counts['carts'], len(self.customer_ids))
+        if not count or not (self.phone_ids or self.accessory_ids):
+            return
+        if not hasattr(self, 'phone_sampler'):
+            self.phone_sampler = ZipfSampler(len(self.phone_ids), self.zipf_s, self.rng)
+            self.accessory_sampler = ZipfSampler(len(self.accessory_ids), self.zipf_s, self.rng)
+
+        first_cart = next_pk(Cart)
+        first_item = next_pk(CartItem)
+        owners = self.rng.sample(range(len(self.customer_ids)), count)
+        items = []
+
+        def cart_rows():
+            item_id = first_item
+            for n, owner in enumerate(owners):
+                cart_id = first_cart + n
+                updated = self._past(30)
+                seen = set()
+                for product_type, product_id, _, _ in self._products(self.rng.randint(1, 5)):
+                    if (product_type, product_id) in seen:
+                        continue
+                    seen.add((product_type, product_id))
+                    items.append((
+                        item_id, cart_id, product_type, product_id, self.rng.randint(1, 2),
+                        updated, updated,
+                    ))
+                    item_id += 1
+                yield cart_id, self.customer_ids[owner], updated, updated
+
+        self._load(Cart, ['cart_id', 'customer', 'created_at', 'updated_at'], cart_rows())
+        self._load(CartItem, [
+            'cart_item_id', 'cart', 'product_type', 'product_id', 'quantity',
+            'created_at', 'updated_at',
+        ], items)
@@ -0,0 +1,293 @@
+"""
+Scenarios for the end-to-end load test (``manage.py loadtest``).
+
+Each virtual user repeatedly picks a scenario by weight and runs it over its
+own keep-alive connection:
+
+- ``browse``: anonymous catalog browsing (phone pages, details, brands, accessories)
+- ``search``: anonymous search, filtering and ordering
+- ``checkout``: the buyer funnel; login once, view a phone, ``add_item``,
+  ``create_from_cart`` and ``create_payment``
+
+Every request is recorded under a step name (``phone_list``, ``add_item``,
+...) so reports from different runs can be compared step by step.
+"""
+
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from accessories.models import Accessory
+from customers.models import Customer
+from phones.models import Brand, MobilePhone
+from .benchmarks import CLIENT_ERRORS, new_results, summarize_results
+
+CUSTOMER_EMAIL = 'loadtest-{}@example.com'
+
+PAYMENT_METHODS = ('CREDIT_CARD', 'DEBIT_CARD', 'UPI', 'WALLET')
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """Register a coroutine ``(session, catalog, rng)`` as a named scenario."""
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+@dataclass
+class Catalog:
+    """Ids and search terms the scenarios pick from, loaded before the run."""
+    phone_ids: list
+    brand_ids: list
+    accessory_ids: list
+    search_terms: list
+    pages: int = 1
+    in_stock_phone_ids: list = field(default_factory=list)
+
+    @classmethod
+    def load(cls, limit=500):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        phones = MobilePhone.objects.order_by('pk')
+        terms = set(Brand.objects.values_list('brand_name', flat=True)[:20])
+        terms.update(
+            name.split()[0] for name in phones.values_list('model_name', flat=True)[:20] if name.strip()
+        )
+        return cls(
+            phone_ids=list(phones.values_list('pk', flat=True)[:limit]),
+            brand_ids=list(Brand.objects.values_list('pk', flat=True)[:limit]),
+            accessory_ids=list(Accessory.objects.values_list('pk', flat=True)[:limit]),
+            search_terms=sorted(terms),
+            pages=max(1, min(5, -(-phones.count() // page_size))),
+            in_stock_phone_ids=list(
+                phones.filter(stock_quantity__gt=0)
+                .values_list('pk', flat=True)[:limit]
+            ),
+        )
+
+
+def prepare_customers(count, password):
+    """
+    Make sure ``count`` load-test customers exist with the given password.
+
+    Args:
+        count: Number of customers
+        password: Password set on customers that are created
+
+    Returns:
+        List of their emails
+    """
+    emails = [CUSTOMER_EMAIL.format(i) for i in range(count)]
+    existing = set(Customer.objects.filter(email__in=emails).values_list('email', flat=True))
+    # Hashing is deliberately slow, so hash once for every new customer.
+    hashed = make_password(password)
+    Customer.objects.bulk_create([
+        Customer(email=email, name=f'Load Test {i}', phone='0000000000', password=hashed)
+        for i, email in enumerate(emails) if email not in existing
+    ])
+    return emails
+
+
+class Session:
+    """One virtual user: a connection, an optional JWT and the shared results."""
+
+    def __init__(self, client, results, email=None, password=None):
+        self.client = client
+        self.results = results
+        self.email = email
+        self.password = password
+        self.token = None
+
+    async def request(self, name, method, path, data=None):
+        """
+        Send a request and record it under ``name``.
+
+        Returns:
+            Tuple of (status, decoded JSON body); (None, None) if the request failed
+        """
+        headers = {}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        start = time.perf_counter()
+        try:
+            status, _, response_body = await self.client.request(method, path, body, headers)
+        except CLIENT_ERRORS:
+            self.results[name]['errors'] += 1
+            return None, None
+        self.results[name]['latencies'].append(time.perf_counter() - start)
+        self.results[name]['statuses'][status] += 1
+
+        try:
+            return status, json.loads(response_body) if response_body else None
+        except ValueError:
+            return status, None
+
+    async def login(self):
+        status, payload = await self.request(
+            'login', 'POST', '/api/customers/login/',
+            {'email': self.email, 'password': self.password},
+        )
+        if status == 200:
+            self.token = payload['access']
+        return self.token is not None
+
+
+@scenario('browse')
+async def browse(session, catalog, rng):
+    await session.request('phone_list', 'GET', f'/api/phones/?page={rng.randint(1, catalog.pages)}')
+    if catalog.phone_ids:
+        await session.request('phone_detail', 'GET', f'/api/phones/{rng.choice(catalog.phone_ids)}/')
+    if rng.random() < 0.3:
+        await session.request('brand_list', 'GET', '/api/phones/brands/')
+    if rng.random() < 0.3:
+        await session.request('accessory_list', 'GET', '/api/accessories/')
+        if catalog.accessory_ids:
+            await session.request(
+                'accessory_detail', 'GET', f'/api/accessories/{rng.choice(catalog.accessory_ids)}/'
+            )
+
+
+@scenario('search')
+async def search(session, catalog, rng):
+    if catalog.search_terms:
+        await session.request(
+            'phone_search', 'GET', f'/api/phones/?search={rng.choice(catalog.search_terms)}'
+        )
+    if catalog.brand_ids:
+        ordering = rng.choice(('price', '-price', '-created_at'))
+        await session.request(
+            'phone_filter', 'GET',
+            f'/api/phones/?brand={rng.choice(catalog.brand_ids)}&ordering={ordering}',
+        )
+    if rng.random() < 0.3 and catalog.search_terms:
+        await session.request(
+            'accessory_search', 'GET', f'/api/accessories/?search={rng.choice(catalog.search_terms)}'
+        )
+
+
+@scenario('checkout')
+async def checkout(session, catalog, rng):
+    if not catalog.in_stock_phone_ids:
+        return
+    if session.token is None and not await session.login():
+        return
+
+    phone_id = rng.choice(catalog.in_stock_phone_ids)
+    await session.request('phone_detail', 'GET', f'/api/phones/{phone_id}/')
+    status, _ = await session.request(
+        'add_item', 'POST', '/api/cart/add_item/',
+        {'product_type': 'PHONE', 'product_id': phone_id, 'quantity': 1},
+    )
+    if status != 201:
+        return
+
+    status, order = await session.request(
+        'create_from_cart', 'POST', '/api/orders/create_from_cart/',
+        {'shipping_address': '1 Load Test Street'},
+    )
+    if status != 201:
+        return
+
+    await session.request(
+        'create_payment', 'POST', '/api/payments/create_payment/',
+        {'order_id': order['order_id'], 'payment_method': rng.choice(PAYMENT_METHODS)},
+    )
+
+
+async def run_scenarios(client_factory, catalog, mix, concurrency, duration,
+                        customers=(), password=None, seed=1):
+    """
+    Run virtual users through weighted scenarios for ``duration`` seconds.
+
+    Args:
+        client_factory: Callable returning a new ``HTTPClient``
+        catalog: ``Catalog`` to pick products from
+        mix: Dict of scenario name to weight
+        concurrency: Number of virtual users
+        duration: Seconds to run
+        customers: Emails the virtual users log in as (round robin)
+        password: Password of those customers
+        seed: Base random seed; user ``i`` uses ``seed + i``
+
+    Returns:
+        Tuple of (``new_results()`` style results, scenario iteration counts)
+    """
+    results = new_results()
+    iterations = dict.fromkeys(mix, 0)
+    names, weights = list(mix), list(mix.values())
+    deadline = time.monotonic() + duration
+
+    async def virtual_user(index):
+        rng = random.Random(seed + index)
+        email = customers[index % len(customers)] if customers else None
+        session = Session(client_factory(), results, email, password)
+        try:
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                await SCENARIOS[name](session, catalog, rng)
+                iterations[name] += 1
+        finally:
+            await session.client.close()
+
+    await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+    return results, iterations
+
+
+def build_report(results, iterations, duration, config):
+    """
+    Build the JSON report of a run.
+
+    Args:
+        results: Results from ``run_scenarios``
+        iterations: Scenario iteration counts
+        duration: Seconds the load ran
+        config: Run options worth keeping alongside the numbers
+
+    Returns:
+        JSON-serializable dict
+    """
+    return {
+        'config': config,
+        'duration': duration,
+        'scenarios': iterations,
+        **summarize_results(results, duration),
+    }
+
+
+def compare_reports(baseline, current):
+    """
+    Compare two reports step by step.
+
+    Args:
+        baseline: Report dict of the earlier run
+        current: Report dict of this run
+
+    Returns:
+        Dict of step name ('total' for all requests) to metric deltas, where
+        each delta is {'baseline', 'current', 'change_pct'}
+    """
+    steps = {'total': (baseline['total'], current['total'])}
+    for name in sorted(set(baseline['requests']) & set(current['requests'])):
+        steps[name] = (baseline['requests'][name], current['requests'][name])
+
+    comparison = {}
+    for name, (before, after) in steps.items():
+        comparison[name] = {}
+        for metric in ('throughput_rps', 'p50_ms', 'p99_ms', 'error_rate'):
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            change = round((new - old) / old * 100, 1) if old else None
+            comparison[name][metric] = {'baseline': old, 'current': new, 'change_pct': change}
+    return comparison
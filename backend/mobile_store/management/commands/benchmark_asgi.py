@@ -0,0 +1,146 @@
+"""
+Compare concurrent catalog browsing under sync gunicorn and ASGI servers.
+
+Each server is started locally against the configured database, driven by
+``--concurrency`` keep-alive clients for ``--duration`` seconds, and stopped.
+
+Usage: python manage.py benchmark_asgi --concurrency 100 --output asgi.json
+"""
+
+import asyncio
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from accessories.models import Accessory
+from mobile_store.benchmarks import (
+    SERVER_COMMANDS, HTTPClient, run_load, run_server, summarize_results,
+)
+from phones.models import Brand, MobilePhone
+
+
+class Command(BaseCommand):
+    help = 'Benchmark throughput and tail latency of catalog browsing: sync gunicorn vs ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers',
+            default='sync,gunicorn-uvicorn,uvicorn',
+            help=f'Comma separated servers to compare ({", ".join(SERVER_COMMANDS)})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.WEB_CONCURRENCY,
+            help='Worker processes per server'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help='Concurrent clients'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=20,
+            help='Measured seconds per server'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=float,
+            default=3,
+            help='Unmeasured seconds per server'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Local port to bind the servers on'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed for the request mix'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this file'
+        )
+
+    def handle(self, *args, **options):
+        servers = [name.strip() for name in options['servers'].split(',') if name.strip()]
+        unknown = set(servers) - set(SERVER_COMMANDS)
+        if unknown:
+            raise CommandError(f'Unknown servers: {", ".join(sorted(unknown))}')
+
+        phone_ids = list(MobilePhone.objects.values_list('pk', flat=True)[:500])
+        if not phone_ids:
+            raise CommandError('No phones in the database to browse')
+        brand_ids = list(Brand.objects.values_list('pk', flat=True)[:100])
+        accessory_ids = list(Accessory.objects.values_list('pk', flat=True)[:500])
+        brand_names = list(Brand.objects.values_list('brand_name', flat=True)[:20])
+        pages = min(3, -(-MobilePhone.objects.count() // settings.REST_FRAMEWORK['PAGE_SIZE']))
+
+        rng = random.Random(options['seed'])
+        mix = [
+            (30, 'phone_list', lambda: f'/api/phones/?page={rng.randint(1, pages)}'),
+            (30, 'phone_detail', lambda: f'/api/phones/{rng.choice(phone_ids)}/'),
+            (10, 'phone_search', lambda: f'/api/phones/?search={rng.choice(brand_names)}'),
+            (10, 'brand_list', lambda: '/api/phones/brands/'),
+            (5, 'brand_detail', lambda: f'/api/phones/brands/{rng.choice(brand_ids)}/'),
+            (10, 'accessory_list', lambda: '/api/accessories/'),
+        ]
+        if accessory_ids:
+            mix.append(
+                (5, 'accessory_detail', lambda: f'/api/accessories/{rng.choice(accessory_ids)}/')
+            )
+        weights = [weight for weight, _, _ in mix]
+
+        def next_request():
+            _, name, path = rng.choices(mix, weights)[0]
+            return name, 'GET', path(), None, None
+
+        headers = {'Host': settings.ALLOWED_HOSTS[0], 'Accept': 'application/json'}
+        if settings.SECURE_SSL_REDIRECT:
+            # Production settings trust this header from the reverse proxy.
+            headers['X-Forwarded-Proto'] = 'https'
+
+        def client_factory():
+            return HTTPClient('127.0.0.1', options['port'], headers)
+
+        results = {}
+        for server in servers:
+            self.stdout.write(f'Starting {server} with {options["workers"]} workers...')
+            try:
+                with run_server(server, options['port'], options['workers']):
+                    if options['warmup']:
+                        asyncio.run(run_load(
+                            client_factory, next_request, options['concurrency'], options['warmup']
+                        ))
+                    raw = asyncio.run(run_load(
+                        client_factory, next_request, options['concurrency'], options['duration']
+                    ))
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            results[server] = summarize_results(raw, options['duration'])
+            self.report(server, results[server]['total'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'workers': options['workers'],
+                    'concurrency': options['concurrency'],
+                    'duration': options['duration'],
+                    'results': results,
+                }, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def report(self, server, total):
+        self.stdout.write(
+            f"{server:<17} {total['throughput_rps']} req/s n={total['count']} "
+            f"errors={total['error_rate']:.2%} p50={total.get('p50_ms')}ms "
+            f"p99={total.get('p99_ms')}ms max={total.get('max_ms')}ms"
+        )
@@ -0,0 +1,105 @@
+"""
+Compare request latency with and without persistent database connections.
+
+Usage: python manage.py benchmark_db_pool --requests 1000 --output pool.json
+"""
+
+import json
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test import Client
+from mobile_store.benchmarks import summarize_latencies
+from mobile_store.db import configure_pooling
+
+
+class Command(BaseCommand):
+    help = 'Benchmark p50/p99 latency of an endpoint with DB_POOL_MODE off vs persistent'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Measured requests per mode'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=20,
+            help='Unmeasured requests per mode'
+        )
+        parser.add_argument(
+            '--path',
+            default='/api/phones/',
+            help='Endpoint to request'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this file'
+        )
+
+    def handle(self, *args, **options):
+        database = connections['default'].settings_dict
+        original = {key: database.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        results = {}
+
+        # Throttling would turn a benchmark run into a stream of 429s.
+        with mock.patch('rest_framework.views.APIView.get_throttles', return_value=[]):
+            try:
+                for mode in ('off', 'persistent'):
+                    connections['default'].close()
+                    configure_pooling(database, mode, settings.DB_CONN_MAX_AGE)
+                    results[mode] = self.run_mode(options)
+                    self.report(mode, results[mode])
+            finally:
+                connections['default'].close()
+                database.update(original)
+
+        off, persistent = results['off'], results['persistent']
+        if off['count'] and persistent['count']:
+            self.stdout.write(self.style.SUCCESS(
+                f"p50 {off['p50_ms']}ms -> {persistent['p50_ms']}ms, "
+                f"p99 {off['p99_ms']}ms -> {persistent['p99_ms']}ms"
+            ))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'path': options['path'], 'results': results}, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def run_mode(self, options):
+        """Issue the requests for one pooling mode and summarize them."""
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        secure = not settings.DEBUG
+        latencies = []
+        errors = 0
+
+        for i in range(options['warmup'] + options['requests']):
+            start = time.perf_counter()
+            # The test client skips the request_started/request_finished
+            # connection handling that the WSGI handler performs.
+            close_old_connections()
+            response = client.get(options['path'], secure=secure)
+            close_old_connections()
+            elapsed = time.perf_counter() - start
+
+            if i < options['warmup']:
+                continue
+            if response.status_code != 200:
+                errors += 1
+            latencies.append(elapsed)
+
+        summary = summarize_latencies(latencies)
+        summary['errors'] = errors
+        return summary
+
+    def report(self, mode, summary):
+        self.stdout.write(
+            f"{mode:<11} n={summary['count']} errors={summary['errors']} "
+            f"p50={summary.get('p50_ms')}ms p99={summary.get('p99_ms')}ms "
+            f"mean={summary.get('mean_ms')}ms"
+        )
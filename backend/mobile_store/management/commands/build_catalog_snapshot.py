@@ -0,0 +1,58 @@
+"""
+Render the public catalog into versioned, pre-compressed JSON files.
+
+Runs once by default; with --interval it keeps checking the catalog and
+rebuilds when it changed, at most once per interval. nginx serves the
+result (see mobile_store/snapshot.py and nginx.conf).
+
+Usage:
+    python manage.py build_catalog_snapshot
+    python manage.py build_catalog_snapshot --interval 60
+    python manage.py build_catalog_snapshot --force
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from mobile_store.snapshot import build_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Build the static catalog snapshot when the catalog changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep running, checking for changes every N seconds'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild even if the catalog did not change'
+        )
+
+    def handle(self, *args, **options):
+        force = options['force']
+        while True:
+            try:
+                manifest = build_snapshot(force=force)
+            except Exception:
+                logger.exception('Could not build the catalog snapshot')
+                if not options['interval']:
+                    raise
+            else:
+                if manifest:
+                    self.stdout.write(f"Built catalog snapshot {manifest['version']}")
+                elif not options['interval']:
+                    self.stdout.write('Catalog unchanged')
+            force = False
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,89 @@
+"""
+Export phones, accessories, orders (with items) or payments as CSV or JSONL.
+
+Rows are streamed from the database in chunks, so memory use does not grow
+with the size of the table.
+
+Usage:
+    python manage.py export_data orders orders.csv
+    python manage.py export_data phones - --format jsonl | gzip > phones.jsonl.gz
+"""
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from accessories.exporters import ACCESSORY_EXPORT
+from mobile_store.catalog_import import detect_format
+from mobile_store.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines
+from orders.exporters import ORDER_EXPORT
+from payments.exporters import PAYMENT_EXPORT
+from phones.exporters import PHONE_EXPORT
+
+SPECS = {
+    'phones': PHONE_EXPORT,
+    'accessories': ACCESSORY_EXPORT,
+    'orders': ORDER_EXPORT,
+    'payments': PAYMENT_EXPORT,
+}
+
+
+class Command(BaseCommand):
+    help = 'Stream a full table export to a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=list(SPECS),
+            help='What to export'
+        )
+        parser.add_argument(
+            'path',
+            help='Output file, or - for stdout'
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            help='Output format (default: from the extension, else csv)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Rows fetched from the database per round trip'
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to read from (e.g. a replica)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (detect_format(path) if path != '-' else None) or 'csv'
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        lines = export_lines(
+            SPECS[options['kind']], fmt,
+            chunk_size=options['chunk_size'], using=options['database'],
+        )
+        start = time.perf_counter()
+        count = 0
+        try:
+            out = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(str(e))
+        try:
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if path != '-':
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {count} lines to {path} in {elapsed:.1f}s'
+            ))
@@ -0,0 +1,91 @@
+"""
+Backfill resized derivatives for existing product images.
+
+Image files are read and written by a few I/O threads while the resizing
+runs in a pool of worker processes, one per core by default. Database reads
+and writes stay on the main thread.
+
+Usage:
+    python manage.py generate_image_derivatives
+    python manage.py generate_image_derivatives phones --workers 8 --force
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from accessories.models import Accessory
+from mobile_store.images import build_derivatives, store_derivatives
+from phones.models import MobilePhone
+
+MODELS = {
+    'phones': MobilePhone,
+    'accessories': Accessory,
+}
+
+
+class Command(BaseCommand):
+    help = 'Generate missing WebP/JPEG derivatives for product images in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds',
+            nargs='*',
+            choices=list(MODELS),
+            help='Products to process (default: all)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Resizing processes (default: one per core)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild derivatives that already exist'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be positive')
+
+        jobs = []
+        for kind in options['kinds'] or list(MODELS):
+            model = MODELS[kind]
+            products = model.objects.exclude(image='').exclude(image__isnull=True).only(
+                'pk', 'image', 'image_derivatives'
+            )
+            for obj in products.iterator():
+                if options['force'] or (obj.image_derivatives or {}).get('source') != obj.image.name:
+                    jobs.append((model, obj))
+        if not jobs:
+            self.stdout.write('All product images already have derivatives')
+            return
+
+        self.stdout.write(f"Processing {len(jobs)} images with {options['workers']} workers")
+        start = time.perf_counter()
+        done = failed = 0
+        processes = ProcessPoolExecutor(
+            max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn')
+        )
+        # Enough I/O threads to keep every process busy.
+        threads = ThreadPoolExecutor(max_workers=options['workers'] * 2)
+        with processes, threads:
+            futures = {threads.submit(build_derivatives, obj, processes): (model, obj) for model, obj in jobs}
+            for future in as_completed(futures):
+                model, obj = futures[future]
+                try:
+                    store_derivatives(model, obj, future.result())
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{model._meta.label} {obj.pk}: {e}')
+
+        elapsed = time.perf_counter() - start
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(
+            f'Built derivatives for {done} images in {elapsed:.1f}s ({failed} failed)'
+        ))
@@ -3,8 +3,13 @@ Custom management command to check system health.
 """
 
 from django.core.management.base import BaseCommand
-from django.db import connection
-from django.core.cache import cache
+from mobile_store.health import (
+    _timed,
+    check_cache,
+    check_connection_capacity,
+    check_database,
+    check_migrations,
+)
 import sys
 
 
@@ -22,6 +27,10 @@ class Command(BaseCommand):
         
         # Check cache
         all_checks_passed &= self.check_cache()
+
+        # Check migrations and connection headroom
+        all_checks_passed &= self.check_migrations()
+        all_checks_passed &= self.check_connections()
         
         # Check media directory
         all_checks_passed &= self.check_media()
@@ -40,29 +49,56 @@ class Command(BaseCommand):
     
     def check_database(self):
         """Check database connection."""
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute('SELECT 1')
-            self.stdout.write(self.style.SUCCESS('✓ Database: Connected'))
+        result = _timed(check_database)
+        if result['status'] == 'ok':
+            self.stdout.write(self.style.SUCCESS(f'✓ Database: Connected ({result["latency_ms"]}ms)'))
             return True
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'✗ Database: Failed - {str(e)}'))
-            return False
+        self.stdout.write(self.style.ERROR(f'✗ Database: Failed - {result["error"]}'))
+        return False
     
     def check_cache(self):
         """Check cache system."""
-        try:
-            cache.set('health_check', 'ok', 10)
-            value = cache.get('health_check')
-            if value == 'ok':
-                self.stdout.write(self.style.SUCCESS('✓ Cache: Working'))
-                return True
-            else:
-                self.stdout.write(self.style.WARNING('⚠ Cache: Not working properly'))
-                return False
-        except Exception as e:
-            self.stdout.write(self.style.WARNING(f'⚠ Cache: Failed - {str(e)}'))
-            return False
+        result = _timed(check_cache)
+        if result['status'] == 'ok':
+            self.stdout.write(self.style.SUCCESS(f'✓ Cache: Working ({result["latency_ms"]}ms)'))
+            return True
+        if result['status'] == 'disabled':
+            self.stdout.write(self.style.WARNING('⚠ Cache: Disabled (DummyCache)'))
+            return True
+        self.stdout.write(self.style.WARNING(f'⚠ Cache: Failed - {result["error"]}'))
+        return False
+
+    def check_migrations(self):
+        """Check that all migrations are applied."""
+        result = _timed(check_migrations)
+        if result['status'] == 'ok':
+            self.stdout.write(self.style.SUCCESS('✓ Migrations: Applied'))
+            return True
+        if result['status'] == 'pending':
+            self.stdout.write(self.style.ERROR(
+                f'✗ Migrations: Pending - {", ".join(result["pending"])}'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(f'✗ Migrations: Failed - {result["error"]}'))
+        return False
+
+    def check_connections(self):
+        """Check database connection headroom."""
+        result = _timed(check_connection_capacity)
+        if result['status'] == 'n/a':
+            return True
+        if result['status'] == 'ok':
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Connections: {result["in_use"]}/{result["max_connections"]} in use'
+            ))
+            return True
+        if result['status'] == 'exhausted':
+            self.stdout.write(self.style.ERROR(
+                f'✗ Connections: {result["in_use"]}/{result["max_connections"]} in use'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(f'✗ Connections: Failed - {result["error"]}'))
+        return False
     
     def check_media(self):
         """Check media directory."""
@@ -0,0 +1,89 @@
+"""
+Import phones or accessories from a supplier CSV or JSONL file.
+
+Rows are validated in chunks, staged with COPY and merged with a single
+INSERT ... ON CONFLICT DO UPDATE; invalid rows are reported by line.
+
+Usage:
+    python manage.py import_catalog phones supplier.csv
+    python manage.py import_catalog accessories feed.jsonl --dry-run --errors errors.json
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from accessories.importers import ACCESSORY_IMPORT
+from mobile_store.catalog_import import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, detect_format, import_catalog
+from phones.importers import PHONE_IMPORT
+
+SPECS = {
+    'phones': PHONE_IMPORT,
+    'accessories': ACCESSORY_IMPORT,
+}
+
+
+class Command(BaseCommand):
+    help = 'Create or update catalog products from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=list(SPECS),
+            help='What the file contains'
+        )
+        parser.add_argument(
+            'path',
+            help='CSV or JSONL file'
+        )
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help='File format (default: from the extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Rows validated and copied per chunk'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and stage the file without saving anything'
+        )
+        parser.add_argument(
+            '--errors',
+            help='Write the per-row errors as JSON to this file'
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        if fmt is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format')
+
+        try:
+            with open(options['path'], 'rb') as f:
+                result = import_catalog(
+                    SPECS[options['kind']], f, fmt,
+                    chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in result.errors[:20]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if result.error_count > 20:
+            self.stderr.write(f'... {result.error_count - 20} more errors')
+
+        if options['errors']:
+            with open(options['errors'], 'w') as f:
+                json.dump(result.as_dict(), f, indent=2)
+
+        summary = (
+            f'{result.rows} rows: {result.created} created, {result.updated} updated, '
+            f'{result.error_count} rejected'
+        )
+        if options['dry_run']:
+            summary += ' (dry run, nothing saved)'
+        style = self.style.SUCCESS if not result.error_count else self.style.WARNING
+        self.stdout.write(style(summary))
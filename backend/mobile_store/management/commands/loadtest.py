@@ -0,0 +1,210 @@
+"""
+End-to-end load test of the browse -> cart -> checkout -> pay funnel.
+
+Starts a local server (or targets a running one with --target), runs virtual
+users through the scenarios in mobile_store/loadtest.py and writes
+throughput, latency percentiles and error rates per step to a JSON report.
+
+Usage:
+    python manage.py loadtest --mix browse=60,search=25,checkout=15 --output run.json
+    python manage.py loadtest --compare run.json --output run2.json
+"""
+
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from mobile_store.benchmarks import SERVER_COMMANDS, HTTPClient, run_server
+from mobile_store.loadtest import (
+    SCENARIOS, Catalog, build_report, compare_reports, prepare_customers, run_scenarios,
+)
+from phones.models import MobilePhone
+
+
+class Command(BaseCommand):
+    help = 'Run the browse/search/checkout load test and report throughput, latency and errors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mix',
+            default='browse=60,search=25,checkout=15',
+            help=f'Scenario weights, e.g. browse=60,checkout=40 ({", ".join(SCENARIOS)})'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=20,
+            help='Concurrent virtual users'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30,
+            help='Measured seconds'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=float,
+            default=5,
+            help='Unmeasured seconds before the measured run'
+        )
+        parser.add_argument(
+            '--server',
+            default='sync',
+            choices=list(SERVER_COMMANDS),
+            help='Server to start locally'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.WEB_CONCURRENCY,
+            help='Worker processes for the local server'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Local port to bind the server on'
+        )
+        parser.add_argument(
+            '--target',
+            help='host:port of an already running server; no server is started'
+        )
+        parser.add_argument(
+            '--customers',
+            type=int,
+            help='Load-test customers to log in as (default: one per virtual user)'
+        )
+        parser.add_argument(
+            '--password',
+            default='LoadTest!2024',
+            help='Password of the load-test customers'
+        )
+        parser.add_argument(
+            '--restock',
+            type=int,
+            help='Set every phone\'s stock to this before the run so checkouts do not run dry'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed for the virtual users'
+        )
+        parser.add_argument(
+            '--output',
+            default='loadtest.json',
+            help='JSON report file'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Earlier JSON report to compare this run against'
+        )
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options['mix'])
+
+        if options['restock'] is not None:
+            updated = MobilePhone.objects.update(stock_quantity=options['restock'], updated_at=timezone.now())
+            self.stdout.write(f'Restocked {updated} phones to {options["restock"]}')
+
+        catalog = Catalog.load()
+        if not catalog.phone_ids:
+            raise CommandError('No phones in the database to browse')
+        customers = []
+        if mix.get('checkout'):
+            customers = prepare_customers(
+                options['customers'] or options['concurrency'], options['password']
+            )
+
+        headers = {'Host': settings.ALLOWED_HOSTS[0], 'Accept': 'application/json'}
+        if settings.SECURE_SSL_REDIRECT:
+            # Production settings trust this header from the reverse proxy.
+            headers['X-Forwarded-Proto'] = 'https'
+
+        if options['target']:
+            host, _, port = options['target'].rpartition(':')
+            report = self.run(options, mix, catalog, customers, host, int(port), headers)
+        else:
+            self.stdout.write(f'Starting {options["server"]} with {options["workers"]} workers...')
+            try:
+                with run_server(options['server'], options['port'], options['workers']):
+                    report = self.run(
+                        options, mix, catalog, customers, '127.0.0.1', options['port'], headers
+                    )
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        self.report(report)
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            report['comparison'] = compare_reports(baseline, report)
+            self.report_comparison(report['comparison'])
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in SCENARIOS:
+                raise CommandError(f'Unknown scenario {name!r}; choose from {", ".join(SCENARIOS)}')
+            try:
+                mix[name] = float(weight or 1)
+            except ValueError:
+                raise CommandError(f'Invalid weight for {name}: {weight!r}')
+        if not any(mix.values()):
+            raise CommandError('At least one scenario needs a positive weight')
+        return mix
+
+    def run(self, options, mix, catalog, customers, host, port, headers):
+        """Warm up, then run the measured load and build the report."""
+        def client_factory():
+            return HTTPClient(host, port, headers)
+
+        def load(duration):
+            return asyncio.run(run_scenarios(
+                client_factory, catalog, mix, options['concurrency'], duration,
+                customers=customers, password=options['password'], seed=options['seed'],
+            ))
+
+        if options['warmup']:
+            load(options['warmup'])
+        started_at = timezone.now()
+        results, iterations = load(options['duration'])
+
+        return build_report(results, iterations, options['duration'], {
+            'started_at': started_at.isoformat(),
+            'target': f'{host}:{port}',
+            'server': None if options['target'] else options['server'],
+            'workers': None if options['target'] else options['workers'],
+            'mix': mix,
+            'concurrency': options['concurrency'],
+            'seed': options['seed'],
+        })
+
+    def report(self, report):
+        self.stdout.write(f"Scenarios: {report['scenarios']}")
+        rows = [('total', report['total'])] + list(report['requests'].items())
+        for name, summary in rows:
+            self.stdout.write(
+                f"{name:<17} {summary['throughput_rps']:>8} req/s n={summary['count']} "
+                f"errors={summary['error_rate']:.2%} p50={summary.get('p50_ms')}ms "
+                f"p99={summary.get('p99_ms')}ms"
+            )
+
+    def report_comparison(self, comparison):
+        self.stdout.write('Change against baseline:')
+        for name, metrics in comparison.items():
+            changes = ', '.join(
+                f"{metric} {delta['baseline']} -> {delta['current']}"
+                + (f" ({delta['change_pct']:+}%)" if delta['change_pct'] is not None else '')
+                for metric, delta in metrics.items()
+            )
+            self.stdout.write(f'{name:<17} {changes}')
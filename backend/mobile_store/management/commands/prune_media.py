@@ -0,0 +1,74 @@
+"""
+Delete product media files that no product references.
+
+Content-addressed files can be shared by several products, so the storage
+never deletes them when an image is replaced (see mobile_store/storage.py).
+This command removes what is left behind. Recent files are kept because an
+upload is written before the transaction saving its product commits.
+
+Usage:
+    python manage.py prune_media --dry-run
+    python manage.py prune_media --min-age 48
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from accessories.models import Accessory
+from mobile_store.images import derivative_names
+from phones.models import MobilePhone
+
+MODELS = (MobilePhone, Accessory)
+
+
+class Command(BaseCommand):
+    help = 'Delete product images and derivatives that are no longer referenced'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            default=24,
+            help='Keep files modified within this many hours (default: 24)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the files without deleting them'
+        )
+
+    def handle(self, *args, **options):
+        referenced = set()
+        directories = set()
+        for model in MODELS:
+            field = model._meta.get_field('image')
+            directories.add(field.upload_to.strip('/'))
+            for image, derivatives in model.objects.exclude(image='').exclude(image__isnull=True).values_list(
+                'image', 'image_derivatives'
+            ).iterator():
+                referenced.add(image)
+                referenced.update(derivative_names(derivatives))
+
+        cutoff = time.time() - options['min_age'] * 3600
+        deleted = freed = 0
+        for directory in sorted(directories):
+            for root, _dirs, files in os.walk(os.path.join(settings.MEDIA_ROOT, directory)):
+                for filename in files:
+                    full_path = os.path.join(root, filename)
+                    name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+                    stat = os.stat(full_path)
+                    if name in referenced or stat.st_mtime > cutoff:
+                        continue
+                    if options['dry_run']:
+                        self.stdout.write(name)
+                    else:
+                        os.remove(full_path)
+                    deleted += 1
+                    freed += stat.st_size
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} unreferenced files ({freed / 1024 / 1024:.1f} MB)'
+        ))
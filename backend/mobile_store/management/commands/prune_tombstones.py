@@ -0,0 +1,29 @@
+"""
+Delete catalog tombstones past their retention period.
+
+Clients whose change-feed cursor is older than the retention reload the
+whole catalog instead (see mobile_store/changes.py). Run it daily from cron.
+
+Usage:
+    python manage.py prune_tombstones
+    python manage.py prune_tombstones --retention-days 60
+"""
+
+from django.core.management.base import BaseCommand
+from mobile_store.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstones of deleted products older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help='Keep tombstones this many days (default: CATALOG_TOMBSTONE_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options['retention_days'])
+        self.stdout.write(f'Deleted {deleted} tombstones')
@@ -0,0 +1,35 @@
+"""
+Copy the SQLite primary database into the local replica files.
+
+Stands in for replication when testing the read-replica router locally:
+    DB_REPLICA_PATHS=db_replica.sqlite3 python manage.py sync_sqlite_replicas
+"""
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary database into every SQLite replica'
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The default database is not SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas configured (set DB_REPLICA_PATHS)')
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                replica = settings.DATABASES[alias]
+                target = sqlite3.connect(replica['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f'Synced {alias}: {replica["NAME"]}'))
+        finally:
+            source.close()
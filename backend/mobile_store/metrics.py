@@ -0,0 +1,252 @@
+"""
+Prometheus metrics for the mobile_store project.
+
+Metrics are recorded per worker process. When ``PROMETHEUS_MULTIPROC_DIR`` is
+set (see ``gunicorn.conf.py``) every gunicorn worker writes its samples to that
+directory and the ``/metrics`` view aggregates them, so a scrape reports totals
+for the whole server rather than for whichever worker answered.
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+QUERY_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+REQUEST_LATENCY = Histogram(
+    'mobile_store_request_latency_seconds',
+    'Request latency by view and action',
+    ['view', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_COUNT = Counter(
+    'mobile_store_requests_total',
+    'Requests by view, action and response status',
+    ['view', 'method', 'status'],
+)
+ERROR_COUNT = Counter(
+    'mobile_store_request_errors_total',
+    'Requests that ended in a server error',
+    ['view', 'method'],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'mobile_store_db_queries_per_request',
+    'Number of database queries executed per request',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    'mobile_store_db_query_duration_seconds',
+    'Duration of individual database queries',
+    ['view'],
+    buckets=QUERY_DURATION_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    'mobile_store_cache_requests_total',
+    'Cache lookups by cache name and result (hit/miss)',
+    ['cache', 'result'],
+)
+CHECKOUTS = Counter(
+    'mobile_store_checkouts_total',
+    'Orders created from carts',
+    ['result'],
+)
+PAYMENTS = Counter(
+    'mobile_store_payments_total',
+    'Payments created, by method and status',
+    ['method', 'status'],
+)
+STOCK_SYNC_ROWS = Counter(
+    'mobile_store_stock_sync_rows_total',
+    'Stock levels received from the warehouse, by product type and result',
+    ['product_type', 'result'],
+)
+STOCK_RESERVATIONS = Counter(
+    'mobile_store_stock_reservations_total',
+    'Stock reservations by result (reserved/rejected/expired)',
+    ['result'],
+)
+STOCK_SHARD_TAKES = Counter(
+    'mobile_store_stock_shard_takes_total',
+    'Sharded stock decrements by result (shard/fallback/insufficient)',
+    ['result'],
+)
+STOCK_LEDGER_MOVEMENTS = Counter(
+    'mobile_store_stock_ledger_movements_total',
+    'Inventory ledger movements written, by reason',
+    ['reason'],
+)
+JOBS = Counter(
+    'mobile_store_jobs_total',
+    'Background jobs by name and result (queued/done/retried/failed)',
+    ['job', 'result'],
+)
+OUTBOX_PUBLISHED = Counter(
+    'mobile_store_outbox_published_total',
+    'Events written to the outbox, by topic',
+    ['topic'],
+)
+OUTBOX_DELIVERED = Counter(
+    'mobile_store_outbox_delivered_total',
+    'Outbox events delivered, by consumer',
+    ['consumer'],
+)
+LIVE_STREAMS = Gauge(
+    'mobile_store_live_streams',
+    'Open live update (server-sent events) streams',
+    multiprocess_mode='livesum',
+)
+LIVE_UPDATES = Counter(
+    'mobile_store_live_updates_total',
+    'Stock and price updates published to the live update hub',
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'mobile_store_db_connections_opened_total',
+    'New database connections opened by this server',
+    ['alias'],
+)
+DB_SERVER_CONNECTIONS = Gauge(
+    'mobile_store_db_server_connections',
+    'Connections to the database server by state (from pg_stat_activity)',
+    ['state'],
+    multiprocess_mode='max',
+)
+DB_POOL_SIZE = Gauge(
+    'mobile_store_db_pool_size',
+    'Configured database connection pool size for this server',
+    multiprocess_mode='max',
+)
+
+
+def count_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver counting newly opened connections."""
+    DB_CONNECTIONS_OPENED.labels(connection.alias).inc()
+
+
+def view_label(view_func, request):
+    """
+    Build a low-cardinality label for the view handling a request.
+
+    DRF viewsets are labelled ``ViewSet.action`` (e.g. ``OrderViewSet.create_from_cart``),
+    other class based views ``View.method`` and everything else by URL name.
+
+    Args:
+        view_func: The resolved view callable
+        request: HTTP request object
+
+    Returns:
+        Label string
+    """
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is not None:
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{cls.__name__}.{action}'
+
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.view_name:
+        return match.view_name
+    return getattr(view_func, '__name__', 'unknown')
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts and times queries for one request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.durations = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.durations.append(time.perf_counter() - start)
+
+    def install(self, stack):
+        """Install the recorder on every configured database connection."""
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+
+def observe_request(view, method, status_code, duration, queries):
+    """
+    Record the metrics for a finished request.
+
+    Args:
+        view: View label from ``view_label``
+        method: HTTP method
+        status_code: Response status code
+        duration: Wall time in seconds
+        queries: ``QueryRecorder`` used during the request, or None if
+            queries were not recorded (async requests)
+    """
+    REQUEST_LATENCY.labels(view, method).observe(duration)
+    REQUEST_COUNT.labels(view, method, str(status_code)).inc()
+    if status_code >= 500:
+        ERROR_COUNT.labels(view, method).inc()
+
+    if queries is None:
+        return
+    DB_QUERIES_PER_REQUEST.labels(view).observe(queries.count)
+    query_histogram = DB_QUERY_DURATION.labels(view)
+    for query_duration in queries.durations:
+        query_histogram.observe(query_duration)
+
+
+def record_cache_lookup(cache_name, hit):
+    """Count a cache lookup as a hit or a miss."""
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+def get_registry():
+    """
+    Return the registry to expose.
+
+    In multiprocess mode a fresh registry collects the samples written by all
+    worker processes; otherwise the in-process default registry is used.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+@never_cache
+@require_GET
+def metrics_view(request):
+    """
+    Expose metrics in the Prometheus text format.
+
+    Access is limited to ``METRICS_ALLOWED_IPS`` ('*' allows everyone). The
+    peer address is used rather than X-Forwarded-For, which clients control.
+    """
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    if '*' not in allowed_ips:
+        if request.META.get('REMOTE_ADDR') not in allowed_ips:
+            return HttpResponseForbidden('Metrics are not available from this address')
+
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
@@ -4,7 +4,13 @@ Custom middleware for the mobile_store project.
 
 import logging
 import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+from . import db_router, metrics
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +20,24 @@ class DisableCacheMiddleware:
     Middleware to add comprehensive no-cache headers to all responses.
     This ensures that frontend always gets fresh data from the backend.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
-        
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    def add_headers(self, request, response):
+        """Add the no-cache headers to API responses."""
         # Only apply to API endpoints
         if request.path.startswith('/api/'):
             response['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0, private'
@@ -145,3 +162,86 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         else:
             ip = request.META.get('REMOTE_ADDR')
         return ip
+
+
+class MetricsMiddleware:
+    """
+    Record Prometheus metrics for every request.
+
+    Latency, status and database query counts are labelled by the view that
+    handled the request, e.g. ``MobilePhoneViewSet.list``. Under ASGI the ORM
+    runs on executor threads, so per-request query counts are only recorded
+    for sync requests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start_time = time.perf_counter()
+        with ExitStack() as stack:
+            queries = metrics.QueryRecorder().install(stack)
+            response = self.get_response(request)
+
+        self.observe(request, response, start_time, queries)
+        return response
+
+    async def __acall__(self, request):
+        start_time = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, start_time, None)
+        return response
+
+    def observe(self, request, response, start_time, queries):
+        """Label the request by the view that handled it and record it."""
+        match = getattr(request, 'resolver_match', None)
+        view = metrics.view_label(match.func, request) if match else 'unmatched'
+        metrics.observe_request(
+            view,
+            request.method,
+            response.status_code,
+            time.perf_counter() - start_time,
+            queries,
+        )
+
+
+class PrimaryStickinessMiddleware(MiddlewareMixin):
+    """
+    Keep clients that just wrote on the primary database for a short window,
+    so replica lag never hides their own changes.
+    """
+
+    def process_response(self, request, response):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            db_router.pin_to_primary(request, response)
+        return response
+
+
+class ASGIURLConfMiddleware:
+    """
+    Serve requests that arrive through ASGI with ``ASGI_URLCONF``, which maps
+    the read-only catalog and health endpoints to native async views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASGI_URLCONF
+        return self.get_response(request)
@@ -0,0 +1,61 @@
+"""
+PostgreSQL triggers feeding live stock and price updates (see mobile_store/live.py).
+
+Other databases get no triggers; there updates are published in-process.
+"""
+
+from django.db import migrations
+
+TRIGGERS = [
+    ('phones_mobilephone', 'PHONE', 'phone_id'),
+    ('accessories_accessory', 'ACCESSORY', 'accessory_id'),
+]
+
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION catalog_live_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('catalog_live', json_build_object(
+        'product_type', TG_ARGV[0],
+        'product_id', (to_jsonb(NEW) ->> TG_ARGV[1])::integer,
+        'stock_quantity', NEW.stock_quantity,
+        'price', NEW.price::text
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+CREATE_TRIGGER = """
+CREATE TRIGGER {table}_live AFTER UPDATE OF stock_quantity, price ON {table}
+FOR EACH ROW WHEN (OLD.stock_quantity IS DISTINCT FROM NEW.stock_quantity OR OLD.price IS DISTINCT FROM NEW.price)
+EXECUTE FUNCTION catalog_live_notify('{product_type}', '{pk}')
+"""
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_FUNCTION)
+    for table, product_type, pk in TRIGGERS:
+        schema_editor.execute(CREATE_TRIGGER.format(table=table, product_type=product_type, pk=pk))
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, product_type, pk in TRIGGERS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_live ON {table}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS catalog_live_notify()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mobile_store', '0001_initial'),
+        ('phones', '0006_mobilephone_phone_updated_idx'),
+        ('accessories', '0007_accessory_accessory_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,61 @@
+"""
+PostgreSQL triggers stamping feed rows with their writing transaction (see
+mobile_store/visibility.py), and the indexes the change feed reads them by.
+
+Rows written before this migration get ``xact_id`` 0. Other databases get
+no triggers and keep ``xact_id`` empty.
+"""
+
+from django.db import migrations
+
+TABLES = [
+    ('phones_mobilephone', 'phone_xact_idx', 'xact_id, phone_id'),
+    ('accessories_accessory', 'accessory_xact_idx', 'xact_id, accessory_id'),
+    ('mobile_store_tombstone', 'tombstone_xact_idx', 'product_type, xact_id'),
+]
+
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION stamp_xact_id() RETURNS trigger AS $$
+BEGIN
+    NEW.xact_id := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+CREATE_TRIGGER = """
+CREATE TRIGGER {table}_xact BEFORE INSERT OR UPDATE ON {table}
+FOR EACH ROW EXECUTE FUNCTION stamp_xact_id()
+"""
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_FUNCTION)
+    for table, index, columns in TABLES:
+        schema_editor.execute(f'UPDATE {table} SET xact_id = 0 WHERE xact_id IS NULL')
+        schema_editor.execute(CREATE_TRIGGER.format(table=table))
+        schema_editor.execute(f'CREATE INDEX {index} ON {table} ({columns})')
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, index, columns in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_xact ON {table}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS stamp_xact_id()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mobile_store', '0003_tombstone_xact_id'),
+        ('phones', '0007_mobilephone_xact_id'),
+        ('accessories', '0008_accessory_xact_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mobile_store', '0004_feed_xact_triggers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrimaryPin',
+            fields=[
+                ('user_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Primary Pin',
+                'verbose_name_plural': 'Primary Pins',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mobile_store', '0005_primarypin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='primarypin',
+            name='user_id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import models
+from django.utils import timezone
+
+
+class LoadedStockMixin:
+    """
+    Remembers the ``stock_quantity`` a product was loaded with.
+
+    The inventory ledger records a manual stock edit as the difference to
+    this value (see inventory/ledger.py), so saving needs no extra query.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'stock_quantity' in instance.__dict__:  # Not deferred
+            instance._loaded_stock = instance.stock_quantity
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or 'stock_quantity' in fields:
+            self._loaded_stock = self.stock_quantity
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted product, kept for the catalog change feed.
+
+    Clients that synced before the deletion learn about it from the feed
+    (see mobile_store/changes.py); tombstones older than
+    ``CATALOG_TOMBSTONE_RETENTION_DAYS`` are pruned.
+    """
+    PRODUCT_TYPE_CHOICES = [
+        ('PHONE', 'Mobile Phone'),
+        ('ACCESSORY', 'Accessory'),
+    ]
+
+    tombstone_id = models.BigAutoField(primary_key=True)
+    product_type = models.CharField(max_length=20, choices=PRODUCT_TYPE_CHOICES)
+    product_id = models.IntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    xact_id = models.BigIntegerField(null=True, blank=True, editable=False, help_text='Writing transaction, set by trigger on PostgreSQL (see mobile_store/visibility.py)')
+
+    class Meta:
+        verbose_name = 'Tombstone'
+        verbose_name_plural = 'Tombstones'
+        indexes = [
+            models.Index(fields=['product_type', 'deleted_at'], name='tombstone_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_type} - {self.product_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class PrimaryPin(models.Model):
+    """
+    Until when a user's reads stay on the primary database after a write.
+
+    Shared by every worker, unlike the per-process caches, so the pin holds
+    for clients that send no cookies (see mobile_store/db_router.py). One
+    row per user, overwritten by each write.
+    """
+    user_id = models.BigIntegerField(primary_key=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Primary Pin'
+        verbose_name_plural = 'Primary Pins'
+
+    def __str__(self):
+        return f"User {self.user_id} on primary until {self.expires_at:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,187 @@
+"""
+Set-based repricing of phones and accessories.
+
+A percentage or absolute change is applied to a whole queryset (every phone
+of a brand, every accessory of a category, or an admin selection) with one
+``UPDATE``. The ``validate_price`` bounds are enforced by the
+``*_price_bounds`` check constraints, so a change that would push any row out
+of range fails as a whole. Afterwards the carts holding the repriced
+products are touched with one more ``UPDATE`` (their totals are computed
+from current prices on read) and the cached catalog pages are dropped.
+"""
+
+from decimal import Decimal
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Round
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from .constants import MAX_PRICE
+from .decorators import invalidate_catalog_pages
+from .live import product_changed
+
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+class RepriceError(Exception):
+    """Raised when a price change would leave prices out of bounds."""
+    pass
+
+
+def new_price(percent=None, amount=None):
+    """
+    Build the SQL expression of the changed price.
+
+    Args:
+        percent: Percentage change, e.g. -15 for 15% off
+        amount: Absolute change, e.g. Decimal('-5.00')
+
+    Returns:
+        Query expression rounded to cents
+    """
+    if (percent is None) == (amount is None):
+        raise ValueError('Pass exactly one of percent or amount')
+    if percent is not None:
+        factor = Value(1 + Decimal(percent) / 100, output_field=PRICE_FIELD)
+        expression = F('price') * factor
+    else:
+        expression = F('price') + Value(Decimal(amount), output_field=PRICE_FIELD)
+    return Round(ExpressionWrapper(expression, output_field=PRICE_FIELD), 2, output_field=PRICE_FIELD)
+
+
+def reprice(queryset, product_type, percent=None, amount=None):
+    """
+    Change the price of every product in a queryset with one ``UPDATE``.
+
+    Args:
+        queryset: MobilePhone or Accessory queryset
+        product_type: ``PHONE`` or ``ACCESSORY`` (as stored on cart items)
+        percent: Percentage change
+        amount: Absolute change
+
+    Returns:
+        Dict with the number of repriced products and refreshed carts
+
+    Raises:
+        RepriceError: If any new price would be outside 0..MAX_PRICE
+    """
+    from cart.models import Cart
+
+    price = new_price(percent, amount)
+    now = timezone.now()
+    ids = list(queryset.values_list('pk', flat=True))
+    try:
+        with transaction.atomic():
+            updated = queryset.exclude(price=price).update(price=price, updated_at=now)
+            carts = Cart.objects.filter(
+                items__product_type=product_type, items__product_id__in=queryset.values('pk')
+            ).update(updated_at=now)
+    except IntegrityError:
+        out_of_bounds = queryset.annotate(new_price=price).filter(
+            Q(new_price__lt=0) | Q(new_price__gt=MAX_PRICE)
+        ).count()
+        raise RepriceError(
+            f'{out_of_bounds} product(s) would be priced outside 0 to {MAX_PRICE:,.2f}; nothing was changed'
+        )
+
+    invalidate_catalog_pages(product_type, ids)
+    product_changed(product_type, ids)
+    return {'updated': updated, 'carts_refreshed': carts}
+
+
+class RepriceSerializer(serializers.Serializer):
+    """Serializer for a bulk price change"""
+    percent = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=-100, required=False)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+    def validate(self, attrs):
+        if ('percent' in attrs) == ('amount' in attrs):
+            raise serializers.ValidationError("Provide exactly one of percent or amount")
+        return attrs
+
+
+def reprice_response(queryset, product_type, changes):
+    """
+    Run ``reprice`` for an API view.
+
+    Args:
+        queryset: Products to reprice
+        product_type: ``PHONE`` or ``ACCESSORY``
+        changes: Validated ``RepriceSerializer`` data
+
+    Returns:
+        Response with the counts, or 400 if prices would go out of bounds
+    """
+    try:
+        result = reprice(queryset, product_type, **changes)
+    except RepriceError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
+class RepriceForm(forms.Form):
+    """Admin form for a bulk price change"""
+    percent = forms.DecimalField(
+        max_digits=5, decimal_places=2, min_value=-100, required=False,
+        help_text='Percentage change, e.g. -15 for 15% off'
+    )
+    amount = forms.DecimalField(
+        max_digits=10, decimal_places=2, required=False,
+        help_text='Absolute change, e.g. -5.00'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if (cleaned_data.get('percent') is None) == (cleaned_data.get('amount') is None):
+            raise forms.ValidationError('Provide exactly one of percent or amount.')
+        return cleaned_data
+
+
+def reprice_action(product_type, products=None, description='Reprice selected products'):
+    """
+    Build an admin action that reprices products after asking for the change.
+
+    Args:
+        product_type: ``PHONE`` or ``ACCESSORY``
+        products: Optional callable mapping the selected queryset to the
+            products to reprice (e.g. brands to their phones)
+        description: Label shown in the actions menu
+
+    Returns:
+        Admin action function
+    """
+    @admin.action(description=description, permissions=['change'])
+    def action(modeladmin, request, queryset):
+        form = RepriceForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            changes = {key: value for key, value in form.cleaned_data.items() if value is not None}
+            try:
+                result = reprice(products(queryset) if products else queryset, product_type, **changes)
+            except RepriceError as e:
+                modeladmin.message_user(request, str(e), messages.ERROR)
+            else:
+                modeladmin.message_user(
+                    request,
+                    f"Repriced {result['updated']} product(s); refreshed {result['carts_refreshed']} cart(s).",
+                    messages.SUCCESS
+                )
+            return None
+
+        return TemplateResponse(request, 'admin/reprice.html', {
+            **modeladmin.admin_site.each_context(request),
+            'title': description,
+            'opts': modeladmin.model._meta,
+            'form': form,
+            'queryset': queryset,
+            'action': request.POST.get('action'),
+            'select_across': request.POST.get('select_across') == '1',
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+    action.__name__ = 'reprice'
+    return action
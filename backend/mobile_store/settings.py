@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 from datetime import timedelta
 from decouple import config, UndefinedValueError
+from .db import add_replicas, configure_pooling, pool_size
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -60,20 +61,27 @@ INSTALLED_APPS = [
     'django_filters',
     
     # Local apps
+    'mobile_store',
     'phones',
     'accessories',
     'customers',
     'cart',
     'orders',
     'payments',
+    'inventory',
+    'jobs',
+    'outbox',
 ]
 
 MIDDLEWARE = [
+    'mobile_store.middleware.MetricsMiddleware',
+    'mobile_store.middleware.ASGIURLConfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'mobile_store.middleware.SecurityHeadersMiddleware',
     'mobile_store.middleware.RequestLoggingMiddleware',
+    'mobile_store.middleware.PrimaryStickinessMiddleware',
     'mobile_store.middleware.DisableCacheMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,6 +91,7 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'mobile_store.urls'
+ASGI_URLCONF = 'mobile_store.urls_asgi'  # async catalog/health views under ASGI
 
 TEMPLATES = [
     {
@@ -114,6 +123,32 @@ DATABASES = {
     }
 }
 
+# Connection pooling (see mobile_store/db.py). The pool size is what PgBouncer
+# or max_connections must allow for one server running these workers.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=3, cast=int)  # gunicorn workers
+GUNICORN_THREADS = config('GUNICORN_THREADS', default=1, cast=int)
+DB_POOL_MODE = config('DB_POOL_MODE', default='persistent')
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+DB_POOL_SIZE = config(
+    'DB_POOL_SIZE', default=pool_size(WEB_CONCURRENCY, GUNICORN_THREADS), cast=int
+)
+configure_pooling(DATABASES['default'], DB_POOL_MODE, DB_CONN_MAX_AGE)
+
+# Read replicas (see mobile_store/db_router.py): comma-separated host[:port]
+# list. Catalog reads go to a replica; a client that writes is pinned to the
+# primary for REPLICA_STICKY_SECONDS.
+DB_REPLICAS = [
+    dict(zip(('HOST', 'PORT'), replica.split(':')))
+    for replica in config(
+        'DB_REPLICA_HOSTS',
+        default='',
+        cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+    )
+]
+DATABASE_REPLICAS = add_replicas(DATABASES, DB_REPLICAS)
+DATABASE_ROUTERS = ['mobile_store.db_router.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -146,6 +181,30 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads stream to temporary files; images over MAX_UPLOAD_SIZE are rejected
+# while the body is read (see mobile_store/uploads.py).
+FILE_UPLOAD_HANDLERS = ['mobile_store.uploads.StreamingUploadHandler']
+
+# Uploads are named by content hash and cached as immutable (see
+# mobile_store/storage.py). Media under PROTECTED_MEDIA_PREFIXES is checked by
+# Django and handed to nginx's internal MEDIA_ACCEL_REDIRECT location.
+STORAGES = {
+    'default': {'BACKEND': 'mobile_store.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+PROTECTED_MEDIA_PREFIXES = config(
+    'PROTECTED_MEDIA_PREFIXES',
+    default='',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
+
+# Product image derivatives (see mobile_store/images.py): rendered by a
+# background job on the 'images' queue, so run_workers must serve that queue;
+# False renders them in process pools of the web process after the upload's
+# transaction commits.
+IMAGE_DERIVATIVES_IN_BACKGROUND = config('IMAGE_DERIVATIVES_IN_BACKGROUND', default=True, cast=bool)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -268,9 +327,100 @@ CACHE_MIDDLEWARE_KEY_PREFIX = ''
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
+    },
+    # Per-process cache for data every worker may hold slightly stale
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mobile-store-local',
+    },
 }
 
+# Admin changelists (see mobile_store/admin_utils.py): unfiltered tables with
+# at least this many rows show the planner estimate instead of COUNT(*).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+ADMIN_FILTER_CACHE = 'local'
+ADMIN_FILTER_CACHE_SECONDS = config('ADMIN_FILTER_CACHE_SECONDS', default=300, cast=int)
+
+# Stock reservations (see inventory/reservations.py): seconds a cart holds the
+# units it added; expired holds are deleted in batches by release_reservations.
+STOCK_RESERVATION_TTL = config('STOCK_RESERVATION_TTL', default=900, cast=int)
+STOCK_RESERVATION_SWEEP_BATCH_SIZE = config('STOCK_RESERVATION_SWEEP_BATCH_SIZE', default=1000, cast=int)
+
+# Sharded stock for hot products (see inventory/shards.py): default number of
+# counter rows per product when sharding is enabled.
+STOCK_SHARD_COUNT = config('STOCK_SHARD_COUNT', default=8, cast=int)
+
+# Queued checkout for flash sales (see orders/checkout.py): create_from_cart
+# answers 202 with a ticket and run_checkout_workers places the orders.
+CHECKOUT_QUEUE_ENABLED = config('CHECKOUT_QUEUE_ENABLED', default=False, cast=bool)
+CHECKOUT_QUEUE_BATCH_SIZE = config('CHECKOUT_QUEUE_BATCH_SIZE', default=50, cast=int)
+CHECKOUT_QUEUE_STALE_AFTER = config('CHECKOUT_QUEUE_STALE_AFTER', default=60, cast=int)  # seconds
+CHECKOUT_QUEUE_MAX_ATTEMPTS = config('CHECKOUT_QUEUE_MAX_ATTEMPTS', default=3, cast=int)
+
+# Background jobs (see jobs/queue.py), run by run_workers. A failed job is
+# retried after JOBS_RETRY_BACKOFF * 2^(attempt - 1) seconds, capped at
+# JOBS_RETRY_BACKOFF_MAX; running jobs older than JOBS_STALE_AFTER are
+# requeued; finished jobs are deleted after JOBS_KEEP_DONE_DAYS.
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=10, cast=int)  # seconds
+JOBS_RETRY_BACKOFF_MAX = config('JOBS_RETRY_BACKOFF_MAX', default=3600, cast=int)  # seconds
+JOBS_STALE_AFTER = config('JOBS_STALE_AFTER', default=600, cast=int)  # seconds
+JOBS_KEEP_DONE_DAYS = config('JOBS_KEEP_DONE_DAYS', default=7, cast=int)
+
+# Transactional outbox (see outbox/relay.py): downstream consumers as
+# comma-separated name=sink-url pairs (file://, http(s)://, unix://), e.g.
+# "warehouse=http://127.0.0.1:9000/events,analytics=file:///var/lib/store/events.jsonl".
+OUTBOX_CONSUMERS = config(
+    'OUTBOX_CONSUMERS',
+    default='',
+    cast=lambda v: dict(s.strip().split('=', 1) for s in v.split(',') if s.strip())
+)
+OUTBOX_RELAY_BATCH_SIZE = config('OUTBOX_RELAY_BATCH_SIZE', default=500, cast=int)
+OUTBOX_RELAY_LAG = config('OUTBOX_RELAY_LAG', default=2, cast=int)  # seconds, not used on PostgreSQL
+OUTBOX_RETENTION_DAYS = config('OUTBOX_RETENTION_DAYS', default=7, cast=int)
+
+# Inventory ledger (see inventory/ledger.py): compaction snapshots movements
+# older than the lag and deletes movements past the retention period.
+STOCK_LEDGER_COMPACTION_LAG = config('STOCK_LEDGER_COMPACTION_LAG', default=3600, cast=int)  # seconds
+STOCK_LEDGER_RETENTION_DAYS = config('STOCK_LEDGER_RETENTION_DAYS', default=90, cast=int)
+
+# Catalog change feed (see mobile_store/changes.py): on databases other than
+# PostgreSQL rows newer than the lag wait for the next poll; cursors older
+# than the tombstone retention get 410.
+CATALOG_CHANGES_PAGE_SIZE = config('CATALOG_CHANGES_PAGE_SIZE', default=500, cast=int)
+CATALOG_CHANGES_LAG = config('CATALOG_CHANGES_LAG', default=2, cast=int)  # seconds
+CATALOG_TOMBSTONE_RETENTION_DAYS = config('CATALOG_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Static catalog snapshot (see mobile_store/snapshot.py), built by
+# manage.py build_catalog_snapshot and served by nginx at CATALOG_SNAPSHOT_URL.
+CATALOG_SNAPSHOT_ROOT = config('CATALOG_SNAPSHOT_ROOT', default=str(BASE_DIR / 'catalog_snapshot'))
+CATALOG_SNAPSHOT_URL = config('CATALOG_SNAPSHOT_URL', default='/catalog/')
+CATALOG_SNAPSHOT_KEEP = config('CATALOG_SNAPSHOT_KEEP', default=3, cast=int)  # versions
+
+# Live stock and price updates (see mobile_store/live.py). On PostgreSQL each
+# ASGI process LISTENs on its own connection, which must bypass PgBouncer in
+# transaction mode: point LIVE_UPDATES_DB_HOST/PORT at the server itself.
+LIVE_UPDATES_HEARTBEAT = config('LIVE_UPDATES_HEARTBEAT', default=15, cast=int)  # seconds
+LIVE_UPDATES_MAX_DURATION = config('LIVE_UPDATES_MAX_DURATION', default=300, cast=int)  # seconds
+LIVE_UPDATES_MAX_PRODUCTS = config('LIVE_UPDATES_MAX_PRODUCTS', default=100, cast=int)
+LIVE_UPDATES_DB_HOST = config('LIVE_UPDATES_DB_HOST', default='')
+LIVE_UPDATES_DB_PORT = config('LIVE_UPDATES_DB_PORT', default='')
+
+# Prometheus metrics (/metrics). Comma-separated peer addresses, '*' for any.
+METRICS_ALLOWED_IPS = config(
+    'METRICS_ALLOWED_IPS',
+    default='127.0.0.1,::1',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+
+# Health probes: checks run on a background thread in each worker and the
+# /health/ and /ready/ views serve the latest result.
+HEALTH_CHECK_INTERVAL = config('HEALTH_CHECK_INTERVAL', default=5, cast=int)  # seconds
+HEALTH_CHECK_STALE_AFTER = config('HEALTH_CHECK_STALE_AFTER', default=30, cast=int)  # seconds
+HEALTH_MIGRATION_CHECK_INTERVAL = 60  # seconds
+HEALTH_DB_LATENCY_THRESHOLD_MS = config('HEALTH_DB_LATENCY_THRESHOLD_MS', default=500, cast=int)
+HEALTH_MAX_CONNECTION_USAGE = 0.9  # fraction of max_connections
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -344,7 +494,7 @@ if not os.path.exists(logs_dir):
 
 # Static files configuration for production
 if not DEBUG:
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+    STORAGES['staticfiles'] = {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'}
     # Add WhiteNoise middleware if not already present
     if 'whitenoise.middleware.WhiteNoiseMiddleware' not in MIDDLEWARE:
         MIDDLEWARE.insert(
@@ -19,6 +19,18 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+configure_pooling(DATABASES['default'], DB_POOL_MODE, DB_CONN_MAX_AGE)
+
+# Local read replicas: extra SQLite files refreshed from db.sqlite3 with
+# `python manage.py sync_sqlite_replicas`, e.g. DB_REPLICA_PATHS=db_replica.sqlite3
+DATABASE_REPLICAS = add_replicas(DATABASES, [
+    {'NAME': BASE_DIR / path}
+    for path in config(
+        'DB_REPLICA_PATHS',
+        default='',
+        cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+    )
+])
 
 # Disable security settings in development
 SECURE_SSL_REDIRECT = False
@@ -36,7 +36,7 @@ MIDDLEWARE.insert(
     'whitenoise.middleware.WhiteNoiseMiddleware',
 )
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES['staticfiles'] = {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'}
 
 # Database - Use production database settings
 DATABASES = {
@@ -47,12 +47,13 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT', default='5432'),
-        'CONN_MAX_AGE': 600,  # Connection pooling
         'OPTIONS': {
             'connect_timeout': 10,
         }
     }
 }
+configure_pooling(DATABASES['default'], DB_POOL_MODE, DB_CONN_MAX_AGE)
+DATABASE_REPLICAS = add_replicas(DATABASES, DB_REPLICAS)
 
 # Cache configuration (can use Redis in production)
 # Uncomment and configure if using Redis
@@ -99,8 +100,10 @@ LOGGING['handlers']['file']['level'] = 'ERROR'
 #     AWS_DEFAULT_ACL = 'public-read'
 #     
 #     # Static and media files
-#     STATICFILES_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
-#     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+#     STORAGES = {
+#         'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+#         'staticfiles': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+#     }
 #     STATIC_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/static/'
 #     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/media/'
 
@@ -0,0 +1,208 @@
+"""
+Precomputed catalog snapshot served as static files.
+
+The SPA's first load asks for the same public catalog on every visit.
+``build_snapshot`` (``manage.py build_catalog_snapshot``) renders it once
+into ``CATALOG_SNAPSHOT_ROOT``::
+
+    manifest.json                       -> current version, revalidated
+    <version>/brands.json(.gz)          -> immutable, cached for a year
+    <version>/phones.json(.gz)
+    <version>/accessories.json(.gz)
+    <version>/facets.json(.gz)
+
+The version is a hash of the rendered files, so an unchanged catalog keeps
+its URLs and a changed one gets new ones. nginx serves the files directly
+(``gzip_static`` picks the ``.gz`` copies, see nginx.conf). A rebuild only
+happens when the catalog fingerprint, one aggregate query per table,
+changed. Stock moves faster than snapshots, so the manifest carries a
+change-feed cursor per product type (see mobile_store/changes.py): clients
+load the snapshot and then fetch ``/changes/?since=<cursor>`` to catch up.
+The last ``CATALOG_SNAPSHOT_KEEP`` versions are kept for clients still
+holding an older manifest.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from .changes import current_cursor
+
+MANIFEST = 'manifest.json'
+
+
+def _catalog_models():
+    from accessories.models import Accessory
+    from phones.models import Brand, MobilePhone
+
+    return (Brand, MobilePhone, Accessory)
+
+
+def catalog_fingerprint():
+    """
+    Cheap summary of the catalog that changes whenever a row is added,
+    changed or deleted.
+    """
+    parts = []
+    for model in _catalog_models():
+        summary = model.objects.aggregate(count=Count('pk'), updated=Max('updated_at'), last=Max('pk'))
+        parts.append(f"{model._meta.label}:{summary['count']}:{summary['last']}:{summary['updated']}")
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def _counts(queryset, field):
+    return [
+        {'value': row[field], 'count': row['count']}
+        for row in queryset.values(field).annotate(count=Count('pk')).order_by(field)
+    ]
+
+
+def _price_range(queryset):
+    places = queryset.model._meta.get_field('price').decimal_places
+    prices = queryset.aggregate(min=Min('price'), max=Max('price'))
+    return {key: f'{value:.{places}f}' if value is not None else None for key, value in prices.items()}
+
+
+def render_catalog():
+    """
+    Render the public catalog documents.
+
+    Returns:
+        Dict of file name to JSON bytes
+    """
+    from accessories.models import Accessory
+    from accessories.serializers import AccessorySerializer
+    from inventory.reservations import with_available_stock
+    from phones.models import Brand, MobilePhone
+    from phones.serializers import BrandSerializer, MobilePhoneSerializer
+
+    brands = list(Brand.objects.annotate(phone_count=Count('phones')).order_by('brand_name'))
+    phones = with_available_stock(MobilePhone.objects.select_related('brand').order_by('pk'), 'PHONE')
+    accessories = with_available_stock(Accessory.objects.order_by('pk'), 'ACCESSORY')
+
+    def listing(serializer_class, queryset):
+        results = serializer_class(queryset, many=True).data
+        return {'count': len(results), 'results': results}
+
+    documents = {
+        'brands': listing(BrandSerializer, brands),
+        'phones': listing(MobilePhoneSerializer, phones),
+        'accessories': listing(AccessorySerializer, accessories),
+        'facets': {
+            'phones': {
+                'brand': [
+                    {'value': brand.brand_id, 'label': brand.brand_name, 'count': brand.phone_count}
+                    for brand in brands
+                ],
+                'os': _counts(MobilePhone.objects.all(), 'os'),
+                'ram': _counts(MobilePhone.objects.all(), 'ram'),
+                'storage': _counts(MobilePhone.objects.all(), 'storage'),
+                'price': _price_range(MobilePhone.objects.all()),
+            },
+            'accessories': {
+                'category': _counts(Accessory.objects.all(), 'category'),
+                'price': _price_range(Accessory.objects.all()),
+            },
+        },
+    }
+    renderer = JSONRenderer()
+    return {f'{name}.json': renderer.render(document) for name, document in documents.items()}
+
+
+def read_manifest(root=None):
+    """The current manifest, or None before the first build."""
+    path = Path(root or settings.CATALOG_SNAPSHOT_ROOT) / MANIFEST
+    try:
+        return json.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path, content):
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        f.write(content)
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
+
+
+def build_snapshot(root=None, force=False):
+    """
+    Render the catalog into a new version if it changed since the last build.
+
+    Args:
+        root: Output directory (default: ``CATALOG_SNAPSHOT_ROOT``)
+        force: Render even if the fingerprint is unchanged
+
+    Returns:
+        The manifest dict, or None if nothing changed
+    """
+    root = Path(root or settings.CATALOG_SNAPSHOT_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    fingerprint = catalog_fingerprint()
+    manifest = read_manifest(root)
+    if not force and manifest and manifest['fingerprint'] == fingerprint:
+        return None
+
+    # Rows changed after this point are sent again by the change feed.
+    cursor = current_cursor()
+    files = render_catalog()
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(name.encode() + b'\0' + files[name])
+    version = digest.hexdigest()[:16]
+
+    directory = root / version
+    if not directory.exists():
+        staging = Path(tempfile.mkdtemp(dir=root, prefix='.build-'))
+        try:
+            for name, content in files.items():
+                (staging / name).write_bytes(content)
+                # mtime=0 keeps the compressed copy identical across rebuilds.
+                (staging / f'{name}.gz').write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+            staging.chmod(0o755)
+            os.replace(staging, directory)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    else:
+        # Same content as an earlier build: make it the newest again.
+        os.utime(directory)
+
+    base_url = settings.CATALOG_SNAPSHOT_URL.rstrip('/')
+    manifest = {
+        'version': version,
+        'fingerprint': fingerprint,
+        'generated_at': timezone.now().isoformat(),
+        'files': {name.removesuffix('.json'): f'{base_url}/{version}/{name}' for name in sorted(files)},
+        'changes': {'phones': cursor, 'accessories': cursor},
+    }
+    _write_atomic(root / MANIFEST, json.dumps(manifest, indent=2).encode())
+    prune_versions(root, keep=settings.CATALOG_SNAPSHOT_KEEP, current=version)
+    return manifest
+
+
+def prune_versions(root, keep, current):
+    """
+    Delete all but the ``keep`` newest versions; ``current`` is never deleted.
+
+    Returns:
+        Names of the deleted versions
+    """
+    versions = sorted(
+        (path for path in Path(root).iterdir() if path.is_dir() and not path.name.startswith('.')),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    deleted = []
+    for path in versions[keep:]:
+        if path.name != current:
+            shutil.rmtree(path)
+            deleted.append(path.name)
+    return deleted
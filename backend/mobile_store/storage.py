@@ -0,0 +1,114 @@
+"""
+Content-addressed media storage and media serving.
+
+Uploads are stored under a name derived from the SHA-256 of their content
+(``phones/3f/3fa9...c1.png``), so a name always refers to the same bytes:
+identical uploads share one file, a re-upload gets a new URL, and every media
+response can be cached as ``immutable``. Because files can be shared,
+``delete`` keeps them; ``manage.py prune_media`` removes files that no
+product references any more.
+
+Public media is served by nginx straight from ``MEDIA_ROOT``. Paths under
+``PROTECTED_MEDIA_PREFIXES`` go through ``media_file``, which checks the user
+and hands the file back to nginx with ``X-Accel-Redirect`` so the Python
+worker never streams the bytes.
+"""
+
+import hashlib
+import mimetypes
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404, HttpResponse
+from django.utils._os import safe_join
+from django.views import static
+
+# Hex digits of the digest used in names (128 bits).
+HASH_LENGTH = 32
+IMMUTABLE = 'max-age=31536000, immutable'
+
+
+def content_hash(content):
+    """
+    SHA-256 hex digest of a file, read in chunks.
+
+    Args:
+        content: Django ``File``
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """``FileSystemStorage`` naming every file by the hash of its content."""
+
+    def hashed_name(self, name, content):
+        """
+        Content-addressed name in the directory of ``name``.
+
+        The original extension is kept so the content type can be inferred.
+        """
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        digest = content_hash(content)[:HASH_LENGTH]
+        return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Same bytes already stored: share the file.
+            return name
+        return super()._save(name, content)
+
+    def delete(self, name):
+        """Keep the file; it may be shared (see ``manage.py prune_media``)."""
+        pass
+
+
+def media_file(request, path):
+    """
+    Serve a file from ``MEDIA_ROOT``.
+
+    Files under ``PROTECTED_MEDIA_PREFIXES`` are only served to staff users.
+    With ``MEDIA_ACCEL_REDIRECT`` set, the response is an empty
+    ``X-Accel-Redirect`` to nginx's internal location; otherwise the file is
+    streamed by Django, which only happens with ``DEBUG`` on.
+
+    Args:
+        request: HTTP request
+        path: Path relative to ``MEDIA_ROOT``
+
+    Returns:
+        HttpResponse
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    protected = path.startswith(tuple(settings.PROTECTED_MEDIA_PREFIXES))
+    if protected and not request.user.is_staff:
+        raise Http404('Media file not found')
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404('Media file not found')
+        if not os.path.isfile(full_path):
+            raise Http404('Media file not found')
+        response = HttpResponse(content_type=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + quote(path)
+    elif settings.DEBUG:
+        response = static.serve(request, path, document_root=settings.MEDIA_ROOT)
+    else:
+        raise Http404('Media file not found')
+
+    response['Cache-Control'] = f"{'private' if protected else 'public'}, {IMMUTABLE}"
+    return response
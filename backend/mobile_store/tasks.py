@@ -0,0 +1,14 @@
+"""
+Background jobs of the store (see jobs/queue.py).
+"""
+
+from django.apps import apps
+from jobs.queue import job
+
+
+@job(queue='images', max_attempts=3)
+def build_image_derivatives(model_label, pk):
+    """Render and store the derivatives of one product's image."""
+    from .images import process_image
+
+    process_image(apps.get_model(model_label), pk)
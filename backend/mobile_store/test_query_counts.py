@@ -0,0 +1,405 @@
+"""
+Query-count and wall-time regression benchmarks for every API viewset action.
+
+Each action runs against a fixed, seeded dataset and is compared with
+``query_count_baseline.<vendor>.json`` for the database it runs on: some
+code paths are vendor-specific (COPY imports, server-side cursors,
+``SKIP LOCKED`` claims, planner estimates), so counts differ between SQLite
+and PostgreSQL. Without a baseline for the vendor the comparison is
+skipped. A test fails when an action issues more than
+``BENCHMARK_QUERY_TOLERANCE`` extra queries (an N+1 introduced by a new
+serializer field shows up immediately) or gets slower than
+``BENCHMARK_TIME_TOLERANCE`` times its baseline. Timings are only checked
+when that variable is set (e.g. ``BENCHMARK_TIME_TOLERANCE=3`` on a quiet
+machine); on shared runners and loaded laptops they are noise.
+
+After an intended change, regenerate the baseline on each database it
+exists for and commit it:
+
+    BENCHMARK_UPDATE_BASELINE=1 pytest mobile_store/test_query_counts.py
+"""
+
+import json
+import os
+import statistics
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from accessories.models import Accessory
+from accessories.views import AccessoryViewSet
+from cart.models import Cart, CartItem
+from cart.views import CartViewSet
+from customers.models import Customer
+from customers.views import CustomerViewSet
+from inventory.ledger import reconcile
+from orders.models import CheckoutTicket, Order, OrderItem
+from orders.views import OrderViewSet
+from payments.models import Payment
+from payments.views import PaymentViewSet
+from phones.models import Brand, MobilePhone
+from phones.views import BrandViewSet, MobilePhoneViewSet
+
+BASELINE_DIR = Path(__file__).parent
+
+# Extra queries allowed over the baseline, per action.
+QUERY_TOLERANCE = int(os.environ.get('BENCHMARK_QUERY_TOLERANCE', 0))
+# Allowed slowdown factor over the baseline median; 0 disables time checks.
+TIME_TOLERANCE = float(os.environ.get('BENCHMARK_TIME_TOLERANCE', 0))
+# Timings below this are noise and never fail.
+TIME_FLOOR_MS = 25
+REPEATS = 3
+
+BRANDS = 10
+PHONES_PER_BRAND = 10
+ACCESSORIES = 50
+ORDERS = 25
+ITEMS_PER_ORDER = 3
+CART_PHONES = 3
+CART_ACCESSORIES = 2
+
+VIEWSETS = [
+    BrandViewSet, MobilePhoneViewSet, AccessoryViewSet, CartViewSet,
+    OrderViewSet, PaymentViewSet, CustomerViewSet,
+]
+MODEL_ACTIONS = ['list', 'retrieve', 'create', 'update', 'partial_update', 'destroy']
+
+# (viewset action, method, url, user, data, expected status). Urls and data
+# are formatted with the ids seeded in setUpTestData; (name, content) tuples
+# in data are uploaded as files.
+CASES = [
+    ('BrandViewSet.list', 'get', '/api/phones/brands/', None, None, 200),
+    ('BrandViewSet.retrieve', 'get', '/api/phones/brands/{brand}/', None, None, 200),
+    ('BrandViewSet.create', 'post', '/api/phones/brands/', 'admin',
+     {'brand_name': 'Benchmark', 'country_of_origin': 'Nowhere'}, 201),
+    ('BrandViewSet.update', 'put', '/api/phones/brands/{brand}/', 'admin',
+     {'brand_name': 'Renamed', 'country_of_origin': 'Nowhere'}, 200),
+    ('BrandViewSet.partial_update', 'patch', '/api/phones/brands/{brand}/', 'admin',
+     {'country_of_origin': 'Elsewhere'}, 200),
+    ('BrandViewSet.destroy', 'delete', '/api/phones/brands/{brand}/', 'admin', None, 204),
+    ('BrandViewSet.reprice', 'post', '/api/phones/brands/{brand}/reprice/', 'admin', {'percent': '-10'}, 200),
+
+    ('MobilePhoneViewSet.list', 'get', '/api/phones/', None, None, 200),
+    ('MobilePhoneViewSet.retrieve', 'get', '/api/phones/{phone}/', None, None, 200),
+    ('MobilePhoneViewSet.create', 'post', '/api/phones/', 'admin', {
+        'brand': '{brand}', 'model_name': 'Benchmark X', 'price': '499.00',
+        'stock_quantity': 5, 'ram': '8GB', 'storage': '128GB',
+        'battery_capacity': '5000mAh', 'processor': 'Octa', 'os': 'Android',
+    }, 201),
+    ('MobilePhoneViewSet.update', 'put', '/api/phones/{phone}/', 'admin', {
+        'brand': '{brand}', 'model_name': 'Benchmark Y', 'price': '599.00',
+        'stock_quantity': 7, 'ram': '8GB', 'storage': '256GB',
+        'battery_capacity': '5000mAh', 'processor': 'Octa', 'os': 'Android',
+    }, 200),
+    ('MobilePhoneViewSet.partial_update', 'patch', '/api/phones/{phone}/', 'admin',
+     {'price': '549.00'}, 200),
+    ('MobilePhoneViewSet.destroy', 'delete', '/api/phones/{phone}/', 'admin', None, 204),
+    ('MobilePhoneViewSet.bulk_import', 'post', '/api/phones/import/', 'admin', {'file': (
+        'phones.csv',
+        'brand,model_name,price,stock_quantity,ram,storage,battery_capacity,processor,os\n'
+        + ''.join(
+            f'Brand {b},Model {b}-{p},199.00,5,8GB,128GB,5000mAh,Octa,Android\n'
+            for b in range(3) for p in range(10)
+        ),
+    )}, 200),
+    ('MobilePhoneViewSet.export', 'get', '/api/phones/export/', 'admin', None, 200),
+    ('MobilePhoneViewSet.changes', 'get', '/api/phones/changes/', None, None, 200),
+
+    ('AccessoryViewSet.list', 'get', '/api/accessories/', None, None, 200),
+    ('AccessoryViewSet.retrieve', 'get', '/api/accessories/{accessory}/', None, None, 200),
+    ('AccessoryViewSet.create', 'post', '/api/accessories/', 'admin',
+     {'name': 'Benchmark Case', 'category': 'Case', 'price': '19.99', 'stock_quantity': 10}, 201),
+    ('AccessoryViewSet.update', 'put', '/api/accessories/{accessory}/', 'admin',
+     {'name': 'Benchmark Charger', 'category': 'Charger', 'price': '29.99', 'stock_quantity': 3}, 200),
+    ('AccessoryViewSet.partial_update', 'patch', '/api/accessories/{accessory}/', 'admin',
+     {'price': '24.99'}, 200),
+    ('AccessoryViewSet.destroy', 'delete', '/api/accessories/{accessory}/', 'admin', None, 204),
+    ('AccessoryViewSet.bulk_import', 'post', '/api/accessories/import/', 'admin', {'file': (
+        'accessories.jsonl',
+        ''.join(
+            f'{{"name": "Accessory {a}", "category": "Case", "price": "9.99"}}\n' for a in range(30)
+        ),
+    )}, 200),
+    ('AccessoryViewSet.reprice', 'post', '/api/accessories/reprice/', 'admin',
+     {'category': 'Case', 'amount': '1.00'}, 200),
+    ('AccessoryViewSet.export', 'get', '/api/accessories/export/?export_format=jsonl', 'admin', None, 200),
+    ('AccessoryViewSet.changes', 'get', '/api/accessories/changes/', None, None, 200),
+
+    ('CartViewSet.list', 'get', '/api/cart/', 'customer', None, 200),
+    ('CartViewSet.retrieve', 'get', '/api/cart/{cart}/', 'customer', None, 200),
+    ('CartViewSet.update', 'put', '/api/cart/{cart}/', 'customer', {}, 200),
+    ('CartViewSet.partial_update', 'patch', '/api/cart/{cart}/', 'customer', {}, 200),
+    ('CartViewSet.destroy', 'delete', '/api/cart/{cart}/', 'customer', None, 204),
+    ('CartViewSet.my_cart', 'get', '/api/cart/my_cart/', 'customer', None, 200),
+    ('CartViewSet.add_item', 'post', '/api/cart/add_item/', 'customer',
+     {'product_type': 'PHONE', 'product_id': '{phone}', 'quantity': 1}, 201),
+    ('CartViewSet.update_item', 'patch', '/api/cart/update_item/', 'customer',
+     {'cart_item_id': '{cart_item}', 'quantity': 2}, 200),
+    ('CartViewSet.remove_item', 'delete', '/api/cart/remove_item/?cart_item_id={cart_item}',
+     'customer', None, 200),
+    ('CartViewSet.clear_cart', 'delete', '/api/cart/clear_cart/', 'customer', None, 200),
+
+    ('OrderViewSet.list', 'get', '/api/orders/', 'customer', None, 200),
+    ('OrderViewSet.retrieve', 'get', '/api/orders/{order}/', 'customer', None, 200),
+    ('OrderViewSet.update', 'put', '/api/orders/{order}/', 'customer',
+     {'status': 'PENDING', 'shipping_address': '2 New Street'}, 200),
+    ('OrderViewSet.partial_update', 'patch', '/api/orders/{order}/', 'customer',
+     {'notes': 'Leave at the door'}, 200),
+    ('OrderViewSet.destroy', 'delete', '/api/orders/{order}/', 'customer', None, 204),
+    ('OrderViewSet.my_orders', 'get', '/api/orders/my_orders/', 'customer', None, 200),
+    ('OrderViewSet.create_from_cart', 'post', '/api/orders/create_from_cart/', 'customer',
+     {'shipping_address': '1 Benchmark Street'}, 201),
+    ('OrderViewSet.update_status', 'patch', '/api/orders/{order}/update_status/', 'admin',
+     {'status': 'SHIPPED'}, 200),
+    ('OrderViewSet.cancel', 'post', '/api/orders/{order}/cancel/', 'customer', None, 200),
+    ('OrderViewSet.export', 'get', '/api/orders/export/', 'admin', None, 200),
+    ('OrderViewSet.checkout_ticket', 'get', '/api/orders/checkout-tickets/{ticket}/', 'customer', None, 200),
+
+    ('PaymentViewSet.list', 'get', '/api/payments/', 'customer', None, 200),
+    ('PaymentViewSet.retrieve', 'get', '/api/payments/{payment}/', 'customer', None, 200),
+    ('PaymentViewSet.create', 'post', '/api/payments/', 'admin',
+     {'order': '{order}', 'amount': '100.00', 'payment_method': 'UPI'}, 201),
+    ('PaymentViewSet.update', 'put', '/api/payments/{payment}/', 'admin',
+     {'order': '{paid_order}', 'amount': '100.00', 'payment_method': 'UPI', 'status': 'COMPLETED'}, 200),
+    ('PaymentViewSet.partial_update', 'patch', '/api/payments/{payment}/', 'admin',
+     {'notes': 'Checked'}, 200),
+    ('PaymentViewSet.destroy', 'delete', '/api/payments/{payment}/', 'admin', None, 204),
+    ('PaymentViewSet.my_payments', 'get', '/api/payments/my_payments/', 'customer', None, 200),
+    ('PaymentViewSet.create_payment', 'post', '/api/payments/create_payment/', 'customer',
+     {'order_id': '{order}', 'payment_method': 'CREDIT_CARD'}, 201),
+    ('PaymentViewSet.update_status', 'patch', '/api/payments/{payment}/update_status/', 'admin',
+     {'status': 'REFUNDED'}, 200),
+    ('PaymentViewSet.export', 'get', '/api/payments/export/?export_format=jsonl', 'admin', None, 200),
+
+    ('CustomerViewSet.list', 'get', '/api/customers/profiles/', 'admin', None, 200),
+    ('CustomerViewSet.retrieve', 'get', '/api/customers/profiles/{customer}/', 'customer', None, 200),
+    ('CustomerViewSet.create', 'post', '/api/customers/profiles/', 'admin',
+     {'name': 'New Customer', 'email': 'new@example.com', 'phone': '5550000'}, 201),
+    ('CustomerViewSet.update', 'put', '/api/customers/profiles/{customer}/', 'customer',
+     {'name': 'Bench Buyer', 'email': 'buyer@example.com', 'phone': '5551234'}, 200),
+    ('CustomerViewSet.partial_update', 'patch', '/api/customers/profiles/{customer}/', 'customer',
+     {'address': '3 Other Street'}, 200),
+    ('CustomerViewSet.destroy', 'delete', '/api/customers/profiles/{customer}/', 'admin', None, 204),
+    ('CustomerViewSet.me', 'get', '/api/customers/profiles/me/', 'customer', None, 200),
+    ('CustomerViewSet.update_profile', 'patch', '/api/customers/profiles/update_profile/', 'customer',
+     {'address': '4 Other Street'}, 200),
+    ('CustomerViewSet.change_password', 'post', '/api/customers/profiles/change_password/', 'customer',
+     {'old_password': 'Bench!Pass1', 'new_password': 'Bench!Pass2', 'new_password2': 'Bench!Pass2'}, 200),
+
+    ('StockSyncView.post', 'post', '/api/inventory/stock-sync/', 'admin', {'levels': [
+        {'product_type': 'PHONE', 'product_id': '{phone}', 'stock_quantity': 42},
+        {'product_type': 'ACCESSORY', 'product_id': '{accessory}', 'stock_quantity': 42},
+    ]}, 200),
+    ('StockAtView.get', 'get', '/api/inventory/stock-at/?product_type=PHONE&product_id={phone}', 'admin',
+     None, 200),
+]
+
+# Actions that cannot succeed as implemented, with the reason.
+NOT_BENCHMARKED = {
+    'CartViewSet.create': 'carts are created by my_cart/add_item; the serializer cannot set customer',
+    'OrderViewSet.create': 'orders are created by create_from_cart; the serializer cannot set customer',
+}
+
+
+def _format(value, ids):
+    if isinstance(value, tuple):
+        return value
+    if isinstance(value, str):
+        formatted = value.format(**ids)
+        return int(formatted) if value.startswith('{') and formatted.isdigit() else formatted
+    if isinstance(value, dict):
+        return {key: _format(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_format(item, ids) for item in value]
+    return value
+
+
+def _baseline_path():
+    return BASELINE_DIR / f'query_count_baseline.{connection.vendor}.json'
+
+
+def _load_baseline():
+    """Baseline of the current database vendor, or None if it has none."""
+    if not _baseline_path().exists():
+        return None
+    with open(_baseline_path()) as f:
+        return json.load(f)['actions']
+
+
+class QueryCountRegressionTest(TestCase):
+    """Benchmarks of query count and wall time for every viewset action."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed the benchmark dataset."""
+        brands = Brand.objects.bulk_create([
+            Brand(brand_name=f'Brand {b}', country_of_origin='Testland') for b in range(BRANDS)
+        ])
+        phones = MobilePhone.objects.bulk_create([
+            MobilePhone(
+                brand=brand,
+                model_name=f'Model {b}-{p}',
+                price=Decimal(100 + p * 10),
+                stock_quantity=100,
+                ram='8GB',
+                storage='128GB',
+                battery_capacity='5000mAh',
+                processor='Octa-core',
+                os='Android',
+            )
+            for b, brand in enumerate(brands) for p in range(PHONES_PER_BRAND)
+        ])
+        accessories = Accessory.objects.bulk_create([
+            Accessory(name=f'Accessory {a}', category='Case', price=Decimal('19.99'), stock_quantity=100)
+            for a in range(ACCESSORIES)
+        ])
+
+        admin = Customer.objects.create_superuser(
+            email='admin@example.com', password='Bench!Admin1', name='Admin', phone='5550001'
+        )
+        customer = Customer.objects.create_user(
+            email='buyer@example.com', password='Bench!Pass1', name='Buyer', phone='5551234'
+        )
+
+        cart = Cart.objects.create(customer=customer)
+        cart_items = CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product_type='PHONE', product_id=phone.pk) for phone in phones[:CART_PHONES]]
+            + [CartItem(cart=cart, product_type='ACCESSORY', product_id=accessory.pk)
+               for accessory in accessories[:CART_ACCESSORIES]]
+        )
+
+        orders = Order.objects.bulk_create([
+            Order(customer=customer, total_amount=Decimal('300.00'), shipping_address='1 Test Street')
+            for _ in range(ORDERS)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_type='PHONE',
+                product_id=phone.pk,
+                product_name=phone.model_name,
+                quantity=1,
+                price_at_purchase=phone.price,
+            )
+            for i, order in enumerate(orders)
+            for phone in phones[i:i + ITEMS_PER_ORDER]
+        ])
+        paid = orders[1:]
+        payments = Payment.objects.bulk_create([
+            Payment(order=order, amount=order.total_amount, payment_method='UPI', status='COMPLETED')
+            for order in paid
+        ])
+        Order.objects.filter(pk__in=[order.pk for order in paid]).update(status='CONFIRMED')
+        ticket = CheckoutTicket.objects.create(
+            customer=customer, shipping_address='1 Test Street', status='COMPLETED', order=orders[-1]
+        )
+        # Opening ledger balances for the bulk-created products.
+        reconcile(fix=True)
+
+        cls.ids = {
+            'brand': brands[-1].pk,
+            'phone': phones[-1].pk,
+            'accessory': accessories[-1].pk,
+            'cart': cart.pk,
+            'cart_item': cart_items[0].pk,
+            'order': orders[0].pk,
+            'paid_order': paid[0].pk,
+            'payment': payments[0].pk,
+            'customer': customer.pk,
+            'ticket': ticket.pk,
+        }
+        cls.tokens = {
+            'admin': str(RefreshToken.for_user(admin).access_token),
+            'customer': str(RefreshToken.for_user(customer).access_token),
+        }
+
+    def measure(self, method, url, user, data):
+        """
+        Run a request REPEATS times, rolling back after each run.
+
+        Returns:
+            Tuple of (status codes, query counts, median wall time in ms)
+        """
+        statuses, counts, timings = [], [], []
+        for _ in range(REPEATS):
+            client = APIClient()
+            if user:
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens[user]}')
+            payload, request_format = data, 'json'
+            if data and any(isinstance(value, tuple) for value in data.values()):
+                payload = {
+                    key: SimpleUploadedFile(value[0], value[1].encode()) if isinstance(value, tuple) else value
+                    for key, value in data.items()
+                }
+                request_format = 'multipart'
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, payload, format=request_format)
+                    if response.streaming:
+                        # Streamed bodies query the database while being consumed.
+                        b''.join(response.streaming_content)
+                    timings.append((time.perf_counter() - start) * 1000)
+                transaction.set_rollback(True)
+            statuses.append(response.status_code)
+            counts.append(len(queries))
+        return statuses, counts, statistics.median(timings)
+
+    def test_every_action_is_benchmarked(self):
+        """Test that a new viewset action cannot be added without a benchmark."""
+        benchmarked = {name for name, *_ in CASES} | set(NOT_BENCHMARKED)
+        for viewset in VIEWSETS:
+            actions = MODEL_ACTIONS + [action.__name__ for action in viewset.get_extra_actions()]
+            for action in actions:
+                self.assertIn(f'{viewset.__name__}.{action}', benchmarked)
+
+    def test_query_counts_and_timings(self):
+        """Test every action against the checked-in baseline."""
+        update = bool(os.environ.get('BENCHMARK_UPDATE_BASELINE'))
+        baseline = _load_baseline()
+        if baseline is None and not update:
+            self.skipTest(f'No query count baseline for {connection.vendor}')
+        results = {}
+
+        for name, method, url, user, data, expected_status in CASES:
+            with self.subTest(action=name):
+                statuses, counts, median_ms = self.measure(
+                    method, _format(url, self.ids), user, _format(data, self.ids)
+                )
+                self.assertEqual(set(statuses), {expected_status})
+                results[name] = {'queries': max(counts), 'time_ms': round(median_ms, 2)}
+
+                if update or name not in baseline:
+                    continue
+                expected = baseline[name]
+                self.assertLessEqual(
+                    results[name]['queries'], expected['queries'] + QUERY_TOLERANCE,
+                    f'{name} issues {results[name]["queries"]} queries, baseline {expected["queries"]}',
+                )
+                if TIME_TOLERANCE:
+                    limit = max(expected['time_ms'] * TIME_TOLERANCE, TIME_FLOOR_MS)
+                    self.assertLessEqual(
+                        results[name]['time_ms'], limit,
+                        f'{name} took {results[name]["time_ms"]}ms, baseline {expected["time_ms"]}ms',
+                    )
+
+        if update:
+            with open(_baseline_path(), 'w') as f:
+                json.dump({'dataset': {
+                    'brands': BRANDS,
+                    'phones': BRANDS * PHONES_PER_BRAND,
+                    'accessories': ACCESSORIES,
+                    'orders': ORDERS,
+                    'items_per_order': ITEMS_PER_ORDER,
+                    'cart_items': CART_PHONES + CART_ACCESSORIES,
+                }, 'actions': results}, f, indent=2, sort_keys=True)
+                f.write('\n')
+        else:
+            missing = sorted(set(results) - set(baseline))
+            self.assertFalse(missing, f'No baseline for {missing}; regenerate the baseline')
@@ -0,0 +1,627 @@
+"""
+Tests for project-level utilities (metrics, health probes, load testing, load data, admin).
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+from django.core.cache import caches
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cart.models import Cart, CartItem
+from customers.models import Customer
+from orders.models import Order, OrderItem
+from payments.models import Payment
+from phones.models import Brand, MobilePhone
+from . import loadtest
+from .admin_utils import EstimatedCountPaginator
+from .benchmarks import HTTPClient
+from .load_data import LoadDataGenerator
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsEndpointTest(TestCase):
+    """Test cases for the /metrics endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        brand = Brand.objects.create(brand_name='Apple', country_of_origin='USA')
+        MobilePhone.objects.create(
+            brand=brand,
+            model_name='iPhone 15',
+            price=Decimal('999.99'),
+            stock_quantity=10,
+            ram='8GB',
+            storage='256GB',
+            battery_capacity='3200mAh',
+            processor='A17 Pro',
+            os='iOS',
+        )
+
+    def test_viewset_actions_are_labelled(self):
+        """Test that requests are labelled by viewset and action."""
+        self.client.get('/api/phones/')
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('view="MobilePhoneViewSet.list"', body)
+        self.assertIn('mobile_store_db_queries_per_request_bucket', body)
+
+    def test_metrics_restricted_by_ip(self):
+        """Test that other addresses cannot scrape metrics."""
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.8')
+        self.assertEqual(response.status_code, 403)
+
+
+class HealthProbeTest(TestCase):
+    """Test cases for the cached health and readiness probes."""
+
+    def setUp(self):
+        """Refresh the monitor once from a separate thread, like the worker does."""
+        from mobile_store.health import monitor
+
+        self.monitor = monitor
+        patcher = mock.patch.object(monitor, 'ensure_started')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        refresher = threading.Thread(target=monitor.refresh)
+        refresher.start()
+        refresher.join()
+
+    def test_health_served_from_snapshot(self):
+        """Test that probes do not query the database."""
+        with self.assertNumQueries(0):
+            response = self.client.get('/health/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'healthy')
+        self.assertNotIn('python_version', response.json())
+        self.assertIn('latency_ms', response.json()['checks']['database'])
+
+    def test_ready_reports_dependencies(self):
+        """Test that readiness reports migrations and storage."""
+        response = self.client.get('/ready/')
+
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual(checks['migrations']['status'], 'ok')
+        self.assertIn('media_storage', checks)
+
+    @override_settings(HEALTH_CHECK_STALE_AFTER=-1)
+    def test_stale_snapshot_is_not_ready(self):
+        """Test that a worker with a stalled monitor leaves rotation."""
+        response = self.client.get('/ready/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('stale health data', response.json()['reasons'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTest(TestCase):
+    """Test cases for read-replica routing and primary stickiness."""
+
+    def setUp(self):
+        """Route replica reads back to the test database and record them."""
+        patcher = mock.patch('mobile_store.db_router.replica_alias', return_value='default')
+        self.replica_alias = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def test_catalog_reads_use_replica(self):
+        """Test that anonymous catalog browsing reads from a replica."""
+        response = self.client.get('/api/phones/brands/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.replica_alias.called)
+
+    def test_cart_reads_stay_on_primary(self):
+        """Test that non-catalog endpoints never read from a replica."""
+        self.client.get('/api/cart/my_cart/')
+        self.assertFalse(self.replica_alias.called)
+
+    def test_writes_pin_client_to_primary(self):
+        """Test that a successful write keeps the client on the primary."""
+        from mobile_store.db_router import PIN_COOKIE_NAME
+
+        response = self.client.post('/api/customers/register/', {
+            'name': 'Test User',
+            'email': 'test@example.com',
+            'password': 'S3cure!pass',
+            'password2': 'S3cure!pass',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+
+        self.client.get('/api/phones/brands/')
+        self.assertFalse(self.replica_alias.called)
+
+    def test_writes_pin_token_clients_without_cookies(self):
+        """Test that a user is pinned by id when the client sends no cookies."""
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from .models import PrimaryPin
+
+        user = Customer.objects.create_user(email='buyer@example.com', password='S3cure!pass')
+        token = str(RefreshToken.for_user(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.delete('/api/cart/clear_cart/')
+        self.assertLess(response.status_code, 400)
+
+        self.client.cookies.clear()
+        self.client.get('/api/phones/brands/')
+        self.assertFalse(self.replica_alias.called)
+
+        PrimaryPin.objects.update(expires_at=timezone.now())
+        self.client.get('/api/phones/brands/')
+        self.assertTrue(self.replica_alias.called)
+
+
+class LoadTestHarnessTest(LiveServerTestCase):
+    """Test cases for the load-test scenarios against a live server."""
+
+    def setUp(self):
+        """Set up test data."""
+        brand = Brand.objects.create(brand_name='Apple', country_of_origin='USA')
+        MobilePhone.objects.create(
+            brand=brand,
+            model_name='iPhone 15',
+            price=Decimal('999.99'),
+            stock_quantity=1000,
+            ram='8GB',
+            storage='256GB',
+            battery_capacity='3200mAh',
+            processor='A17 Pro',
+            os='iOS',
+        )
+
+    @mock.patch('rest_framework.views.APIView.get_throttles', return_value=[])
+    def test_checkout_funnel_completes(self, get_throttles):
+        """Test that the checkout scenario logs in, orders and pays."""
+        customers = loadtest.prepare_customers(1, 'LoadTest!2024')
+        host, port = self.server_thread.host, self.server_thread.port
+
+        results, iterations = asyncio.run(loadtest.run_scenarios(
+            lambda: HTTPClient(host, port), loadtest.Catalog.load(), {'checkout': 1},
+            concurrency=1, duration=0.5, customers=customers, password='LoadTest!2024',
+        ))
+
+        self.assertGreater(iterations['checkout'], 0)
+        for step in ('login', 'add_item', 'create_from_cart', 'create_payment'):
+            self.assertEqual(results[step]['errors'], 0)
+        self.assertEqual(set(results['create_payment']['statuses']), {201})
+
+    def test_compare_reports(self):
+        """Test that reports are compared step by step."""
+        baseline = {
+            'total': {'throughput_rps': 100, 'p50_ms': 10, 'p99_ms': 50, 'error_rate': 0},
+            'requests': {'phone_list': {'throughput_rps': 50, 'p50_ms': 8, 'p99_ms': 40, 'error_rate': 0}},
+        }
+        current = {
+            'total': {'throughput_rps': 120, 'p50_ms': 9, 'p99_ms': 45, 'error_rate': 0},
+            'requests': {'phone_list': {'throughput_rps': 60, 'p50_ms': 6, 'p99_ms': 30, 'error_rate': 0}},
+        }
+
+        comparison = loadtest.compare_reports(baseline, current)
+
+        self.assertEqual(comparison['total']['throughput_rps']['change_pct'], 20.0)
+        self.assertEqual(comparison['phone_list']['p50_ms']['change_pct'], -25.0)
+        self.assertIsNone(comparison['total']['error_rate']['change_pct'])
+
+
+class LoadDataGeneratorTest(TestCase):
+    """Test cases for the synthetic data generator."""
+
+    counts = {
+        'brands': 3, 'phones': 30, 'accessories': 20,
+        'customers': 10, 'orders': 50, 'carts': 5,
+    }
+
+    def generate(self):
+        loaded = LoadDataGenerator(self.counts, seed=7).run()
+        orders = Order.objects.order_by('-pk')[:self.counts['orders']]
+        return loaded, [(order.status, order.total_amount) for order in reversed(orders)]
+
+    def test_generates_requested_rows(self):
+        """Test that every table gets the requested rows with consistent totals."""
+        loaded, _ = self.generate()
+
+        self.assertEqual(loaded['phones.MobilePhone'], 30)
+        self.assertEqual(Customer.objects.count(), 10)
+        self.assertEqual(Cart.objects.count(), 5)
+        for order in Order.objects.prefetch_related('items'):
+            self.assertEqual(
+                order.total_amount,
+                sum(item.price_at_purchase * item.quantity for item in order.items.all()),
+            )
+        unpaid = Order.objects.filter(status__in=['PENDING', 'CANCELLED'])
+        self.assertFalse(Payment.objects.filter(order__in=unpaid).exists())
+
+    def test_same_seed_same_data(self):
+        """Test that generation is deterministic and sequences are reset."""
+        _, first = self.generate()
+        _, second = self.generate()
+
+        self.assertEqual(first, second)
+        brand = Brand.objects.create(brand_name='After Load', country_of_origin='USA')
+        self.assertGreater(brand.pk, Brand.objects.exclude(pk=brand.pk).order_by('-pk')[0].pk)
+
+
+class AdminChangelistTest(TestCase):
+    """Test cases for admin changelists over large tables."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = Customer.objects.create_superuser(
+            email='admin@example.com', password='Admin!Pass1', name='Admin', phone='5550001'
+        )
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='Galaxy', price=Decimal('100.00'), stock_quantity=5, ram='8GB',
+            storage='128GB', battery_capacity='4000mAh', processor='Exynos', os='Android'
+        )
+        self.client.force_login(self.admin)
+        caches['local'].clear()
+
+    def add_customers(self, count):
+        for _ in range(count):
+            i = Customer.objects.count()
+            customer = Customer.objects.create_user(
+                email=f'c{i}@example.com', password='x', name=f'Customer {i}', phone=f'555{i:04d}'
+            )
+            order = Order.objects.create(customer=customer, total_amount=Decimal('200.00'), shipping_address='1 St')
+            OrderItem.objects.create(
+                order=order, product_type='PHONE', product_id=self.phone.pk, product_name='Galaxy',
+                quantity=2, price_at_purchase=Decimal('100.00')
+            )
+            Payment.objects.create(order=order, amount=order.total_amount, payment_method='UPI')
+            cart = Cart.objects.create(customer=customer)
+            CartItem.objects.create(cart=cart, product_type='PHONE', product_id=self.phone.pk, quantity=3)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that changelists with computed columns have no N+1 queries."""
+        for url in ['/admin/orders/order/', '/admin/cart/cart/', '/admin/cart/cartitem/',
+                    '/admin/payments/payment/', '/admin/phones/mobilephone/']:
+            with self.subTest(url=url):
+                self.add_customers(2)
+                # Warm the cached filter choices.
+                self.client.get(url)
+                _, few = self.changelist_queries(url)
+                self.add_customers(5)
+                _, many = self.changelist_queries(url)
+                self.assertEqual(few, many)
+
+    def test_cart_totals_are_annotated(self):
+        """Test that the cart changelist shows totals from current prices."""
+        self.add_customers(1)
+        response, _ = self.changelist_queries('/admin/cart/cart/')
+        self.assertContains(response, '300.00')
+
+    def test_paginator_uses_estimate_for_unfiltered_tables(self):
+        """Test that only unfiltered changelists trust the planner estimate."""
+        self.add_customers(3)
+        with mock.patch('mobile_store.admin_utils.estimated_row_count', return_value=5000000):
+            self.assertEqual(EstimatedCountPaginator(Order.objects.all(), 50).count, 5000000)
+            self.assertEqual(EstimatedCountPaginator(Order.objects.filter(status='PENDING'), 50).count, 3)
+        with mock.patch('mobile_store.admin_utils.estimated_row_count', return_value=None):
+            self.assertEqual(EstimatedCountPaginator(Order.objects.all(), 50).count, 3)
+
+
+class ContentAddressedStorageTest(TestCase):
+    """Test cases for content-addressed media storage and serving."""
+
+    def setUp(self):
+        """Set up test data."""
+        import shutil
+        import tempfile
+        from .storage import ContentAddressedStorage
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = ContentAddressedStorage()
+
+    def save(self, name, data):
+        from django.core.files.base import ContentFile
+        return self.storage.save(name, ContentFile(data))
+
+    def test_names_are_content_hashes(self):
+        """Test that identical uploads share a file and new content gets a new name."""
+        import hashlib
+        first = self.save('phones/galaxy.PNG', b'image bytes')
+        digest = hashlib.sha256(b'image bytes').hexdigest()[:32]
+
+        self.assertEqual(first, f'phones/{digest[:2]}/{digest}.png')
+        self.assertEqual(self.save('phones/copy.png', b'image bytes'), first)
+        self.assertNotEqual(self.save('phones/galaxy.png', b'edited bytes'), first)
+
+        self.storage.delete(first)
+        self.assertTrue(self.storage.exists(first))
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/', PROTECTED_MEDIA_PREFIXES=['private/'])
+    def test_media_is_handed_to_nginx(self):
+        """Test that media responses are immutable X-Accel-Redirects without a body."""
+        name = self.save('phones/galaxy.png', b'image bytes')
+
+        response = self.client.get(f'/media/{name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{name}')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+        private = self.save('private/invoice.pdf', b'pdf bytes')
+        self.assertEqual(self.client.get(f'/media/{private}').status_code, 404)
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+        admin = Customer.objects.create_superuser(
+            email='admin@example.com', password='Admin!Pass1', name='Admin', phone='5550001'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(f'/media/{private}')
+        self.assertEqual(response['Cache-Control'], 'private, max-age=31536000, immutable')
+
+    def test_prune_media_keeps_referenced_files(self):
+        """Test that only old, unreferenced product files are deleted."""
+        import os
+        from io import StringIO
+        from django.core.management import call_command
+
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        used = self.save('phones/used.png', b'used bytes')
+        unused = self.save('phones/unused.png', b'unused bytes')
+        MobilePhone.objects.create(
+            brand=brand, model_name='Galaxy S24', price=Decimal('799.99'), stock_quantity=5, ram='8GB',
+            storage='128GB', battery_capacity='4000mAh', processor='Chip', os='Android', image=used,
+            image_derivatives={'source': used, 'sizes': {}}
+        )
+
+        call_command('prune_media', stdout=StringIO())
+        self.assertTrue(self.storage.exists(unused))
+
+        call_command('prune_media', '--min-age', '0', stdout=StringIO())
+        self.assertTrue(self.storage.exists(used))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, unused)))
+
+
+class ImageUploadValidationTest(TestCase):
+    """Test cases for streaming upload handling and image validation."""
+
+    def setUp(self):
+        """Set up test data."""
+        import shutil
+        import tempfile
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, IMAGE_DERIVATIVES_IN_BACKGROUND=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        admin = Customer.objects.create_superuser(
+            email='admin@example.com', password='Admin!Pass1', name='Admin', phone='5550001'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def image(self, name='galaxy.jpg', image_format='JPEG', size=(64, 48)):
+        import io
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        output = io.BytesIO()
+        Image.new('RGB', size, (20, 90, 200)).save(output, image_format)
+        return SimpleUploadedFile(name, output.getvalue())
+
+    def create(self, image):
+        return self.client.post('/api/phones/', {
+            'brand': self.brand.pk, 'model_name': 'Galaxy S24', 'price': '799.99', 'stock_quantity': 5,
+            'ram': '8GB', 'storage': '128GB', 'battery_capacity': '4000mAh', 'processor': 'Chip',
+            'os': 'Android', 'image': image,
+        }, format='multipart')
+
+    def test_valid_images_are_accepted(self):
+        """Test that JPEG, PNG and WebP uploads pass header validation."""
+        from .validators import validate_image_file
+        for name, image_format in [('a.jpg', 'JPEG'), ('b.png', 'PNG'), ('c.webp', 'WEBP')]:
+            with self.subTest(image_format=image_format):
+                validate_image_file(self.image(name, image_format))
+        self.assertEqual(self.create(self.image()).status_code, 201)
+
+    def test_content_is_checked_not_extension(self):
+        """Test that magic bytes, truncation and dimensions are validated."""
+        from django.core.exceptions import ValidationError
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .validators import validate_image_file
+
+        jpeg = self.image().read()
+        cases = {
+            'not an image': SimpleUploadedFile('fake.jpg', b'<?php echo 1; ?>' * 10),
+            'truncated': SimpleUploadedFile('cut.jpg', jpeg[:len(jpeg) // 2]),
+            'too large': self.image(size=(200, 10)),
+        }
+        with mock.patch('mobile_store.validators.MAX_IMAGE_DIMENSION', 100):
+            for case, upload in cases.items():
+                with self.subTest(case=case), self.assertRaises(ValidationError):
+                    validate_image_file(upload)
+
+        response = self.create(cases['not an image'])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data['error']['details'])
+
+    def test_oversized_upload_is_rejected_while_streaming(self):
+        """Test that the upload handler aborts an image over the limit."""
+        with mock.patch('mobile_store.uploads.MAX_UPLOAD_SIZE', 1024), \
+                mock.patch('mobile_store.uploads.TemporaryFileUploadHandler.receive_data_chunk') as write:
+            response = self.create(self.image(size=(400, 400)))
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(write.call_count, 0)
+        self.assertFalse(MobilePhone.objects.exists())
+
+
+@override_settings(LIVE_UPDATES_HEARTBEAT=5, LIVE_UPDATES_MAX_DURATION=1, LIVE_UPDATES_MAX_PRODUCTS=3)
+class LiveUpdatesTest(TestCase):
+    """Test cases for the server-sent events stream of stock and price changes."""
+
+    def setUp(self):
+        """Set up test data."""
+        brand = Brand.objects.create(brand_name='Apple', country_of_origin='USA')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='iPhone 15', price=Decimal('999.99'), stock_quantity=10,
+            ram='8GB', storage='256GB', battery_capacity='3200mAh', processor='A16', os='iOS'
+        )
+
+    def sell(self, quantity):
+        from inventory.ledger import record
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MobilePhone.objects.filter(pk=self.phone.pk).update(stock_quantity=10 - quantity)
+            record('SALE', [(('PHONE', self.phone.pk), -quantity)], 'order:1')
+
+    def reprice(self, price):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone.price = price
+            self.phone.save()
+
+    async def test_stream_sends_snapshot_then_changes(self):
+        """Test that a subscriber gets the current state, then pushed updates."""
+        from asgiref.sync import sync_to_async
+        from .live import hub
+
+        response = await self.async_client.get('/api/catalog/live/', {'phones': str(self.phone.pk)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+
+        events = response.streaming_content
+        self.assertTrue((await anext(events)).startswith(b'retry:'))
+        self.assertIn(b'"stock_quantity": 10', await anext(events))
+        self.assertEqual(hub.watched('PHONE'), [self.phone.pk])
+
+        await sync_to_async(self.sell)(3)
+        self.assertIn(b'"stock_quantity": 7, "is_in_stock": true', await anext(events))
+        await sync_to_async(self.reprice)(Decimal('899.00'))
+        self.assertIn(b'"price": "899.00"', await anext(events))
+
+        # The stream ends after LIVE_UPDATES_MAX_DURATION; the client reconnects.
+        self.assertEqual([chunk async for chunk in events], [])
+        self.assertEqual(hub.watched('PHONE'), [])
+
+    async def test_updates_are_coalesced_per_product(self):
+        """Test that a slow subscriber only gets the latest state of a product."""
+        from .live import hub, product_update
+
+        subscription = hub.subscribe([('PHONE', 1)])
+        try:
+            for stock in (5, 4, 3):
+                hub.publish(product_update('PHONE', 1, stock, Decimal('1.00')))
+            hub.publish(product_update('PHONE', 2, 9, Decimal('1.00')))
+            await asyncio.sleep(0)
+            updates = await subscription.next(1)
+            self.assertEqual([update['stock_quantity'] for update in updates], [3])
+            self.assertEqual(await subscription.next(0.01), [])
+        finally:
+            hub.unsubscribe(subscription)
+
+    async def test_invalid_subscriptions_are_rejected(self):
+        """Test the product id validation."""
+        for params in ({}, {'phones': 'abc'}, {'phones': '1,2', 'accessories': '3,4'}):
+            response = await self.async_client.get('/api/catalog/live/', params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+
+    def test_wsgi_explains_stream_needs_asgi(self):
+        """Test that the stream is not served by sync workers."""
+        response = self.client.get('/api/catalog/live/', {'phones': str(self.phone.pk)})
+        self.assertEqual(response.status_code, 503)
+
+
+@override_settings(CATALOG_CHANGES_LAG=0, CATALOG_SNAPSHOT_KEEP=2)
+class CatalogSnapshotTest(TestCase):
+    """Test cases for the precomputed static catalog snapshot."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        brand = Brand.objects.create(brand_name='Apple', country_of_origin='USA')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='iPhone 15', price=Decimal('999.99'), stock_quantity=10,
+            ram='8GB', storage='256GB', battery_capacity='3200mAh', processor='A16', os='iOS'
+        )
+        MobilePhone.objects.create(
+            brand=brand, model_name='iPhone 15 Pro', price=Decimal('1199.99'), stock_quantity=5,
+            ram='8GB', storage='512GB', battery_capacity='3300mAh', processor='A17', os='iOS'
+        )
+
+    def test_build_writes_versioned_compressed_files(self):
+        """Test that a build writes every document, its gzip copy and the manifest."""
+        from .snapshot import build_snapshot, read_manifest
+
+        manifest = build_snapshot(self.root)
+        self.assertEqual(read_manifest(self.root), manifest)
+        self.assertEqual(set(manifest['files']), {'brands', 'phones', 'accessories', 'facets'})
+        directory = Path(self.root) / manifest['version']
+        for name in manifest['files']:
+            content = (directory / f'{name}.json').read_bytes()
+            self.assertEqual(gzip.decompress((directory / f'{name}.json.gz').read_bytes()), content)
+            self.assertEqual(manifest['files'][name], f"/catalog/{manifest['version']}/{name}.json")
+
+        phones = json.loads((directory / 'phones.json').read_bytes())
+        self.assertEqual(phones['count'], 2)
+        facets = json.loads((directory / 'facets.json').read_bytes())['phones']
+        self.assertEqual(facets['brand'][0]['count'], 2)
+        self.assertEqual(facets['storage'], [{'value': '256GB', 'count': 1}, {'value': '512GB', 'count': 1}])
+        self.assertEqual(facets['price'], {'min': '999.99', 'max': '1199.99'})
+
+    def test_rebuilds_only_when_catalog_changes(self):
+        """Test that an unchanged catalog keeps its version and a change gets a new one."""
+        from .snapshot import build_snapshot
+
+        first = build_snapshot(self.root)
+        self.assertIsNone(build_snapshot(self.root))
+        self.assertEqual(build_snapshot(self.root, force=True)['version'], first['version'])
+
+        self.phone.stock_quantity = 3
+        self.phone.save()
+        second = build_snapshot(self.root)
+        self.assertNotEqual(second['version'], first['version'])
+
+    def test_manifest_cursor_follows_change_feed(self):
+        """Test that the manifest cursor picks up changes made after the build."""
+        from .snapshot import build_snapshot
+
+        manifest = build_snapshot(self.root)
+        MobilePhone.objects.filter(pk=self.phone.pk).update(stock_quantity=1, updated_at=timezone.now())
+        response = APIClient().get('/api/phones/changes/', {'since': manifest['changes']['phones']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['phone_id'] for row in response.data['changes']], [self.phone.pk])
+
+    def test_prune_keeps_newest_versions(self):
+        """Test that old versions are deleted but the current one is kept."""
+        from .snapshot import prune_versions
+
+        for age, name in enumerate(['c', 'b', 'a', 'current']):
+            (Path(self.root) / name).mkdir()
+            os.utime(Path(self.root) / name, (1000 - age, 1000 - age))
+        self.assertEqual(prune_versions(self.root, keep=2, current='current'), ['a'])
+        self.assertEqual(sorted(os.listdir(self.root)), ['b', 'c', 'current'])
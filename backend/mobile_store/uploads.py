@@ -0,0 +1,49 @@
+"""
+Memory-bounded handling of multipart uploads.
+
+``StreamingUploadHandler`` is the only entry in ``FILE_UPLOAD_HANDLERS``: every
+uploaded file is written chunk by chunk to a temporary file, never buffered in
+the worker's memory, and an image that grows past ``MAX_UPLOAD_SIZE`` aborts
+the request while its body is still being read. The content itself is checked
+by ``validators.validate_image_file``, which only parses image headers.
+"""
+
+import os
+
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from .constants import ALLOWED_IMAGE_EXTENSIONS, MAX_UPLOAD_SIZE
+
+
+def is_image_upload(file_name, content_type):
+    """Whether a multipart file part claims to be an image."""
+    extension = os.path.splitext(file_name or '')[1].lstrip('.').lower()
+    return extension in ALLOWED_IMAGE_EXTENSIONS or (content_type or '').startswith('image/')
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream uploads to temporary files, enforcing the image size limit.
+
+    Other files (e.g. catalog imports) are streamed the same way without a
+    per-file limit; the proxy's body size limit still applies.
+    """
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args, **kwargs):
+        self.max_size = MAX_UPLOAD_SIZE if is_image_upload(file_name, content_type) else None
+        if self.max_size is not None and content_length is not None and content_length > self.max_size:
+            self.too_big()
+        super().new_file(field_name, file_name, content_type, content_length, *args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.max_size is not None and self.received > self.max_size:
+            self.upload_interrupted()
+            self.too_big()
+        return super().receive_data_chunk(raw_data, start)
+
+    def too_big(self):
+        raise RequestDataTooBig(
+            f'File size cannot exceed {MAX_UPLOAD_SIZE / (1024 * 1024)}MB'
+        )
@@ -2,6 +2,8 @@
 URL configuration for mobile_store project.
 """
 from django.contrib import admin
+from urllib.parse import urlsplit
+
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
@@ -9,6 +11,9 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from .health import health_check, ready_check
+from .live import live_updates_unavailable
+from .metrics import metrics_view
+from .storage import media_file
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -29,6 +34,7 @@ urlpatterns = [
     # Health check endpoints
     path('health/', health_check, name='health-check'),
     path('ready/', ready_check, name='ready-check'),
+    path('metrics', metrics_view, name='metrics'),
     
     # API Documentation
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -41,8 +47,14 @@ urlpatterns = [
     path('api/cart/', include('cart.urls')),
     path('api/orders/', include('orders.urls')),
     path('api/payments/', include('payments.urls')),
+    path('api/inventory/', include('inventory.urls')),
+    path('api/catalog/live/', live_updates_unavailable, name='catalog-live'),
 ]
 
+if not urlsplit(settings.MEDIA_URL).netloc:
+    # Reached in development and for protected media; nginx serves the rest.
+    urlpatterns.append(path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", media_file, name='media'))
+
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    urlpatterns += static(settings.CATALOG_SNAPSHOT_URL, document_root=settings.CATALOG_SNAPSHOT_ROOT)
@@ -0,0 +1,50 @@
+"""
+URL configuration for requests served through ASGI (mobile_store/asgi.py).
+
+The read-only catalog and health endpoints are served by native async views;
+writes to the same URLs and every other route fall through to the regular
+URL configuration. Selected per request by ASGIURLConfMiddleware.
+"""
+from django.urls import path
+from accessories import async_views as accessory_views
+from accessories.views import AccessoryViewSet
+from phones import async_views as phone_views
+from phones.views import BrandViewSet, MobilePhoneViewSet
+from .async_views import async_read_view
+from .health import health_check_async, ready_check_async
+from .live import live_updates
+from .urls import urlpatterns as sync_urlpatterns
+
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}
+
+urlpatterns = [
+    path('health/', health_check_async, name='health-check-async'),
+    path('ready/', ready_check_async, name='ready-check-async'),
+
+    path('api/catalog/live/', live_updates, name='catalog-live-async'),
+
+    path('api/phones/', async_read_view(
+        phone_views.phone_list, MobilePhoneViewSet.as_view(LIST_ACTIONS)
+    ), name='phone-list-async'),
+    path('api/phones/<int:pk>/', async_read_view(
+        phone_views.phone_detail, MobilePhoneViewSet.as_view(DETAIL_ACTIONS)
+    ), name='phone-detail-async'),
+    path('api/phones/brands/', async_read_view(
+        phone_views.brand_list, BrandViewSet.as_view(LIST_ACTIONS)
+    ), name='brand-list-async'),
+    path('api/phones/brands/<int:pk>/', async_read_view(
+        phone_views.brand_detail, BrandViewSet.as_view(DETAIL_ACTIONS)
+    ), name='brand-detail-async'),
+    path('api/accessories/', async_read_view(
+        accessory_views.accessory_list, AccessoryViewSet.as_view(LIST_ACTIONS)
+    ), name='accessory-list-async'),
+    path('api/accessories/<int:pk>/', async_read_view(
+        accessory_views.accessory_detail, AccessoryViewSet.as_view(DETAIL_ACTIONS)
+    ), name='accessory-detail-async'),
+] + sync_urlpatterns
@@ -3,36 +3,100 @@ Custom validators for the mobile_store project.
 """
 
 import re
+from PIL import Image
 from django.core.exceptions import ValidationError
 from django.core.validators import EmailValidator, RegexValidator
 from .constants import (
     MAX_UPLOAD_SIZE,
     ALLOWED_IMAGE_EXTENSIONS,
+    MAX_IMAGE_DIMENSION,
+    MAX_IMAGE_PIXELS,
     MIN_PASSWORD_LENGTH,
+    MAX_PRICE,
+    MAX_STOCK_QUANTITY,
 )
 
 
+# Leading bytes of each allowed format, checked before Pillow sees the file.
+IMAGE_SIGNATURES = {
+    'JPEG': lambda head: head.startswith(b'\xff\xd8\xff'),
+    'PNG': lambda head: head.startswith(b'\x89PNG\r\n\x1a\n'),
+    'WEBP': lambda head: head[:4] == b'RIFF' and head[8:12] == b'WEBP',
+}
+
+
+def sniff_image_format(head):
+    """
+    Identify an image format from its magic bytes.
+
+    Args:
+        head: First 12 bytes of the file
+
+    Returns:
+        Pillow format name, or None if not an allowed format
+    """
+    for image_format, matches in IMAGE_SIGNATURES.items():
+        if matches(head):
+            return image_format
+    return None
+
+
 def validate_image_file(file):
     """
-    Validate uploaded image file size and extension.
-    
+    Validate uploaded image file size, extension, content and dimensions.
+
+    Only the image header is parsed: dimensions come from Pillow's lazy
+    ``Image.open``, and JPEGs are test-decoded in draft mode at 1/8 scale, so
+    no upload is ever decoded at full size. Files already in storage are
+    not re-read.
+
     Args:
         file: The uploaded file object
-        
+
     Raises:
-        ValidationError: If file size exceeds limit or extension is invalid
+        ValidationError: If file size exceeds limit, extension is invalid or
+            the content is not a well-formed image of the allowed size
     """
+    if getattr(file, '_committed', False):
+        return
+
     if file.size > MAX_UPLOAD_SIZE:
         raise ValidationError(
             f'File size cannot exceed {MAX_UPLOAD_SIZE / (1024 * 1024)}MB'
         )
-    
+
     ext = file.name.split('.')[-1].lower()
     if ext not in ALLOWED_IMAGE_EXTENSIONS:
         raise ValidationError(
             f'Invalid file extension. Allowed: {", ".join(ALLOWED_IMAGE_EXTENSIONS)}'
         )
 
+    file.seek(0)
+    image_format = sniff_image_format(file.read(12))
+    file.seek(0)
+    if image_format is None:
+        raise ValidationError('File content is not a JPEG, PNG or WebP image')
+
+    try:
+        with Image.open(file, formats=[image_format]) as image:
+            width, height = image.size
+            if max(width, height) > MAX_IMAGE_DIMENSION or width * height > MAX_IMAGE_PIXELS:
+                raise ValidationError(
+                    f'Image dimensions cannot exceed {MAX_IMAGE_DIMENSION}px per side '
+                    f'or {MAX_IMAGE_PIXELS // 1_000_000} megapixels'
+                )
+            if image_format == 'JPEG':
+                image.draft('RGB', (max(1, width // 8), max(1, height // 8)))
+                image.load()
+            else:
+                image.verify()
+    except ValidationError:
+        raise
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise ValidationError('Uploaded image is corrupted or truncated')
+    finally:
+        file.seek(0)
+
 
 def validate_phone_number(value):
     """
@@ -123,7 +187,7 @@ def validate_price(value):
     if value < 0:
         raise ValidationError('Price cannot be negative.')
     
-    if value > 999999.99:
+    if value > MAX_PRICE:
         raise ValidationError('Price cannot exceed 999,999.99.')
 
 
@@ -140,7 +204,7 @@ def validate_stock_quantity(value):
     if value < 0:
         raise ValidationError('Stock quantity cannot be negative.')
     
-    if value > 999999:
+    if value > MAX_STOCK_QUANTITY:
         raise ValidationError('Stock quantity cannot exceed 999,999.')
 
 
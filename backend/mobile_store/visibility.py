@@ -0,0 +1,36 @@
+"""
+Commit-safe positions for feeds that hand out cursors.
+
+Primary keys and timestamps are assigned before commit, so a long
+transaction can commit a row below a position a reader has already moved
+past, and that reader never sees it. On PostgreSQL the feed tables carry an
+``xact_id`` column, filled by a ``BEFORE INSERT OR UPDATE`` trigger with the
+id of the writing transaction (``pg_current_xact_id()``, see migration
+mobile_store/0003). ``visible_xmin`` is the oldest transaction still
+running: every transaction below it has committed or rolled back. A feed
+that only reads rows with ``xact_id < visible_xmin()``, in ``(xact_id, pk)``
+order, therefore never hands out a position that a later commit can land
+behind, however long the writing transaction takes.
+
+Other databases have no transaction ids; there feeds fall back to holding
+back recently written rows for a fixed lag (SQLite, used in development and
+tests, serializes writers anyway).
+"""
+
+from django.db import connections
+
+
+def uses_xact_ids(using='default'):
+    """Whether rows of ``using`` carry the id of their writing transaction."""
+    return connections[using].vendor == 'postgresql'
+
+
+def visible_xmin(using='default'):
+    """
+    The oldest transaction id still in progress on ``using``.
+
+    Only meaningful where ``uses_xact_ids`` is true.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+        return cursor.fetchone()[0]
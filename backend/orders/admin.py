@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from mobile_store.admin_utils import LargeTableAdmin
+from .models import CheckoutTicket, Order, OrderItem
 
 
 class OrderItemInline(admin.TabularInline):
@@ -9,17 +12,43 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display = ['order_id', 'customer', 'order_date', 'status', 'total_amount', 'total_items']
     list_filter = ['status', 'order_date']
+    list_select_related = ['customer']
     search_fields = ['order_id', 'customer__name', 'customer__email']
     readonly_fields = ['order_id', 'order_date', 'total_items', 'updated_at']
+    autocomplete_fields = ['customer']
     inlines = [OrderItemInline]
     list_editable = ['status']
 
+    def get_queryset(self, request):
+        # A correlated subquery is only evaluated for the rows on the page.
+        item_quantities = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(
+            total=Sum('quantity')
+        ).values('total')
+        return super().get_queryset(request).annotate(
+            _total_items=Coalesce(Subquery(item_quantities, output_field=IntegerField()), 0)
+        )
+
+    @admin.display(description='Total items', ordering='_total_items')
+    def total_items(self, obj):
+        return obj._total_items
+
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdmin):
     list_display = ['order_item_id', 'order', 'product_type', 'product_name', 'quantity', 'price_at_purchase', 'subtotal']
     list_filter = ['product_type', 'created_at']
+    list_select_related = ['order__customer']
     readonly_fields = ['subtotal', 'created_at']
+    autocomplete_fields = ['order']
+
+
+@admin.register(CheckoutTicket)
+class CheckoutTicketAdmin(admin.ModelAdmin):
+    list_display = ['ticket_id', 'customer', 'status', 'order', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['status', 'created_at']
+    list_select_related = ['customer', 'order']
+    search_fields = ['ticket_id', 'customer__email']
+    raw_id_fields = ['customer', 'order']
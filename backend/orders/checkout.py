@@ -0,0 +1,275 @@
+"""
+Turning carts into orders, inline or through the checkout queue.
+
+``place_order`` is the checkout itself. By default ``create_from_cart`` runs
+it inside the request. During flash sales many buyers of the same product
+then wait on that product's row lock, each holding a gunicorn worker, so
+with ``CHECKOUT_QUEUE_ENABLED`` the endpoint only validates the request,
+stores a ``CheckoutTicket`` and answers ``202 Accepted``.
+
+Checkout workers (``manage.py run_checkout_workers``) claim queued tickets
+with ``SELECT ... FOR UPDATE SKIP LOCKED`` and group them by the products
+their carts contain. Each group runs in one transaction that locks its
+products once and places every order in a savepoint: an order that cannot be
+filled fails alone, and a hot SKU costs one lock wait and one commit per
+batch instead of one per buyer. Customers poll the ticket until it is
+``COMPLETED`` or ``FAILED``.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from cart.models import Cart
+from inventory.ledger import record
+from inventory.reservations import active_reservations
+from inventory.shards import stock_totals, take_stock
+from inventory.stock import PRODUCT_MODELS
+from mobile_store.metrics import CHECKOUTS
+from outbox.events import order_payload, publish
+from .models import CheckoutTicket, Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('QUEUED', 'PROCESSING')
+
+
+def place_order(customer, cart, shipping_address, notes=''):
+    """
+    Create the order, its items and the stock updates in one transaction.
+
+    Args:
+        customer: Ordering customer
+        cart: The customer's cart; it is emptied
+        shipping_address: Shipping address
+        notes: Order notes
+
+    Returns:
+        The new Order
+
+    Raises:
+        ValueError: If a product is missing or out of stock
+    """
+    with transaction.atomic():
+        # Calculate total
+        total = cart.prefetch_items().total_amount
+
+        # Create order
+        order = Order.objects.create(
+            customer=customer,
+            total_amount=total,
+            shipping_address=shipping_address,
+            notes=notes,
+            status='PENDING'
+        )
+
+        # Units other carts still hold may not be sold to this one.
+        # A fixed product order keeps concurrent checkouts from deadlocking.
+        cart_items = sorted(cart.items.all(), key=lambda item: (item.product_type, item.product_id))
+        products = [(item.product_type, item.product_id) for item in cart_items]
+        held = active_reservations(products, exclude_items=[item.pk for item in cart_items])
+        # Sharded products are checked against their shards, not the cached total.
+        sharded = stock_totals(products)
+
+        # Create order items from cart items
+        order_items = []
+        for cart_item in cart_items:
+            product = cart_item.product
+            if not product:
+                raise ValueError(f"Product not found for cart item {cart_item.cart_item_id}")
+
+            # Check stock availability
+            key = (cart_item.product_type, cart_item.product_id)
+            stock = sharded.get(key, product.stock_quantity)
+            if stock - held.get(key, 0) < cart_item.quantity:
+                raise ValueError(f"Insufficient stock for {cart_item.product_name}")
+
+            # Create order item
+            order_items.append(OrderItem.objects.create(
+                order=order,
+                product_type=cart_item.product_type,
+                product_id=cart_item.product_id,
+                product_name=cart_item.product_name,
+                quantity=cart_item.quantity,
+                price_at_purchase=cart_item.unit_price
+            ))
+
+            # Update stock
+            if not take_stock(*key, cart_item.quantity, sharded=key in sharded):
+                raise ValueError(f"Insufficient stock for {cart_item.product_name}")
+
+        record('SALE', [
+            ((item.product_type, item.product_id), -item.quantity) for item in cart_items
+        ], f'order:{order.order_id}')
+        publish('order.created', f'order:{order.order_id}', order_payload(order, order_items))
+
+        # Clear cart
+        cart.items.all().delete()
+
+    return order
+
+
+def enqueue(customer, shipping_address, notes=''):
+    """
+    Queue a checkout for the checkout workers.
+
+    A customer has at most one open ticket: repeated submissions (e.g. a
+    double click) return the ticket already waiting.
+
+    Returns:
+        CheckoutTicket
+    """
+    with transaction.atomic():
+        ticket = CheckoutTicket.objects.select_for_update().filter(
+            customer=customer, status__in=OPEN_STATUSES
+        ).first()
+        if ticket is None:
+            ticket = CheckoutTicket.objects.create(
+                customer=customer, shipping_address=shipping_address, notes=notes
+            )
+            CHECKOUTS.labels('queued').inc()
+    return ticket
+
+
+def requeue_stale(stale_after=None):
+    """
+    Put tickets whose worker died mid-batch back in the queue.
+
+    Returns:
+        Number of tickets requeued
+    """
+    stale_after = stale_after or settings.CHECKOUT_QUEUE_STALE_AFTER
+    return CheckoutTicket.objects.filter(
+        status='PROCESSING', claimed_at__lt=timezone.now() - timedelta(seconds=stale_after)
+    ).update(status='QUEUED', claimed_at=None)
+
+
+def claim(batch_size=None):
+    """
+    Claim up to ``batch_size`` of the oldest queued tickets.
+
+    Tickets locked by another worker's claim are skipped, so workers never
+    wait on each other here.
+    """
+    batch_size = batch_size or settings.CHECKOUT_QUEUE_BATCH_SIZE
+    with transaction.atomic():
+        ids = list(
+            CheckoutTicket.objects.filter(status='QUEUED').order_by('created_at')
+            .select_for_update(skip_locked=True).values_list('pk', flat=True)[:batch_size]
+        )
+        CheckoutTicket.objects.filter(pk__in=ids).update(
+            status='PROCESSING', claimed_at=timezone.now(), attempts=F('attempts') + 1
+        )
+    return list(CheckoutTicket.objects.filter(pk__in=ids).select_related('customer').order_by('created_at'))
+
+
+def group_by_product(tickets, carts):
+    """
+    Split tickets into groups that share no product.
+
+    Two tickets land in the same group when their carts have a product in
+    common, directly or through other tickets.
+
+    Args:
+        tickets: Claimed tickets
+        carts: Dict of customer id to Cart with prefetched items
+
+    Returns:
+        List of (products, tickets); products sorted
+    """
+    parent = {}
+
+    def find(key):
+        while parent.setdefault(key, key) != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    ticket_products = {}
+    for ticket in tickets:
+        cart = carts.get(ticket.customer_id)
+        products = sorted({(item.product_type, item.product_id) for item in cart.items.all()} if cart else ())
+        ticket_products[ticket.pk] = products
+        # Tickets without products (empty carts) are groups of their own.
+        find(('ticket', ticket.pk))
+        for product in products:
+            parent[find(product)] = find(('ticket', ticket.pk))
+
+    groups = {}
+    for ticket in tickets:
+        products, members = groups.setdefault(find(('ticket', ticket.pk)), (set(), []))
+        products.update(ticket_products[ticket.pk])
+        members.append(ticket)
+    return [(sorted(products), members) for products, members in groups.values()]
+
+
+def _lock_products(products):
+    """Lock the product rows in a fixed order for the rest of the transaction."""
+    by_type = {}
+    for product_type, product_id in products:
+        by_type.setdefault(product_type, []).append(product_id)
+    for product_type in sorted(by_type):
+        list(
+            PRODUCT_MODELS[product_type].objects.select_for_update()
+            .filter(pk__in=by_type[product_type]).order_by('pk').values_list('pk', flat=True)
+        )
+
+
+def process_group(products, tickets, carts):
+    """Place the orders of one group of tickets in a single transaction."""
+    now = timezone.now()
+    with transaction.atomic():
+        _lock_products(products)
+        for ticket in tickets:
+            cart = carts.get(ticket.customer_id)
+            ticket.processed_at = now
+            if cart is None or not cart.items.all():
+                ticket.status, ticket.error = 'FAILED', 'Cart is empty'
+                CHECKOUTS.labels('empty_cart').inc()
+                continue
+            try:
+                ticket.order = place_order(ticket.customer, cart, ticket.shipping_address, ticket.notes or '')
+            except ValueError as e:
+                ticket.status, ticket.error = 'FAILED', str(e)[:255]
+                CHECKOUTS.labels('failed').inc()
+            else:
+                ticket.status = 'COMPLETED'
+                CHECKOUTS.labels('created').inc()
+        CheckoutTicket.objects.bulk_update(tickets, ['status', 'error', 'order', 'processed_at'])
+
+
+def process_batch(batch_size=None):
+    """
+    Claim a batch of tickets and place their orders, group by group.
+
+    A group that fails unexpectedly (e.g. a deadlock) goes back to the queue
+    until its tickets have used up ``CHECKOUT_QUEUE_MAX_ATTEMPTS``.
+
+    Returns:
+        Number of tickets claimed
+    """
+    tickets = claim(batch_size)
+    if not tickets:
+        return 0
+    carts = {
+        cart.customer_id: cart
+        for cart in Cart.objects.filter(customer_id__in={ticket.customer_id for ticket in tickets})
+        .prefetch_related('items')
+    }
+    for products, group in group_by_product(tickets, carts):
+        try:
+            process_group(products, group, carts)
+        except Exception:
+            logger.exception('Checkout batch for %s failed', products)
+            for ticket in group:
+                give_up = ticket.attempts >= settings.CHECKOUT_QUEUE_MAX_ATTEMPTS
+                CheckoutTicket.objects.filter(pk=ticket.pk).update(
+                    status='FAILED' if give_up else 'QUEUED',
+                    error='Checkout failed' if give_up else '',
+                    claimed_at=None,
+                    processed_at=timezone.now() if give_up else None,
+                )
+    return len(tickets)
@@ -0,0 +1,20 @@
+"""
+Export definition for orders with their items (see mobile_store/exports.py).
+"""
+
+from mobile_store.exports import ExportSpec
+from .models import Order
+
+ORDER_EXPORT = ExportSpec(
+    name='orders',
+    queryset=Order.objects.select_related('customer'),
+    fields=(
+        'order_id', 'customer__email', 'order_date', 'status', 'total_amount',
+        'shipping_address', 'notes', 'updated_at',
+    ),
+    children='items',
+    child_fields=(
+        'order_item_id', 'product_type', 'product_id', 'product_name', 'quantity',
+        'price_at_purchase',
+    ),
+)
@@ -0,0 +1,93 @@
+"""
+Run the checkout workers for queued checkout mode.
+
+Each worker thread claims a batch of queued checkout tickets, places their
+orders group by group and claims the next batch; idle workers poll every
+--interval seconds. Run it next to gunicorn (e.g. under systemd) while
+CHECKOUT_QUEUE_ENABLED is set, and keep it running until the queue is empty
+after switching the mode off.
+
+Usage:
+    python manage.py run_checkout_workers --workers 4
+    python manage.py run_checkout_workers --once
+"""
+
+import logging
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from orders.checkout import process_batch, requeue_stale
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Place the orders of queued checkouts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Worker threads, each with its own database connection (default: 2)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Tickets claimed per batch (default: CHECKOUT_QUEUE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.2,
+            help='Seconds an idle worker waits before polling again (default: 0.2)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue with a single worker and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            requeue_stale()
+            processed = 0
+            while batch := process_batch(options['batch_size']):
+                processed += batch
+            self.stdout.write(f'Processed {processed} checkouts')
+            return
+
+        stop = threading.Event()
+        workers = [
+            threading.Thread(target=self.work, args=(stop, options), name=f'checkout-worker-{n}', daemon=True)
+            for n in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {len(workers)} checkout workers')
+        try:
+            while True:
+                stop.wait(options['interval'] * 50)
+                requeue_stale()
+                close_old_connections()
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    def work(self, stop, options):
+        try:
+            while not stop.is_set():
+                try:
+                    processed = process_batch(options['batch_size'])
+                except Exception:
+                    # e.g. the database restarting; the claimed tickets are requeued when stale.
+                    logger.exception('Checkout worker failed to process a batch')
+                    processed = 0
+                if not processed:
+                    close_old_connections()
+                    stop.wait(options['interval'])
+        finally:
+            connection.close()
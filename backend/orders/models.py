@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from phones.models import MobilePhone
@@ -63,3 +65,42 @@ class OrderItem(models.Model):
     @property
     def subtotal(self):
         return self.price_at_purchase * self.quantity
+
+
+class CheckoutTicket(models.Model):
+    """
+    A checkout waiting for the checkout workers (queued checkout mode).
+
+    See orders/checkout.py; the customer polls the ticket until it is
+    ``COMPLETED`` (with its order) or ``FAILED`` (with the reason).
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('PROCESSING', 'Processing'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    ticket_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='checkout_tickets')
+    shipping_address = models.TextField()
+    notes = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    order = models.OneToOneField(
+        Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='checkout_ticket'
+    )
+    error = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Checkout Ticket'
+        verbose_name_plural = 'Checkout Tickets'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='checkout_ticket_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Checkout {self.ticket_id} - {self.status}"
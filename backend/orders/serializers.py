@@ -1,5 +1,6 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Order, OrderItem
+from .models import CheckoutTicket, Order, OrderItem
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -36,3 +37,19 @@ class CreateOrderSerializer(serializers.Serializer):
     """Serializer for creating order from cart"""
     shipping_address = serializers.CharField()
     notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class CheckoutTicketSerializer(serializers.ModelSerializer):
+    """Serializer for a queued checkout"""
+    order = OrderSerializer(read_only=True)
+    status_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CheckoutTicket
+        fields = ['ticket_id', 'status', 'error', 'order', 'status_url', 'created_at', 'processed_at']
+        read_only_fields = fields
+
+    def get_status_url(self, obj):
+        url = reverse('order-checkout-ticket', kwargs={'ticket_id': obj.ticket_id})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
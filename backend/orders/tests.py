@@ -2,14 +2,24 @@
 Tests for orders app models and views.
 """
 
-from django.test import TestCase
+import csv
+import io
+import json
+import warnings
+from unittest import mock
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from decimal import Decimal
 from phones.models import Brand, MobilePhone
 from orders.models import Order, OrderItem
 from cart.models import Cart, CartItem
+from mobile_store.exports import export_lines
+from orders.exporters import ORDER_EXPORT
 
 User = get_user_model()
 
@@ -138,3 +148,157 @@ class OrderAPITest(APITestCase):
         response = self.client.get('/api/orders/')
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class OrderExportTest(APITestCase):
+    """Test cases for streaming order exports."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='adminpass123')
+        self.user = User.objects.create_user(email='test@example.com', password='testpass123')
+        for i in range(5):
+            order = Order.objects.create(
+                customer=self.user, total_amount=Decimal('20.00'), shipping_address=f'{i} Test St'
+            )
+            for j in range(i % 3):
+                OrderItem.objects.create(
+                    order=order, product_type='PHONE', product_id=j, product_name=f'Phone {j}',
+                    quantity=1, price_at_purchase=Decimal('10.00')
+                )
+
+    def test_csv_export_streams_one_line_per_item(self):
+        """Test that the CSV export repeats order columns for each item."""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/orders/export/?chunk_size=2')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        # Orders without items still get one line.
+        self.assertEqual(len(rows), 1 + 1 + 2 + 1 + 1)
+        self.assertEqual(rows[0]['customer__email'], 'test@example.com')
+        self.assertEqual(rows[-1]['items__product_name'], 'Phone 0')
+
+    def test_jsonl_export_nests_items(self):
+        """Test that the JSONL export has one document per order."""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/orders/export/?export_format=jsonl')
+
+        documents = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(documents), 5)
+        self.assertEqual([len(d['items']) for d in documents], [0, 1, 2, 0, 1])
+        self.assertEqual(documents[2]['items'][1]['price_at_purchase'], '10.00')
+
+    def test_export_requires_admin(self):
+        """Test that customers cannot export orders."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/orders/export/')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_asgi_export_streams_without_buffering(self):
+        """Test that exports under ASGI get an async body Django does not buffer."""
+        from asgiref.sync import sync_to_async
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.admin).access_token))()
+        response = await self.async_client.get(
+            '/api/orders/export/', {'export_format': 'jsonl', 'chunk_size': 2},
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            content = b''.join([chunk async for chunk in response])
+        self.assertEqual(len(content.splitlines()), 5)
+
+    def test_keyset_fallback_without_server_side_cursors(self):
+        """Test that exports page by primary key when server-side cursors are disabled."""
+        connection = connections['default']
+        settings_dict = dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True)
+        with CaptureQueriesContext(connection) as queries:
+            connection.settings_dict, original = settings_dict, connection.settings_dict
+            try:
+                documents = list(export_lines(ORDER_EXPORT, 'jsonl', chunk_size=2))
+            finally:
+                connection.settings_dict = original
+
+        self.assertEqual(len(documents), 5)
+        # Three pages plus the empty one, each with its item prefetch.
+        self.assertEqual(len(queries), 3 * 2 + 1)
+
+
+@override_settings(CHECKOUT_QUEUE_ENABLED=True)
+class QueuedCheckoutTest(APITestCase):
+    """Test cases for queued checkout mode."""
+
+    def setUp(self):
+        """Set up test data."""
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='Galaxy Drop', price=Decimal('999.00'), stock_quantity=3,
+            ram='8GB', storage='256GB', battery_capacity='5000mAh', processor='Exynos', os='Android'
+        )
+        self.buyers = [
+            User.objects.create_user(email=f'buyer{i}@example.com', password='buyerpass123') for i in range(3)
+        ]
+
+    def checkout(self, buyer, quantity=1):
+        self.client.force_authenticate(user=buyer)
+        self.client.post('/api/cart/add_item/', {
+            'product_type': 'PHONE', 'product_id': self.phone.pk, 'quantity': quantity
+        }, format='json')
+        return self.client.post('/api/orders/create_from_cart/', {'shipping_address': '1 Main St'}, format='json')
+
+    def test_checkouts_are_queued_and_placed_in_one_batch(self):
+        """Test that queued checkouts for one product are placed together."""
+        from orders.checkout import group_by_product, process_batch
+
+        responses = [self.checkout(buyer) for buyer in self.buyers]
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response.data['status'], 'QUEUED')
+        self.assertFalse(Order.objects.exists())
+
+        # A repeated submission returns the open ticket.
+        again = self.client.post('/api/orders/create_from_cart/', {'shipping_address': '1 Main St'}, format='json')
+        self.assertEqual(again.data['ticket_id'], responses[-1].data['ticket_id'])
+
+        groups = []
+        with mock.patch('orders.checkout.group_by_product', lambda *args: groups.extend(group_by_product(*args)) or groups):
+            self.assertEqual(process_batch(), 3)
+        [(products, tickets)] = groups
+        self.assertEqual(products, [('PHONE', self.phone.pk)])
+        self.assertEqual(len(tickets), 3)
+
+        self.assertEqual(Order.objects.count(), 3)
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 0)
+        response = self.client.get(responses[-1]['Location'])
+        self.assertEqual(response.data['status'], 'COMPLETED')
+        self.assertEqual(response.data['order']['items'][0]['product_id'], self.phone.pk)
+
+    def test_failed_checkout_does_not_affect_the_batch(self):
+        """Test that an order that cannot be filled fails on its own."""
+        from inventory.models import StockReservation
+        from orders.checkout import process_batch
+
+        first = self.checkout(self.buyers[0], quantity=2)
+        second = self.checkout(self.buyers[1], quantity=1)
+        # The second buyer's hold expires while a restock is corrected down.
+        StockReservation.objects.filter(cart_item__cart__customer=self.buyers[1]).update(expires_at=timezone.now())
+        MobilePhone.objects.filter(pk=self.phone.pk).update(stock_quantity=2)
+
+        self.assertEqual(process_batch(), 2)
+        self.client.force_authenticate(user=self.buyers[1])
+        failed = self.client.get(second['Location'])
+        self.assertEqual(failed.data['status'], 'FAILED')
+        self.assertIn('Insufficient stock', failed.data['error'])
+        self.assertEqual(self.client.get(first['Location']).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.buyers[0])
+        self.assertEqual(self.client.get(first['Location']).data['status'], 'COMPLETED')
+        self.assertEqual(Order.objects.get().customer, self.buyers[0])
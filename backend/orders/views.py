@@ -2,10 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import transaction
-from .models import Order, OrderItem
-from .serializers import OrderSerializer, CreateOrderSerializer
+from .checkout import OPEN_STATUSES, enqueue, place_order
+from .exporters import ORDER_EXPORT
+from .models import CheckoutTicket, Order
+from .serializers import CheckoutTicketSerializer, OrderSerializer, CreateOrderSerializer
 from cart.models import Cart
+from inventory.ledger import record
+from inventory.shards import add_stock, sharded_products
+from mobile_store.exports import export_response
+from mobile_store.metrics import CHECKOUTS
+from outbox.events import order_payload, publish, publish_order_status
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -17,9 +26,10 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Non-admin users can only see their own orders
+        orders = Order.objects.select_related('customer').prefetch_related('items')
         if self.request.user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(customer=self.request.user)
+            return orders
+        return orders.filter(customer=self.request.user)
 
     @action(detail=False, methods=['get'])
     def my_orders(self, request):
@@ -28,70 +38,71 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(orders, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every order with its items as CSV or JSONL (admin only)"""
+        return export_response(request, ORDER_EXPORT)
+
     @action(detail=False, methods=['post'])
     def create_from_cart(self, request):
         """Create order from cart"""
         serializer = CreateOrderSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
         try:
             cart = Cart.objects.get(customer=request.user)
         except Cart.DoesNotExist:
+            CHECKOUTS.labels('no_cart').inc()
             return Response(
                 {"error": "Cart not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         if cart.items.count() == 0:
+            CHECKOUTS.labels('empty_cart').inc()
             return Response(
                 {"error": "Cart is empty"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Create order in a transaction
-        with transaction.atomic():
-            # Calculate total
-            total = cart.total_amount
-
-            # Create order
-            order = Order.objects.create(
-                customer=request.user,
-                total_amount=total,
-                shipping_address=serializer.validated_data['shipping_address'],
-                notes=serializer.validated_data.get('notes', ''),
-                status='PENDING'
+        if settings.CHECKOUT_QUEUE_ENABLED:
+            ticket = enqueue(request.user, data['shipping_address'], data.get('notes', ''))
+            ticket_serializer = CheckoutTicketSerializer(ticket, context=self.get_serializer_context())
+            return Response(
+                ticket_serializer.data,
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Location': ticket_serializer.data['status_url'], 'Retry-After': '1'}
             )
 
-            # Create order items from cart items
-            for cart_item in cart.items.all():
-                product = cart_item.product
-                if not product:
-                    raise ValueError(f"Product not found for cart item {cart_item.cart_item_id}")
-
-                # Check stock availability
-                if product.stock_quantity < cart_item.quantity:
-                    raise ValueError(f"Insufficient stock for {cart_item.product_name}")
-
-                # Create order item
-                OrderItem.objects.create(
-                    order=order,
-                    product_type=cart_item.product_type,
-                    product_id=cart_item.product_id,
-                    product_name=cart_item.product_name,
-                    quantity=cart_item.quantity,
-                    price_at_purchase=cart_item.unit_price
-                )
-
-                # Update stock
-                product.stock_quantity -= cart_item.quantity
-                product.save()
-
-            # Clear cart
-            cart.items.all().delete()
+        # Create order in a transaction
+        try:
+            order = place_order(request.user, cart, data['shipping_address'], data.get('notes', ''))
+        except ValueError:
+            CHECKOUTS.labels('failed').inc()
+            raise
+        CHECKOUTS.labels('created').inc()
 
         order_serializer = self.get_serializer(order)
         return Response(order_serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['get'], url_path=r'checkout-tickets/(?P<ticket_id>[0-9a-f-]+)')
+    def checkout_ticket(self, request, ticket_id=None):
+        """Status of a queued checkout; includes the order once it is placed"""
+        tickets = CheckoutTicket.objects.select_related('order__customer')
+        if not request.user.is_staff:
+            tickets = tickets.filter(customer=request.user)
+        try:
+            ticket = tickets.get(pk=ticket_id)
+        except (CheckoutTicket.DoesNotExist, ValidationError):
+            return Response(
+                {"error": "Checkout ticket not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        headers = {'Retry-After': '1'} if ticket.status in OPEN_STATUSES else {}
+        serializer = CheckoutTicketSerializer(ticket, context=self.get_serializer_context())
+        return Response(serializer.data, headers=headers)
+
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Update order status (admin only)"""
@@ -110,8 +121,11 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        order.status = new_status
-        order.save()
+        with transaction.atomic():
+            previous_status = order.status
+            order.status = new_status
+            order.save()
+            publish_order_status(order, previous_status)
 
         serializer = self.get_serializer(order)
         return Response(serializer.data)
@@ -129,22 +143,21 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         # Restore stock
         with transaction.atomic():
-            for item in order.items.all():
-                if item.product_type == 'PHONE':
-                    from phones.models import MobilePhone
-                    product = MobilePhone.objects.filter(phone_id=item.product_id).first()
-                elif item.product_type == 'ACCESSORY':
-                    from accessories.models import Accessory
-                    product = Accessory.objects.filter(accessory_id=item.product_id).first()
-                else:
-                    continue
-
-                if product:
-                    product.stock_quantity += item.quantity
-                    product.save()
-
+            order_items = list(order.items.all())
+            items = [item for item in order_items if item.product_type in ('PHONE', 'ACCESSORY')]
+            sharded = sharded_products((item.product_type, item.product_id) for item in items)
+            for item in items:
+                key = (item.product_type, item.product_id)
+                add_stock(*key, item.quantity, sharded=key in sharded)
+            record('CANCEL', [
+                ((item.product_type, item.product_id), item.quantity) for item in items
+            ], f'order:{order.order_id}')
+
+            previous_status = order.status
             order.status = 'CANCELLED'
             order.save()
+            payload = order_payload(order, order_items)
+            publish('order.cancelled', f'order:{order.order_id}', dict(payload, previous_status=previous_status))
 
         serializer = self.get_serializer(order)
         return Response(serializer.data)
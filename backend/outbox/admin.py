@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import ConsumerOffset, OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'topic', 'key', 'created_at']
+    list_filter = ['topic']
+    search_fields = ['key']
+
+    # Events are immutable once written.
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ConsumerOffset)
+class ConsumerOffsetAdmin(admin.ModelAdmin):
+    list_display = ['consumer', 'last_xact_id', 'last_event_id', 'updated_at']
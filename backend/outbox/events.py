@@ -0,0 +1,76 @@
+"""
+Publishing domain events to the transactional outbox.
+
+``publish`` inserts an ``OutboxEvent`` row; called inside the transaction
+that makes the change, the event exists if and only if the change
+committed. Downstream systems receive events from the relay (see
+outbox/relay.py) instead of polling the API.
+
+Topics:
+    order.created, order.status_changed, order.cancelled
+    payment.created, payment.updated
+    stock.changed (one event per inventory ledger append)
+"""
+
+from mobile_store.metrics import OUTBOX_PUBLISHED
+from .models import OutboxEvent
+
+
+def publish(topic, key, payload):
+    """
+    Write an event to the outbox.
+
+    Args:
+        topic: Event type, e.g. ``order.created``
+        key: Id of the changed entity, e.g. ``order:42``
+        payload: JSON-serializable dict
+
+    Returns:
+        The new OutboxEvent
+    """
+    OUTBOX_PUBLISHED.labels(topic).inc()
+    return OutboxEvent.objects.create(topic=topic, key=key, payload=payload)
+
+
+def order_payload(order, items=None):
+    """Event payload describing an order and its items."""
+    items = order.items.all() if items is None else items
+    return {
+        'order_id': order.order_id,
+        'customer_id': order.customer_id,
+        'status': order.status,
+        'total_amount': str(order.total_amount),
+        'items': [
+            {
+                'product_type': item.product_type,
+                'product_id': item.product_id,
+                'quantity': item.quantity,
+                'price_at_purchase': str(item.price_at_purchase),
+            }
+            for item in items
+        ],
+    }
+
+
+def publish_order_status(order, previous_status):
+    """Publish an ``order.status_changed`` event if the status changed."""
+    if order.status == previous_status:
+        return None
+    return publish('order.status_changed', f'order:{order.order_id}', {
+        'order_id': order.order_id,
+        'customer_id': order.customer_id,
+        'previous_status': previous_status,
+        'status': order.status,
+    })
+
+
+def payment_payload(payment):
+    """Event payload describing a payment."""
+    return {
+        'payment_id': payment.payment_id,
+        'order_id': payment.order_id,
+        'amount': str(payment.amount),
+        'payment_method': payment.payment_method,
+        'status': payment.status,
+        'transaction_id': payment.transaction_id or '',
+    }
@@ -0,0 +1,68 @@
+"""
+Deliver outbox events to the downstream consumers.
+
+Runs once by default; with --interval it keeps relaying as a background
+worker (e.g. under systemd next to gunicorn). A consumer whose sink fails
+is retried on the next pass without holding up the others.
+
+Usage:
+    python manage.py relay_outbox
+    python manage.py relay_outbox --interval 1 --consumer warehouse
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from outbox.relay import prune, relay_all
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver outbox events to downstream consumers in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--consumer',
+            action='append',
+            dest='consumers',
+            help='Only relay to this consumer (repeatable; default: all in OUTBOX_CONSUMERS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Events per delivery (default: OUTBOX_RELAY_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep running, relaying every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        consumers = options['consumers'] or list(settings.OUTBOX_CONSUMERS)
+        unknown = set(consumers) - set(settings.OUTBOX_CONSUMERS)
+        if unknown:
+            raise CommandError(f"Unknown consumers: {', '.join(sorted(unknown))}")
+
+        while True:
+            for consumer in consumers:
+                try:
+                    delivered = relay_all([consumer], options['batch_size'])[consumer]
+                except Exception:
+                    logger.exception('Could not deliver outbox events to %s', consumer)
+                    if not options['interval']:
+                        raise
+                    continue
+                if delivered or not options['interval']:
+                    self.stdout.write(f'Delivered {delivered} events to {consumer}')
+            prune()
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumeroffset',
+            name='last_xact_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='xact_id',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Writing transaction, set by trigger on PostgreSQL (see mobile_store/visibility.py)', null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+"""
+PostgreSQL trigger stamping outbox events with their writing transaction
+(see mobile_store/visibility.py), and the index the relay reads them by.
+
+Events written before this migration get ``xact_id`` 0, below every new
+event, so existing offsets stay valid. Other databases get no trigger.
+"""
+
+from django.db import migrations
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('UPDATE outbox_outboxevent SET xact_id = 0 WHERE xact_id IS NULL')
+    schema_editor.execute(
+        'CREATE TRIGGER outbox_outboxevent_xact BEFORE INSERT ON outbox_outboxevent '
+        'FOR EACH ROW EXECUTE FUNCTION stamp_xact_id()'
+    )
+    schema_editor.execute('CREATE INDEX outbox_xact_idx ON outbox_outboxevent (xact_id, event_id)')
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS outbox_xact_idx')
+    schema_editor.execute('DROP TRIGGER IF EXISTS outbox_outboxevent_xact ON outbox_outboxevent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0002_consumeroffset_last_xact_id_outboxevent_xact_id'),
+        # stamp_xact_id()
+        ('mobile_store', '0004_feed_xact_triggers'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,38 @@
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """
+    A domain event, written in the transaction of the change it describes.
+
+    Events are delivered in ``(xact_id, event_id)`` order on PostgreSQL and
+    in ``event_id`` order elsewhere by the outbox relay (see outbox/relay.py).
+    """
+    event_id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=100, help_text='e.g. order.created')
+    key = models.CharField(max_length=100, help_text='Id of the changed entity, e.g. order:42')
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    xact_id = models.BigIntegerField(null=True, blank=True, editable=False, help_text='Writing transaction, set by trigger on PostgreSQL (see mobile_store/visibility.py)')
+
+    class Meta:
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+
+    def __str__(self):
+        return f"#{self.event_id} {self.topic} {self.key}"
+
+
+class ConsumerOffset(models.Model):
+    """The last event delivered to a downstream consumer."""
+    consumer = models.CharField(max_length=50, primary_key=True)
+    last_xact_id = models.BigIntegerField(default=0)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Consumer Offset'
+        verbose_name_plural = 'Consumer Offsets'
+
+    def __str__(self):
+        return f"{self.consumer} at #{self.last_event_id}"
@@ -0,0 +1,121 @@
+"""
+Batched, at-least-once delivery of outbox events.
+
+Each consumer in ``OUTBOX_CONSUMERS`` has a ``ConsumerOffset``. ``relay``
+locks that row, reads the next ``OUTBOX_RELAY_BATCH_SIZE`` events after it
+in ``event_id`` order, hands them to the consumer's sink in one call and
+advances the offset in the same transaction. A delivery that fails leaves
+the offset where it was, so the batch is sent again: consumers see every
+event at least once and deduplicate by ``event_id``.
+
+Event ids are assigned at insert, not at commit, so a long transaction (a
+batch of queued checkouts, say) can commit an event below ids that were
+already delivered. On PostgreSQL offsets are therefore ``(xact_id,
+event_id)`` positions, and the relay only reads events of transactions
+below the oldest one still running (see mobile_store/visibility.py): once
+an offset has passed a position, no commit can add an event behind it.
+Other databases only read events older than ``OUTBOX_RELAY_LAG`` seconds
+to let such transactions finish. ``prune`` deletes events every consumer
+has received once they are older than ``OUTBOX_RETENTION_DAYS``.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from mobile_store.metrics import OUTBOX_DELIVERED
+from mobile_store.visibility import uses_xact_ids, visible_xmin
+from .models import ConsumerOffset, OutboxEvent
+from .sinks import get_sink
+
+OUTBOX_PRUNE_BATCH_SIZE = 1000
+
+
+def relay(consumer, sink=None, batch_size=None):
+    """
+    Deliver the next batch of events to ``consumer``.
+
+    Args:
+        consumer: Consumer name
+        sink: Sink to deliver to (default: from ``OUTBOX_CONSUMERS``)
+        batch_size: Maximum events per batch
+
+    Returns:
+        Number of events delivered
+    """
+    sink = sink or get_sink(settings.OUTBOX_CONSUMERS[consumer])
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    ConsumerOffset.objects.get_or_create(consumer=consumer)
+    with transaction.atomic():
+        # Relays for the same consumer take turns.
+        offset = ConsumerOffset.objects.select_for_update().get(consumer=consumer)
+        if uses_xact_ids():
+            pending = OutboxEvent.objects.filter(
+                Q(xact_id__gt=offset.last_xact_id)
+                | Q(xact_id=offset.last_xact_id, event_id__gt=offset.last_event_id),
+                xact_id__lt=visible_xmin(),
+            ).order_by('xact_id', 'event_id')
+        else:
+            visible_before = timezone.now() - timedelta(seconds=settings.OUTBOX_RELAY_LAG)
+            pending = OutboxEvent.objects.filter(
+                event_id__gt=offset.last_event_id, created_at__lte=visible_before
+            ).order_by('event_id')
+        events = list(pending[:batch_size])
+        if not events:
+            return 0
+        sink.deliver(events)
+        offset.last_xact_id = events[-1].xact_id or 0
+        offset.last_event_id = events[-1].event_id
+        offset.save(update_fields=['last_xact_id', 'last_event_id', 'updated_at'])
+    OUTBOX_DELIVERED.labels(consumer).inc(len(events))
+    return len(events)
+
+
+def relay_all(consumers=None, batch_size=None):
+    """
+    Deliver every pending event to each consumer, batch by batch.
+
+    Returns:
+        Dict of consumer to events delivered
+    """
+    delivered = {}
+    for consumer in consumers or settings.OUTBOX_CONSUMERS:
+        delivered[consumer] = 0
+        while batch := relay(consumer, batch_size=batch_size):
+            delivered[consumer] += batch
+    return delivered
+
+
+def prune(retention_days=None, batch_size=None):
+    """
+    Delete old events that every configured consumer has received.
+
+    Returns:
+        Number of events deleted
+    """
+    days = settings.OUTBOX_RETENTION_DAYS if retention_days is None else retention_days
+    consumers = list(settings.OUTBOX_CONSUMERS)
+    if not consumers:
+        return 0
+    offsets = ConsumerOffset.objects.filter(consumer__in=consumers)
+    if offsets.count() < len(consumers):
+        # A consumer that never ran still needs every event.
+        return 0
+    if uses_xact_ids():
+        # Events of the lowest offset's own transaction may be partly delivered.
+        delivered = Q(xact_id__lt=offsets.aggregate(low=Min('last_xact_id'))['low'])
+    else:
+        delivered = Q(event_id__lte=offsets.aggregate(low=Min('last_event_id'))['low'])
+    cutoff = timezone.now() - timedelta(days=days)
+    batch_size = batch_size or OUTBOX_PRUNE_BATCH_SIZE
+    deleted = 0
+    while True:
+        ids = list(
+            OutboxEvent.objects.filter(delivered, created_at__lt=cutoff)
+            .order_by('event_id').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutboxEvent.objects.filter(pk__in=ids).delete()[0]
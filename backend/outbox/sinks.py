@@ -0,0 +1,98 @@
+"""
+Destinations the outbox relay delivers event batches to.
+
+A sink is configured by URL (``OUTBOX_CONSUMERS``):
+
+    file:///var/lib/mobile-store/events.jsonl   append JSON lines, fsynced
+    http://127.0.0.1:9000/events                POST a JSON array
+    unix:///run/warehouse/events.sock           JSON lines over a stream socket
+
+``deliver`` either returns after the whole batch was accepted or raises, in
+which case the relay retries the batch; consumers must tolerate duplicates.
+"""
+
+import json
+import os
+import socket
+import urllib.request
+from urllib.parse import urlsplit
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+SINK_TIMEOUT = 10  # seconds
+
+
+def event_dict(event):
+    return {
+        'event_id': event.event_id,
+        'topic': event.topic,
+        'key': event.key,
+        'created_at': event.created_at,
+        'payload': event.payload,
+    }
+
+
+def _json_lines(events):
+    return ''.join(
+        json.dumps(event_dict(event), cls=DjangoJSONEncoder) + '\n' for event in events
+    ).encode()
+
+
+class FileSink:
+    """Append events to a JSON Lines file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def deliver(self, events):
+        with open(self.path, 'ab') as f:
+            f.write(_json_lines(events))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class HttpSink:
+    """POST each batch as a JSON array; any 2xx response acknowledges it."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def deliver(self, events):
+        body = json.dumps([event_dict(event) for event in events], cls=DjangoJSONEncoder).encode()
+        request = urllib.request.Request(
+            self.url, data=body, method='POST', headers={'Content-Type': 'application/json'}
+        )
+        # Raises HTTPError for non-2xx responses.
+        with urllib.request.urlopen(request, timeout=SINK_TIMEOUT) as response:
+            response.read()
+
+
+class UnixSocketSink:
+    """Write each batch as JSON lines to a Unix stream socket."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def deliver(self, events):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(SINK_TIMEOUT)
+            sock.connect(self.path)
+            sock.sendall(_json_lines(events))
+            sock.shutdown(socket.SHUT_WR)
+
+
+def get_sink(url):
+    """
+    Build the sink for a consumer's URL.
+
+    Raises:
+        ValueError: For an unsupported scheme
+    """
+    parts = urlsplit(url)
+    if parts.scheme == 'file':
+        return FileSink(parts.path)
+    if parts.scheme in ('http', 'https'):
+        return HttpSink(url)
+    if parts.scheme == 'unix':
+        return UnixSocketSink(parts.path)
+    raise ValueError(f'Unsupported outbox sink: {url}')
@@ -0,0 +1,194 @@
+"""
+Tests for the transactional outbox and its relay.
+"""
+
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from outbox.events import publish
+from outbox.models import ConsumerOffset, OutboxEvent
+from outbox.relay import prune, relay, relay_all
+from outbox.sinks import FileSink
+from phones.models import Brand, MobilePhone
+
+User = get_user_model()
+
+
+class FailingSink:
+    def deliver(self, events):
+        raise ConnectionError('consumer down')
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    batches = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.batches.append(json.loads(body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(OUTBOX_RELAY_LAG=0)
+class OutboxTest(APITestCase):
+    """Test cases for publishing, relaying and pruning events."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.events_file = Path(self.tmp.name) / 'events.jsonl'
+        brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phone = MobilePhone.objects.create(
+            brand=brand, model_name='Galaxy Relay', price=Decimal('499.00'), stock_quantity=5,
+            ram='8GB', storage='128GB', battery_capacity='4500mAh', processor='Exynos', os='Android'
+        )
+        self.buyer = User.objects.create_user(email='buyer@example.com', password='buyerpass123')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def delivered(self):
+        return [json.loads(line) for line in self.events_file.read_text().splitlines()]
+
+    def test_events_commit_and_roll_back_with_the_change(self):
+        """Test that checkout and cancel write their events in the same transaction."""
+        OutboxEvent.objects.all().delete()
+        self.client.force_authenticate(user=self.buyer)
+        self.client.post('/api/cart/add_item/', {
+            'product_type': 'PHONE', 'product_id': self.phone.pk, 'quantity': 2
+        }, format='json')
+        response = self.client.post('/api/orders/create_from_cart/', {'shipping_address': '1 Main St'}, format='json')
+        order_id = response.data['order_id']
+        self.client.post(f'/api/orders/{order_id}/cancel/')
+
+        self.assertEqual(
+            list(OutboxEvent.objects.order_by('event_id').values_list('topic', 'key')),
+            [
+                ('stock.changed', f'order:{order_id}'),
+                ('order.created', f'order:{order_id}'),
+                ('stock.changed', f'order:{order_id}'),
+                ('order.cancelled', f'order:{order_id}'),
+            ]
+        )
+        created = OutboxEvent.objects.get(topic='order.created').payload
+        self.assertEqual(created['items'][0]['quantity'], 2)
+        sale = OutboxEvent.objects.filter(topic='stock.changed').first().payload
+        self.assertEqual(sale['movements'], [{'product_type': 'PHONE', 'product_id': self.phone.pk, 'delta': -2}])
+
+        try:
+            with transaction.atomic():
+                publish('order.created', 'order:0', {})
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboxEvent.objects.filter(key='order:0').exists())
+
+    def test_relay_delivers_batches_in_order_and_advances_offset(self):
+        """Test batched delivery to a file sink, resuming from the offset."""
+        OutboxEvent.objects.all().delete()
+        events = [publish('test.event', f'test:{n}', {'n': n}) for n in range(5)]
+        sink = FileSink(str(self.events_file))
+
+        self.assertEqual(relay('warehouse', sink, batch_size=2), 2)
+        self.assertEqual(ConsumerOffset.objects.get(consumer='warehouse').last_event_id, events[1].event_id)
+        while relay('warehouse', sink, batch_size=2):
+            pass
+        self.assertEqual([event['payload']['n'] for event in self.delivered()], [0, 1, 2, 3, 4])
+        self.assertEqual(relay('warehouse', sink), 0)
+
+    def test_failed_delivery_is_retried(self):
+        """Test that a failing sink leaves the offset unchanged."""
+        OutboxEvent.objects.all().delete()
+        event = publish('test.event', 'test:1', {})
+
+        with self.assertRaises(ConnectionError):
+            relay('analytics', FailingSink())
+        self.assertEqual(ConsumerOffset.objects.get(consumer='analytics').last_event_id, 0)
+        self.assertEqual(relay('analytics', FileSink(str(self.events_file))), 1)
+        self.assertEqual(self.delivered()[0]['event_id'], event.event_id)
+
+    def test_relay_lag_holds_back_recent_events(self):
+        """Test that events younger than the lag wait for the next run."""
+        OutboxEvent.objects.all().delete()
+        publish('test.event', 'test:1', {})
+        with override_settings(OUTBOX_RELAY_LAG=60):
+            self.assertEqual(relay('warehouse', FailingSink()), 0)
+
+    def test_events_committed_below_delivered_ids_are_delivered(self):
+        """Test that on PostgreSQL offsets follow transactions, not event ids."""
+        from unittest import mock
+
+        OutboxEvent.objects.all().delete()
+        sink = FileSink(str(self.events_file))
+        early = publish('test.event', 'test:early', {})
+        OutboxEvent.objects.filter(pk=early.pk).update(xact_id=90)
+        with mock.patch('outbox.relay.uses_xact_ids', return_value=True), \
+                mock.patch('outbox.relay.visible_xmin', return_value=100) as xmin:
+            self.assertEqual(relay('warehouse', sink), 1)
+
+            # Transaction 100 (e.g. a checkout batch) wrote an event, then 101
+            # wrote one and committed while 100 kept running.
+            slow = publish('test.event', 'test:slow', {})
+            reserved = publish('test.event', 'test:reserved', {}).event_id
+            OutboxEvent.objects.filter(event_id=reserved).delete()
+            fast = publish('test.event', 'test:fast', {})
+            OutboxEvent.objects.filter(pk=slow.pk).update(xact_id=100)
+            OutboxEvent.objects.filter(pk=fast.pk).update(xact_id=101)
+            self.assertEqual(relay('warehouse', sink), 0)
+
+            xmin.return_value = 102
+            self.assertEqual(relay('warehouse', sink), 2)
+            offset = ConsumerOffset.objects.get(consumer='warehouse')
+            self.assertEqual((offset.last_xact_id, offset.last_event_id), (101, fast.event_id))
+
+            # Transaction 102 commits an event whose id is below the delivered one.
+            OutboxEvent.objects.create(event_id=reserved, topic='test.event', key='test:late', payload={}, xact_id=102)
+            xmin.return_value = 103
+            self.assertEqual(relay('warehouse', sink), 1)
+        self.assertEqual([event['key'] for event in self.delivered()],
+                         ['test:early', 'test:slow', 'test:fast', 'test:late'])
+
+    def test_http_sink_posts_json_batches(self):
+        """Test delivery to an HTTP consumer configured by URL."""
+        OutboxEvent.objects.all().delete()
+        RecordingHandler.batches = []
+        server = HTTPServer(('127.0.0.1', 0), RecordingHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        publish('test.event', 'test:1', {'n': 1})
+        publish('test.event', 'test:2', {'n': 2})
+
+        url = f'http://127.0.0.1:{server.server_port}/events'
+        with override_settings(OUTBOX_CONSUMERS={'crm': url}):
+            self.assertEqual(relay_all(), {'crm': 2})
+        self.assertEqual([[event['key'] for event in batch] for batch in RecordingHandler.batches],
+                         [['test:1', 'test:2']])
+
+    def test_prune_keeps_undelivered_events(self):
+        """Test that only old events every consumer received are deleted."""
+        OutboxEvent.objects.all().delete()
+        events = [publish('test.event', f'test:{n}', {}) for n in range(3)]
+        OutboxEvent.objects.update(created_at=timezone.now() - timedelta(days=30))
+        consumers = {'warehouse': f'file://{self.events_file}', 'crm': 'http://127.0.0.1:1/events'}
+
+        with override_settings(OUTBOX_CONSUMERS=consumers):
+            relay('warehouse', batch_size=2)
+            # crm never ran: nothing may go.
+            self.assertEqual(prune(retention_days=7), 0)
+            ConsumerOffset.objects.create(consumer='crm', last_event_id=events[2].event_id)
+            self.assertEqual(prune(retention_days=7), 2)
+        self.assertEqual(list(OutboxEvent.objects.values_list('pk', flat=True)), [events[2].pk])
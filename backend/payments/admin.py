@@ -1,11 +1,14 @@
 from django.contrib import admin
+from mobile_store.admin_utils import LargeTableAdmin
 from .models import Payment
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdmin):
     list_display = ['payment_id', 'order', 'amount', 'payment_method', 'status', 'payment_date']
     list_filter = ['status', 'payment_method', 'payment_date']
+    list_select_related = ['order__customer']
     search_fields = ['payment_id', 'order__order_id', 'transaction_id', 'order__customer__name']
     readonly_fields = ['payment_id', 'payment_date', 'updated_at']
+    autocomplete_fields = ['order']
     list_editable = ['status']
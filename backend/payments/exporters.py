@@ -0,0 +1,15 @@
+"""
+Export definition for payments (see mobile_store/exports.py).
+"""
+
+from mobile_store.exports import ExportSpec
+from .models import Payment
+
+PAYMENT_EXPORT = ExportSpec(
+    name='payments',
+    queryset=Payment.objects.select_related('order__customer'),
+    fields=(
+        'payment_id', 'order_id', 'order__customer__email', 'amount', 'payment_method',
+        'payment_date', 'status', 'transaction_id', 'notes', 'updated_at',
+    ),
+)
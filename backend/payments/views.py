@@ -1,10 +1,15 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.db import transaction
+from .exporters import PAYMENT_EXPORT
 from .models import Payment
 from .serializers import PaymentSerializer, CreatePaymentSerializer
 from orders.models import Order
+from mobile_store.exports import export_response
+from mobile_store.metrics import PAYMENTS
+from outbox.events import payment_payload, publish, publish_order_status
 
 
 class PaymentViewSet(viewsets.ModelViewSet):
@@ -16,9 +21,25 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Non-admin users can only see payments for their own orders
+        payments = Payment.objects.select_related('order__customer')
         if self.request.user.is_staff:
-            return Payment.objects.all()
-        return Payment.objects.filter(order__customer=self.request.user)
+            return payments
+        return payments.filter(order__customer=self.request.user)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            payment = serializer.save()
+            publish('payment.created', f'payment:{payment.payment_id}', payment_payload(payment))
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            payment = serializer.save()
+            publish('payment.updated', f'payment:{payment.payment_id}', payment_payload(payment))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every payment as CSV or JSONL (admin only)"""
+        return export_response(request, PAYMENT_EXPORT)
 
     @action(detail=False, methods=['post'])
     def create_payment(self, request):
@@ -50,20 +71,26 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Create payment
-        payment = Payment.objects.create(
-            order=order,
-            amount=order.total_amount,
-            payment_method=serializer.validated_data['payment_method'],
-            transaction_id=serializer.validated_data.get('transaction_id', ''),
-            notes=serializer.validated_data.get('notes', ''),
-            status='COMPLETED'  # In real app, this would be PENDING until payment gateway confirms
-        )
-
-        # Update order status
-        if payment.status == 'COMPLETED':
-            order.status = 'CONFIRMED'
-            order.save()
+        with transaction.atomic():
+            # Create payment
+            payment = Payment.objects.create(
+                order=order,
+                amount=order.total_amount,
+                payment_method=serializer.validated_data['payment_method'],
+                transaction_id=serializer.validated_data.get('transaction_id', ''),
+                notes=serializer.validated_data.get('notes', ''),
+                status='COMPLETED'  # In real app, this would be PENDING until payment gateway confirms
+            )
+            publish('payment.created', f'payment:{payment.payment_id}', payment_payload(payment))
+
+            # Update order status
+            if payment.status == 'COMPLETED':
+                previous_status = order.status
+                order.status = 'CONFIRMED'
+                order.save()
+                publish_order_status(order, previous_status)
+
+        PAYMENTS.labels(payment.payment_method, payment.status).inc()
 
         payment_serializer = self.get_serializer(payment)
         return Response(payment_serializer.data, status=status.HTTP_201_CREATED)
@@ -86,16 +113,21 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        payment.status = new_status
-        payment.save()
-
-        # Update order status based on payment status
-        if new_status == 'COMPLETED':
-            payment.order.status = 'CONFIRMED'
-            payment.order.save()
-        elif new_status == 'FAILED':
-            payment.order.status = 'PENDING'
-            payment.order.save()
+        with transaction.atomic():
+            payment.status = new_status
+            payment.save()
+            publish('payment.updated', f'payment:{payment.payment_id}', payment_payload(payment))
+
+            # Update order status based on payment status
+            order = payment.order
+            previous_status = order.status
+            if new_status == 'COMPLETED':
+                order.status = 'CONFIRMED'
+                order.save()
+            elif new_status == 'FAILED':
+                order.status = 'PENDING'
+                order.save()
+            publish_order_status(order, previous_status)
 
         serializer = self.get_serializer(payment)
         return Response(serializer.data)
@@ -1,4 +1,6 @@
 from django.contrib import admin
+from mobile_store.admin_utils import CachedAllValuesFieldListFilter, LargeTableAdmin
+from mobile_store.repricing import reprice_action
 from .models import Brand, MobilePhone
 
 
@@ -7,12 +9,25 @@ class BrandAdmin(admin.ModelAdmin):
     list_display = ['brand_id', 'brand_name', 'country_of_origin', 'created_at']
     search_fields = ['brand_name', 'country_of_origin']
     list_filter = ['country_of_origin', 'created_at']
+    actions = [reprice_action(
+        'PHONE',
+        products=lambda brands: MobilePhone.objects.filter(brand__in=brands),
+        description='Reprice all phones of selected brands',
+    )]
 
 
 @admin.register(MobilePhone)
-class MobilePhoneAdmin(admin.ModelAdmin):
+class MobilePhoneAdmin(LargeTableAdmin):
     list_display = ['phone_id', 'brand', 'model_name', 'price', 'stock_quantity', 'os', 'created_at']
     search_fields = ['model_name', 'brand__brand_name', 'processor']
-    list_filter = ['brand', 'os', 'ram', 'storage', 'created_at']
+    list_filter = [
+        'brand', 'os',
+        ('ram', CachedAllValuesFieldListFilter),
+        ('storage', CachedAllValuesFieldListFilter),
+        'created_at',
+    ]
+    list_select_related = ['brand']
+    autocomplete_fields = ['brand']
     list_editable = ['price', 'stock_quantity']
     readonly_fields = ['created_at', 'updated_at']
+    actions = [reprice_action('PHONE', description='Reprice selected phones')]
@@ -0,0 +1,61 @@
+"""
+Async read-only views for brands and phones, served under ASGI.
+
+See mobile_store/urls_asgi.py. Responses match the GET actions of
+BrandViewSet and MobilePhoneViewSet.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.http import JsonResponse
+from inventory.reservations import with_available_stock
+from mobile_store.async_views import bad_request, filter_catalog, not_found, paginate
+from .models import Brand, MobilePhone
+from .serializers import BrandSerializer, MobilePhoneDetailSerializer, MobilePhoneSerializer
+from .views import BrandViewSet, MobilePhoneViewSet
+
+
+async def brand_list(request):
+    """List brands with their phone counts"""
+    queryset = filter_catalog(
+        Brand.objects.annotate(phone_count=Count('phones')).order_by('brand_name'),
+        request.GET,
+        search_fields=BrandViewSet.search_fields,
+        ordering_fields=BrandViewSet.ordering_fields,
+    )
+    return await paginate(request, queryset, BrandSerializer)
+
+
+async def brand_detail(request, pk):
+    """Retrieve a brand"""
+    try:
+        brand = await Brand.objects.annotate(phone_count=Count('phones')).aget(pk=pk)
+    except Brand.DoesNotExist:
+        return not_found()
+    return JsonResponse(BrandSerializer(brand, context={'request': request}).data)
+
+
+async def phone_list(request):
+    """List phones, newest changes first"""
+    try:
+        queryset = filter_catalog(
+            with_available_stock(MobilePhone.objects.select_related('brand').order_by('-updated_at'), 'PHONE'),
+            request.GET,
+            filter_fields=MobilePhoneViewSet.filterset_fields,
+            search_fields=MobilePhoneViewSet.search_fields,
+            ordering_fields=MobilePhoneViewSet.ordering_fields,
+        )
+        return await paginate(request, queryset, MobilePhoneSerializer)
+    except (ValueError, ValidationError) as e:
+        return bad_request(str(e))
+
+
+async def phone_detail(request, pk):
+    """Retrieve a phone with its brand details"""
+    try:
+        phone = await with_available_stock(MobilePhone.objects.select_related('brand'), 'PHONE').aget(pk=pk)
+    except MobilePhone.DoesNotExist:
+        return not_found()
+    phone.brand.phone_count = await MobilePhone.objects.filter(brand_id=phone.brand_id).acount()
+    return JsonResponse(MobilePhoneDetailSerializer(phone, context={'request': request}).data)
+
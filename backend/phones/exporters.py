@@ -0,0 +1,16 @@
+"""
+Export definition for phones (see mobile_store/exports.py).
+"""
+
+from mobile_store.exports import ExportSpec
+from .models import MobilePhone
+
+PHONE_EXPORT = ExportSpec(
+    name='phones',
+    queryset=MobilePhone.objects.select_related('brand'),
+    fields=(
+        'phone_id', 'brand__brand_name', 'model_name', 'price', 'stock_quantity',
+        'ram', 'storage', 'battery_capacity', 'processor', 'os', 'description',
+        'image_url', 'image__name', 'created_at', 'updated_at',
+    ),
+)
@@ -0,0 +1,22 @@
+"""
+Catalog import definition for phones (see mobile_store/catalog_import.py).
+"""
+
+from mobile_store.catalog_import import ImportSpec
+from .models import Brand, MobilePhone
+from .serializers import MobilePhoneImportSerializer
+
+
+def load_brands(records):
+    """Resolve the brand names used in a chunk of records with one query."""
+    names = {record['brand'] for record in records if isinstance(record.get('brand'), str)}
+    return {'brands': dict(Brand.objects.filter(brand_name__in=names).values_list('brand_name', 'pk'))}
+
+
+PHONE_IMPORT = ImportSpec(
+    model=MobilePhone,
+    serializer_class=MobilePhoneImportSerializer,
+    key=('brand', 'model_name'),
+    fields=tuple(MobilePhoneImportSerializer.Meta.fields),
+    context_loader=load_brands,
+)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phones', '0002_mobilephone_image_alter_mobilephone_image_url'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='mobilephone',
+            constraint=models.CheckConstraint(check=models.Q(('price__gte', 0), ('price__lte', 999999.99)), name='mobilephone_price_bounds'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:49
+
+from django.db import migrations, models
+import mobile_store.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phones', '0004_mobilephone_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mobilephone',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Upload image file (optional if image URL is provided)', null=True, upload_to='phones/', validators=[mobile_store.validators.validate_image_file]),
+        ),
+    ]
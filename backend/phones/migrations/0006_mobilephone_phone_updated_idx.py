@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phones', '0005_alter_mobilephone_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mobilephone',
+            index=models.Index(fields=['updated_at', 'phone_id'], name='phone_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phones', '0006_mobilephone_phone_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mobilephone',
+            name='xact_id',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Writing transaction, set by trigger on PostgreSQL (see mobile_store/visibility.py)', null=True),
+        ),
+    ]
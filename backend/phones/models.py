@@ -1,4 +1,7 @@
 from django.db import models
+from mobile_store.constants import MAX_PRICE
+from mobile_store.models import LoadedStockMixin
+from mobile_store.validators import validate_image_file
 
 
 class Brand(models.Model):
@@ -18,7 +21,7 @@ class Brand(models.Model):
         return self.brand_name
 
 
-class MobilePhone(models.Model):
+class MobilePhone(LoadedStockMixin, models.Model):
     """Model for mobile phones"""
     OS_CHOICES = [
         ('Android', 'Android'),
@@ -39,15 +42,28 @@ class MobilePhone(models.Model):
     os = models.CharField(max_length=50, choices=OS_CHOICES)
     description = models.TextField(blank=True, null=True)
     image_url = models.URLField(blank=True, null=True, help_text='Image URL (optional if image file is uploaded)')
-    image = models.ImageField(upload_to='phones/', blank=True, null=True, help_text='Upload image file (optional if image URL is provided)')
+    image = models.ImageField(upload_to='phones/', blank=True, null=True, validators=[validate_image_file], help_text='Upload image file (optional if image URL is provided)')
+    image_derivatives = models.JSONField(default=dict, blank=True, null=True, editable=False, help_text='Resized copies of image (see mobile_store/images.py)')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    xact_id = models.BigIntegerField(null=True, blank=True, editable=False, help_text='Writing transaction, set by trigger on PostgreSQL (see mobile_store/visibility.py)')
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Mobile Phone'
         verbose_name_plural = 'Mobile Phones'
         unique_together = ['brand', 'model_name']
+        indexes = [
+            # Keyset order of the change feed (see mobile_store/changes.py).
+            models.Index(fields=['updated_at', 'phone_id'], name='phone_updated_idx'),
+        ]
+        constraints = [
+            # validate_price bounds, enforced for bulk updates too
+            models.CheckConstraint(
+                check=models.Q(price__gte=0, price__lte=MAX_PRICE),
+                name='mobilephone_price_bounds',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.brand.brand_name} {self.model_name}"
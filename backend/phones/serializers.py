@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from inventory.reservations import available_stock
+from mobile_store.images import ImageSrcsetField
+from mobile_store.validators import validate_image_file, validate_price, validate_stock_quantity
 from .models import Brand, MobilePhone
 
 
@@ -12,6 +15,9 @@ class BrandSerializer(serializers.ModelSerializer):
         read_only_fields = ['brand_id', 'created_at', 'updated_at']
 
     def get_phone_count(self, obj):
+        # Use the annotation from the viewset queryset when present
+        if hasattr(obj, 'phone_count'):
+            return obj.phone_count
         return obj.phones.count()
 
 
@@ -19,19 +25,27 @@ class MobilePhoneSerializer(serializers.ModelSerializer):
     """Serializer for MobilePhone model"""
     brand_name = serializers.CharField(source='brand.brand_name', read_only=True)
     is_in_stock = serializers.BooleanField(read_only=True)
-    image = serializers.ImageField(required=False, allow_null=True)
+    available_stock = serializers.SerializerMethodField()
+    image = serializers.ImageField(required=False, allow_null=True, validators=[validate_image_file])
     image_display = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = MobilePhone
         fields = [
             'phone_id', 'brand', 'brand_name', 'model_name', 'price',
-            'stock_quantity', 'ram', 'storage', 'battery_capacity',
+            'stock_quantity', 'available_stock', 'ram', 'storage', 'battery_capacity',
             'processor', 'os', 'description', 'image_url', 'image', 'image_display',
-            'is_in_stock', 'created_at', 'updated_at'
+            'image_srcset', 'is_in_stock', 'created_at', 'updated_at'
         ]
         read_only_fields = ['phone_id', 'created_at', 'updated_at']
-    
+
+    def get_available_stock(self, obj):
+        # Use the annotation from the viewset queryset when present
+        if hasattr(obj, 'available_stock'):
+            return obj.available_stock
+        return available_stock('PHONE', obj.pk)
+
     def get_image_display(self, obj):
         """Return the best available image URL"""
         request = self.context.get('request')
@@ -58,3 +72,36 @@ class MobilePhoneDetailSerializer(MobilePhoneSerializer):
 
     class Meta(MobilePhoneSerializer.Meta):
         fields = MobilePhoneSerializer.Meta.fields + ['brand_details']
+
+
+class MobilePhoneImportSerializer(MobilePhoneSerializer):
+    """
+    Validates one row of a catalog import file.
+
+    The brand is given by name and resolved from ``context['brands']``;
+    the (brand, model_name) uniqueness check is left to the upsert.
+    """
+    brand = serializers.CharField(max_length=100)
+    brand_name = None
+    is_in_stock = None
+    available_stock = None
+    image = None
+    image_display = None
+    image_srcset = None
+
+    class Meta(MobilePhoneSerializer.Meta):
+        fields = [
+            'brand', 'model_name', 'price', 'stock_quantity', 'ram', 'storage',
+            'battery_capacity', 'processor', 'os', 'description', 'image_url',
+        ]
+        extra_kwargs = {
+            'price': {'validators': [validate_price]},
+            'stock_quantity': {'validators': [validate_stock_quantity]},
+        }
+        validators = []
+
+    def validate_brand(self, value):
+        brand_id = self.context['brands'].get(value)
+        if brand_id is None:
+            raise serializers.ValidationError(f'Unknown brand "{value}"')
+        return brand_id
@@ -2,9 +2,14 @@
 Tests for phones app models.
 """
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 from decimal import Decimal
+from rest_framework.test import APIClient
+from customers.models import Customer
 from phones.models import Brand, MobilePhone
 
 
@@ -114,3 +119,464 @@ class MobilePhoneModelTest(TestCase):
         phone.price = Decimal('899.99')
         phone.save()
         self.assertGreater(phone.updated_at, original_updated)
+
+
+class AsyncCatalogViewTest(TestCase):
+    """Test cases for the async catalog views served under ASGI."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.brand = Brand.objects.create(
+            brand_name='Samsung',
+            country_of_origin='South Korea'
+        )
+        for i in range(25):
+            MobilePhone.objects.create(
+                brand=self.brand,
+                model_name=f'Galaxy S{i}',
+                price=Decimal('499.99') + i,
+                stock_quantity=i,
+                ram='8GB',
+                storage='256GB',
+                battery_capacity='4000mAh',
+                processor='Snapdragon 8 Gen 3',
+                os='Android',
+            )
+
+    async def test_phone_list_matches_sync_viewset(self):
+        """Test that the async list returns the same page as the viewset."""
+        sync_response = await sync_to_async(self.client.get)('/api/phones/?page=2&ordering=price')
+        async_response = await self.async_client.get('/api/phones/?page=2&ordering=price')
+
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response.json()['count'], 25)
+        self.assertEqual(
+            [phone['phone_id'] for phone in async_response.json()['results']],
+            [phone['phone_id'] for phone in sync_response.json()['results']],
+        )
+
+    async def test_phone_detail_includes_brand(self):
+        """Test retrieving a phone with brand details."""
+        phone = await MobilePhone.objects.afirst()
+        response = await self.async_client.get(f'/api/phones/{phone.phone_id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['brand_details']['phone_count'], 25)
+
+    async def test_missing_phone_returns_404(self):
+        """Test that unknown ids return the standard error body."""
+        response = await self.async_client.get('/api/phones/999999/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['success'])
+
+    async def test_writes_fall_through_to_viewset(self):
+        """Test that non-GET requests are still handled by the viewset."""
+        response = await self.async_client.post('/api/phones/', {})
+        self.assertEqual(response.status_code, 401)
+
+
+class CatalogImportTest(TestCase):
+    """Test cases for the bulk phone import endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phone = MobilePhone.objects.create(
+            brand=self.brand,
+            model_name='Galaxy S24',
+            price=Decimal('799.99'),
+            stock_quantity=5,
+            ram='8GB',
+            storage='256GB',
+            battery_capacity='4000mAh',
+            processor='Exynos 2400',
+            os='Android',
+            description='Flagship',
+        )
+        self.admin = Customer.objects.create_superuser(
+            email='admin@example.com', password='Admin!Pass1', name='Admin', phone='5550001'
+        )
+        self.client = APIClient()
+
+    def upload(self, content, name='phones.csv'):
+        return self.client.post(
+            '/api/phones/import/',
+            {'file': SimpleUploadedFile(name, content.encode())},
+            format='multipart',
+        )
+
+    def test_import_creates_updates_and_reports_errors(self):
+        """Test the upsert and per-row error reporting."""
+        self.client.force_authenticate(self.admin)
+        response = self.upload(
+            'brand,model_name,price,stock_quantity,ram,storage,battery_capacity,processor,os\n'
+            'Samsung,Galaxy S24,749.99,20,8GB,256GB,4000mAh,Exynos 2400,Android\n'
+            'Samsung,Galaxy A55,399.99,50,8GB,128GB,5000mAh,Exynos 1480,Android\n'
+            'Nokia,3310,49.99,5,1GB,1GB,1000mAh,Basic,Other\n'
+            'Samsung,Galaxy Z,-1,5,12GB,512GB,4400mAh,Snapdragon,Android\n'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual([error['line'] for error in response.data['errors']], [4, 5])
+
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.price, Decimal('749.99'))
+        self.assertEqual(self.phone.stock_quantity, 20)
+        self.assertEqual(self.phone.description, 'Flagship')
+        self.assertTrue(MobilePhone.objects.filter(model_name='Galaxy A55').exists())
+
+    def test_import_records_stock_changes_in_ledger(self):
+        """Test that imported stock changes are ledger movements."""
+        from inventory.ledger import reconcile
+        from inventory.models import StockMovement
+        self.client.force_authenticate(self.admin)
+        self.upload(
+            'brand,model_name,price,stock_quantity,ram,storage,battery_capacity,processor,os\n'
+            'Samsung,Galaxy S24,749.99,20,8GB,256GB,4000mAh,Exynos 2400,Android\n'
+            'Samsung,Galaxy A55,399.99,50,8GB,128GB,5000mAh,Exynos 1480,Android\n'
+        )
+        new = MobilePhone.objects.get(model_name='Galaxy A55')
+
+        movements = StockMovement.objects.filter(reason='IMPORT').order_by('product_id')
+        self.assertEqual(
+            [(m.product_id, m.delta) for m in movements],
+            [(self.phone.pk, 15), (new.pk, 50)]
+        )
+
+        # Re-importing the same stock records nothing.
+        self.upload(
+            'brand,model_name,price,stock_quantity,ram,storage,battery_capacity,processor,os\n'
+            'Samsung,Galaxy S24,699.99,20,8GB,256GB,4000mAh,Exynos 2400,Android\n'
+        )
+        self.assertEqual(StockMovement.objects.filter(reason='IMPORT').count(), 2)
+        self.assertEqual(
+            [item['product_id'] for item in reconcile() if item['product_type'] == 'PHONE'],
+            []
+        )
+
+    def test_import_jsonl_dry_run(self):
+        """Test that a dry run validates without saving."""
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            '/api/phones/import/?dry_run=1',
+            {'file': SimpleUploadedFile('feed.jsonl', (
+                b'{"brand": "Samsung", "model_name": "Galaxy A15", "price": "199.99", '
+                b'"ram": "4GB", "storage": "64GB", "battery_capacity": "5000mAh", '
+                b'"processor": "Helio", "os": "Android"}\n'
+            ))},
+            format='multipart',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(MobilePhone.objects.filter(model_name='Galaxy A15').exists())
+
+    def test_import_requires_admin(self):
+        """Test that customers cannot import."""
+        customer = Customer.objects.create_user(
+            email='buyer@example.com', password='Buyer!Pass1', name='Buyer', phone='5551234'
+        )
+        self.client.force_authenticate(customer)
+        response = self.upload('brand,model_name\n')
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkRepriceTest(TestCase):
+    """Test cases for set-based brand repricing."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        other = Brand.objects.create(brand_name='Apple', country_of_origin='USA')
+        self.phones = [
+            MobilePhone.objects.create(
+                brand=brand, model_name=f'Model {i}', price=price, stock_quantity=5, ram='8GB',
+                storage='128GB', battery_capacity='4000mAh', processor='Chip', os='Android'
+            )
+            for i, (brand, price) in enumerate([
+                (self.brand, Decimal('100.00')), (self.brand, Decimal('249.99')), (other, Decimal('500.00')),
+            ])
+        ]
+        self.admin = Customer.objects.create_superuser(
+            email='admin@example.com', password='Admin!Pass1', name='Admin', phone='5550001'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def prices(self):
+        return [MobilePhone.objects.get(pk=phone.pk).price for phone in self.phones]
+
+    def test_percentage_change_applies_to_brand_only(self):
+        """Test that a brand discount reprices its phones and touches carts holding them."""
+        from cart.models import Cart, CartItem
+        cart = Cart.objects.create(customer=self.admin)
+        CartItem.objects.create(cart=cart, product_type='PHONE', product_id=self.phones[0].pk)
+        before = Cart.objects.get().updated_at
+
+        response = self.client.post(f'/api/phones/brands/{self.brand.pk}/reprice/', {'percent': '-10'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': 2, 'carts_refreshed': 1})
+        self.assertEqual(self.prices(), [Decimal('90.00'), Decimal('224.99'), Decimal('500.00')])
+        self.assertGreater(Cart.objects.get().updated_at, before)
+
+    def test_out_of_bounds_change_is_rejected_atomically(self):
+        """Test that the price check constraint rejects the whole update."""
+        response = self.client.post(f'/api/phones/brands/{self.brand.pk}/reprice/', {'amount': '-150.00'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('1 product(s)', response.data['error'])
+        self.assertEqual(self.prices(), [Decimal('100.00'), Decimal('249.99'), Decimal('500.00')])
+
+    def test_exactly_one_change_required(self):
+        """Test that percent and amount are mutually exclusive."""
+        response = self.client.post(
+            f'/api/phones/brands/{self.brand.pk}/reprice/', {'percent': '5', 'amount': '1.00'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_action_reprices_selected_brands(self):
+        """Test the brand admin action after confirming the change."""
+        self.client.force_login(self.admin)
+        selection = {'action': 'reprice', '_selected_action': [self.brand.pk]}
+        response = self.client.post('/admin/phones/brand/', selection)
+        self.assertContains(response, 'Apply price change')
+
+        response = self.client.post('/admin/phones/brand/', {**selection, 'apply': '1', 'amount': '5.00'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.prices(), [Decimal('105.00'), Decimal('254.99'), Decimal('500.00')])
+
+
+class ImageDerivativeTest(TestCase):
+    """Test cases for resized image derivatives."""
+
+    def setUp(self):
+        """Set up test data."""
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, IMAGE_DERIVATIVES_IN_BACKGROUND=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+
+    def png(self, width=800, height=600):
+        import io
+        from PIL import Image
+
+        output = io.BytesIO()
+        Image.new('RGBA', (width, height), (200, 30, 30, 128)).save(output, 'PNG')
+        return SimpleUploadedFile('galaxy.png', output.getvalue(), content_type='image/png')
+
+    def create_phone(self, image, build=True):
+        """Create a phone and, unless ``build`` is False, run the queued image jobs."""
+        from jobs.queue import run_pending
+
+        with self.captureOnCommitCallbacks(execute=True):
+            phone = MobilePhone.objects.create(
+                brand=self.brand, model_name='Galaxy S24', price=Decimal('799.99'), stock_quantity=5,
+                ram='8GB', storage='128GB', battery_capacity='4000mAh', processor='Chip', os='Android',
+                image=image
+            )
+        if build:
+            run_pending(['images'])
+        return phone
+
+    def test_upload_builds_derivatives_and_srcset(self):
+        """Test that saving an image builds every size without upscaling."""
+        phone = self.create_phone(self.png())
+        phone.refresh_from_db()
+
+        derivatives = phone.image_derivatives
+        self.assertEqual(derivatives['source'], phone.image.name)
+        self.assertEqual(
+            {size: entry['width'] for size, entry in derivatives['sizes'].items()},
+            {'thumbnail': 160, 'card': 480, 'detail': 800}
+        )
+        self.assertEqual(derivatives['sizes']['card']['height'], 360)
+        for name in derivatives['sizes']['thumbnail'].values():
+            if isinstance(name, str):
+                self.assertTrue(phone.image.storage.exists(name))
+
+        response = APIClient().get(f'/api/phones/{phone.pk}/')
+        srcset = response.data['image_srcset']
+        self.assertEqual(srcset['webp'].count('w, '), 2)
+        self.assertTrue(srcset['webp'].endswith(' 800w'))
+        self.assertTrue(srcset['src'].endswith(derivatives['sizes']['card']['jpeg']))
+
+    def test_derivatives_are_built_by_a_background_job(self):
+        """Test that with background derivatives the upload only queues a job."""
+        from jobs.models import Job
+        from jobs.queue import run_pending
+
+        phone = self.create_phone(self.png(), build=False)
+        phone.refresh_from_db()
+        self.assertEqual(phone.image_derivatives, {})
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.queue), ('mobile_store.tasks.build_image_derivatives', 'images'))
+
+        self.assertEqual(run_pending(['images']), 1)
+        phone.refresh_from_db()
+        self.assertEqual(phone.image_derivatives['source'], phone.image.name)
+
+    def test_removing_image_clears_derivatives(self):
+        """Test that derivatives are dropped with the image."""
+        phone = self.create_phone(self.png())
+        phone.refresh_from_db()
+        phone.image = None
+        phone.save()
+        phone.refresh_from_db()
+
+        self.assertEqual(phone.image_derivatives, {})
+        self.assertIsNone(APIClient().get(f'/api/phones/{phone.pk}/').data['image_srcset'])
+
+    def test_backfill_command(self):
+        """Test that the management command builds missing derivatives."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        phone = self.create_phone(self.png(100, 100))
+        MobilePhone.objects.filter(pk=phone.pk).update(image_derivatives={})
+
+        call_command('generate_image_derivatives', 'phones', '--workers', '1', stdout=StringIO())
+
+        phone.refresh_from_db()
+        self.assertEqual(phone.image_derivatives['sizes']['detail']['width'], 100)
+
+
+class ImageDerivativePoolTest(TransactionTestCase):
+    """Test cases for image derivatives built without background jobs."""
+
+    def test_pools_build_derivatives_off_the_request_thread(self):
+        """Test that the web process resizes in its pools after the commit."""
+        import io
+        import shutil
+        import tempfile
+        from PIL import Image
+        from jobs.models import Job
+        from mobile_store.images import shutdown_pools
+
+        output = io.BytesIO()
+        Image.new('RGB', (320, 240), (30, 200, 30)).save(output, 'PNG')
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root, IMAGE_DERIVATIVES_IN_BACKGROUND=False):
+            brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+            phone = MobilePhone.objects.create(
+                brand=brand, model_name='Galaxy S24', price=Decimal('799.99'), stock_quantity=5,
+                ram='8GB', storage='128GB', battery_capacity='4000mAh', processor='Chip', os='Android',
+                image=SimpleUploadedFile('galaxy.png', output.getvalue(), content_type='image/png')
+            )
+            shutdown_pools()
+
+        phone.refresh_from_db()
+        self.assertEqual(phone.image_derivatives['sizes']['detail']['width'], 320)
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(CATALOG_CHANGES_LAG=0, CATALOG_CHANGES_PAGE_SIZE=2)
+class ChangeFeedTest(TestCase):
+    """Test cases for the incremental catalog change feed."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.brand = Brand.objects.create(brand_name='Samsung', country_of_origin='South Korea')
+        self.phones = [
+            MobilePhone.objects.create(
+                brand=self.brand, model_name=f'Model {i}', price=Decimal('100.00'), stock_quantity=5, ram='8GB',
+                storage='128GB', battery_capacity='4000mAh', processor='Chip', os='Android'
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def sync(self, cursor=None):
+        """Follow the feed from ``cursor`` to its end."""
+        changed, deleted = [], []
+        while True:
+            response = self.client.get('/api/phones/changes/', {'since': cursor} if cursor else {})
+            self.assertEqual(response.status_code, 200)
+            changed += [row['phone_id'] for row in response.data['changes']]
+            deleted += response.data['deleted']
+            cursor = response.data['cursor']
+            if not response.data['has_more']:
+                return changed, deleted, cursor
+
+    def test_cold_start_then_deltas(self):
+        """Test that a client gets the catalog once, then only what changed."""
+        changed, deleted, cursor = self.sync()
+        self.assertEqual(changed, [phone.pk for phone in self.phones])
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.sync(cursor)[:2], ([], []))
+
+        self.phones[2].price = Decimal('90.00')
+        self.phones[2].save()
+        MobilePhone.objects.filter(pk=self.phones[0].pk).update(stock_quantity=0, updated_at=timezone.now())
+        removed = self.phones[1].pk
+        self.phones[1].delete()
+
+        changed, deleted, cursor = self.sync(cursor)
+        self.assertEqual(changed, [self.phones[2].pk, self.phones[0].pk])
+        self.assertEqual(deleted, [removed])
+
+        # A renamed brand changes brand_name of its phones.
+        self.brand.brand_name = 'Samsung Electronics'
+        self.brand.save()
+        changed, deleted, _ = self.sync(cursor)
+        self.assertEqual(sorted(changed), [self.phones[0].pk, self.phones[2].pk])
+        self.assertEqual(deleted, [])
+
+    def test_brand_deletion_leaves_tombstones(self):
+        """Test that cascaded deletes are reported too."""
+        cursor = self.sync()[2]
+        ids = [phone.pk for phone in self.phones]
+        self.brand.delete()
+        self.assertEqual(sorted(self.sync(cursor)[1]), ids)
+
+    def test_transaction_ids_order_feed_on_postgresql(self):
+        """Test that a slow transaction's rows are not skipped by cursors handed out meanwhile."""
+        from unittest import mock
+        from mobile_store.changes import encode_cursor
+        from mobile_store.models import Tombstone
+
+        # Transaction 100 is still running; 90 and 101 have committed.
+        for phone, xact_id in zip(self.phones, (100, 90, 101)):
+            MobilePhone.objects.filter(pk=phone.pk).update(xact_id=xact_id)
+        Tombstone.objects.create(product_type='PHONE', product_id=999, xact_id=101)
+        with mock.patch('mobile_store.changes.uses_xact_ids', return_value=True), \
+                mock.patch('mobile_store.changes.visible_xmin', return_value=100) as xmin:
+            changed, deleted, cursor = self.sync()
+            self.assertEqual(changed, [self.phones[1].pk])
+
+            # Transaction 100 commits after the cursor was handed out.
+            xmin.return_value = 102
+            changed, deleted, cursor = self.sync(cursor)
+            self.assertEqual(changed, [self.phones[0].pk, self.phones[2].pk])
+            self.assertEqual(deleted, [999])
+
+            # Cursors ordered by updated_at predate the switch: reload.
+            response = self.client.get('/api/phones/changes/', {'since': encode_cursor(timezone.now(), 0)})
+            self.assertEqual(response.status_code, 410)
+
+    def test_invalid_and_expired_cursors(self):
+        """Test that bad cursors are rejected and old ones must resync."""
+        from datetime import timedelta
+        from mobile_store.changes import encode_cursor, prune_tombstones
+        from mobile_store.models import Tombstone
+
+        response = self.client.get('/api/phones/changes/', {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        expired = encode_cursor(timezone.now() - timedelta(days=31), 0)
+        response = self.client.get('/api/phones/changes/', {'since': expired})
+        self.assertEqual(response.status_code, 410)
+
+        self.phones[0].delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(prune_tombstones(), 1)
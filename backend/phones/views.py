@@ -4,18 +4,27 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
+from inventory.reservations import with_available_stock
+from mobile_store.catalog_import import import_upload
+from mobile_store.changes import changes_response
+from mobile_store.db_router import ReplicaReadMixin
+from mobile_store.exports import export_response
+from mobile_store.repricing import RepriceSerializer, reprice_response
+from .exporters import PHONE_EXPORT
+from .importers import PHONE_IMPORT
 from .models import Brand, MobilePhone
 from .serializers import BrandSerializer, MobilePhoneSerializer, MobilePhoneDetailSerializer
 
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for Brand CRUD operations
     List, Create, Retrieve, Update, Delete brands
     """
-    queryset = Brand.objects.all()
+    queryset = Brand.objects.annotate(phone_count=Count('phones')).order_by('brand_name')
     serializer_class = BrandSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -23,12 +32,20 @@ class BrandViewSet(viewsets.ModelViewSet):
     ordering_fields = ['brand_name', 'created_at']
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'reprice']:
             return [IsAdminUser()]
         return [IsAuthenticatedOrReadOnly()]
 
+    @action(detail=True, methods=['post'])
+    def reprice(self, request, pk=None):
+        """Change the price of every phone of this brand in one update (admin only)"""
+        serializer = RepriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        phones = MobilePhone.objects.filter(brand=self.get_object())
+        return reprice_response(phones, 'PHONE', serializer.validated_data)
 
-class MobilePhoneViewSet(viewsets.ModelViewSet):
+
+class MobilePhoneViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for MobilePhone CRUD operations
     List, Create, Retrieve, Update, Delete mobile phones
@@ -48,13 +65,17 @@ class MobilePhoneViewSet(viewsets.ModelViewSet):
         return MobilePhoneSerializer
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_import', 'export']:
             return [IsAdminUser()]
         return [IsAuthenticatedOrReadOnly()]
 
     def get_queryset(self):
         """Ensure fresh data is always fetched from database"""
-        return MobilePhone.objects.select_related('brand').all().order_by('-updated_at')
+        queryset = MobilePhone.objects.select_related('brand').all().order_by('-updated_at')
+        if self.action in ('list', 'retrieve'):
+            # Writes respond with the stock after the change instead.
+            queryset = with_available_stock(queryset, 'PHONE')
+        return queryset
 
     def _add_no_cache_headers(self, response):
         """Add comprehensive no-cache headers to response"""
@@ -84,3 +105,22 @@ class MobilePhoneViewSet(viewsets.ModelViewSet):
     def partial_update(self, request, *args, **kwargs):
         response = super().partial_update(request, *args, **kwargs)
         return self._add_no_cache_headers(response)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """Create or update phones from an uploaded CSV or JSONL file (admin only)"""
+        return import_upload(request, PHONE_IMPORT)
+
+    @action(detail=False, methods=['get'])
+    @method_decorator(never_cache)
+    def changes(self, request):
+        """Phones changed or deleted since ``?since=<cursor>`` (see mobile_store/changes.py)"""
+        return changes_response(
+            request, with_available_stock(MobilePhone.objects.select_related('brand'), 'PHONE'), 'PHONE',
+            MobilePhoneSerializer
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every phone as CSV or JSONL (admin only)"""
+        return export_response(request, PHONE_EXPORT)